@@ -0,0 +1,97 @@
+"""
+JWT authentication with user claims embedded in the token.
+
+Tokens issued by ``ClaimsTokenObtainPairSerializer`` carry the user's role,
+department id and student id. With ``STATELESS_JWT_AUTH`` enabled,
+``StatelessJWTAuthentication`` builds a ``ClaimsUser`` from those claims
+instead of loading the ``User`` row, and the row is only fetched when a view
+reads an attribute the token does not carry.
+
+Because the row is not loaded, deactivating a user (``is_active=False``) does
+not revoke access tokens that were already issued. They keep working until they
+expire, which is at most ``SIMPLE_JWT["ACCESS_TOKEN_LIFETIME"]``. Refreshing
+checks the row, so the user cannot get a new access token. Refreshed tokens
+copy the claims of the refresh token, so a role or department change only
+takes effect at the next login.
+"""
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.users.models import User
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token["role"] = user.role
+        token["department_id"] = user.department_id
+        token["student_id"] = user.student_id
+        token["is_staff"] = user.is_staff
+        token["is_superuser"] = user.is_superuser
+        return token
+
+
+class ClaimsUser(TokenUser):
+    """
+    Token-backed user exposing the role helpers of ``User``; other attributes load the full row.
+
+    The role, department and student id come from the token and are not
+    rechecked. An inactive user stays authenticated until the token expires.
+    """
+
+    Role = User.Role
+
+    @cached_property
+    def id(self):
+        # simplejwt stores the user id claim as a string.
+        return User._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def pk(self):
+        return self.id
+
+    @cached_property
+    def role(self):
+        return self.token["role"]
+
+    @cached_property
+    def department_id(self):
+        return self.token.get("department_id")
+
+    @cached_property
+    def student_id(self):
+        return self.token.get("student_id")
+
+    def is_department_head(self):
+        return self.role == User.Role.DEPARTMENT_HEAD
+
+    def is_instructor(self):
+        return self.role == User.Role.INSTRUCTOR
+
+    def is_student(self):
+        return self.role == User.Role.STUDENT
+
+    def get_full_user(self):
+        if "_full_user" not in self.__dict__:
+            self.__dict__["_full_user"] = User.objects.select_related("department").get(pk=self.id)
+        return self.__dict__["_full_user"]
+
+    def __getattr__(self, name):
+        if name.startswith("_") or name == "token":
+            raise AttributeError(name)
+        return getattr(self.get_full_user(), name)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """Authenticates from token claims without a per-request user query."""
+
+    def get_user(self, validated_token):
+        if "role" not in validated_token:
+            # Tokens issued before claims were added still work, at the cost of a query.
+            return super().get_user(validated_token)
+        return ClaimsUser(validated_token)
@@ -0,0 +1,59 @@
+import gzip
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from apps.api.renderers import FastJSONRenderer
+from apps.api.serializers.courses import CourseInstanceSerializer
+from apps.api.serializers.grades import AssessmentGradeSerializer
+from apps.core.middleware import brotli
+from apps.courses.models import CourseInstance
+from apps.grades.models import AssessmentGrade
+
+PAYLOADS = {
+    "grades": lambda limit: AssessmentGradeSerializer(
+        AssessmentGrade.objects.select_related(
+            "assessment__course_instance__course_template__department"
+        ).order_by("id")[:limit], many=True
+    ).data,
+    "course-instances": lambda limit: CourseInstanceSerializer(
+        CourseInstance.objects.select_related("course_template__department").order_by("id")[:limit], many=True
+    ).data,
+}
+
+
+class Command(BaseCommand):
+    help = "Compare DRF's JSONRenderer with FastJSONRenderer and report compressed sizes on real API payloads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--payload", choices=PAYLOADS, default="grades")
+        parser.add_argument("--limit", type=int, default=5000, help="Rows to serialize")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        data = PAYLOADS[options["payload"]](options["limit"])
+        self.stdout.write(f"serializer: {(time.perf_counter() - start) * 1000:.1f} ms for {len(data)} rows")
+
+        outputs = {}
+        for renderer in (JSONRenderer(), FastJSONRenderer()):
+            timings = []
+            for _ in range(max(options["repeat"], 1)):
+                start = time.perf_counter()
+                body = renderer.render(data)
+                timings.append(time.perf_counter() - start)
+            outputs[type(renderer).__name__] = body
+            self.stdout.write(
+                f"{type(renderer).__name__:>18}: median {statistics.median(timings) * 1000:8.1f} ms, {len(body)} bytes"
+            )
+        if len(set(outputs.values())) != 1:
+            self.stdout.write(self.style.WARNING("Renderer outputs differ."))
+
+        body = outputs["FastJSONRenderer"]
+        self.stdout.write(f"{'gzip':>18}: {len(gzip.compress(body, 6))} bytes")
+        if brotli is not None:
+            self.stdout.write(f"{'brotli':>18}: {len(brotli.compress(body, quality=5))} bytes")
+        else:
+            self.stdout.write(f"{'brotli':>18}: not installed")
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.api.schema import write_schema_artifact
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema once and write it to API_SCHEMA_ARTIFACT for the schema view to serve."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", help="Override the artifact path")
+
+    def handle(self, *args, **options):
+        if not settings.ENABLE_API_SCHEMA:
+            raise CommandError("Schema generation is disabled (PO_PILOT_ENABLE_API_SCHEMA=0).")
+        path, size = write_schema_artifact(options["output"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {size} bytes to {path}"))
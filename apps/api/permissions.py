@@ -0,0 +1,26 @@
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import BasePermission
+
+
+def check_department_access(user, department_id):
+    if not user.is_superuser and user.department_id != department_id:
+        raise PermissionDenied("You can only access data of your own department.")
+
+
+class IsDepartmentHead(BasePermission):
+    message = "Only department heads can perform this action."
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and (user.is_superuser or user.is_department_head()))
+
+
+class CanManageCourseInstance(BasePermission):
+    """The course instance's instructor, a head of its department, or a superuser."""
+    message = "Only the instructor or the department head can change this course instance."
+
+    def has_object_permission(self, request, view, obj):
+        user = request.user
+        if user.is_superuser or obj.instructor_id == user.pk:
+            return True
+        return user.is_department_head() and user.department_id == obj.course_template.department_id
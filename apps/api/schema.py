@@ -0,0 +1,60 @@
+"""
+Build-time OpenAPI schema artifact.
+
+``manage.py build_openapi_schema`` writes the schema to
+``settings.API_SCHEMA_ARTIFACT``; the schema view serves that file with an
+ETag. Generating the schema at runtime, which introspects every serializer,
+only happens when the artifact is missing.
+"""
+import hashlib
+from pathlib import Path
+
+from django.conf import settings
+
+_loaded = {}
+
+
+def generate_schema():
+    """Generate the OpenAPI document with drf_spectacular and return it as JSON bytes."""
+    from drf_spectacular.generators import SchemaGenerator
+    from drf_spectacular.renderers import OpenApiJsonRenderer
+
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+    return OpenApiJsonRenderer().render(schema, renderer_context={})
+
+
+def write_schema_artifact(path=None):
+    path = Path(path or settings.API_SCHEMA_ARTIFACT)
+    content = generate_schema()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return path, len(content)
+
+
+def get_schema_document():
+    """(content, etag) of the schema, from the artifact when present, else generated once per process."""
+    path = Path(settings.API_SCHEMA_ARTIFACT)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+
+    if mtime is not None:
+        key = ("artifact", mtime)
+        if key not in _loaded:
+            _loaded.clear()
+            content = path.read_bytes()
+            _loaded[key] = (content, _etag(content))
+        return _loaded[key]
+
+    if not settings.ENABLE_API_SCHEMA:
+        return None
+    key = ("runtime", None)
+    if key not in _loaded:
+        content = generate_schema()
+        _loaded[key] = (content, _etag(content))
+    return _loaded[key]
+
+
+def _etag(content):
+    return '"%s"' % hashlib.sha256(content).hexdigest()[:32]
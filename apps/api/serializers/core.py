@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from apps.core.models import Department, ProgramOutcome
+from apps.core.models import ChangeEvent, Department, ProgramOutcome
 
 class DepartmentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -34,4 +34,19 @@ class ProgramOutcomeSerializer(serializers.ModelSerializer):
             "updated_at",
             "created_by",
             "get_full_code",
-        ]
\ No newline at end of file
+        ]
+
+
+class ChangeEventSerializer(serializers.ModelSerializer):
+    cursor = serializers.IntegerField(source="id")
+    id = serializers.IntegerField(source="object_id")
+
+    class Meta:
+        model = ChangeEvent
+        fields = ["cursor", "model", "id", "action", "data", "created_at"]
+
+
+class ChangeFeedQuerySerializer(serializers.Serializer):
+    since = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(min_value=1, max_value=1000, default=500)
+    model = serializers.ListField(child=serializers.CharField(), required=False)
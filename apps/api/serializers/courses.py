@@ -1,3 +1,4 @@
+from django.db import transaction
 from rest_framework import serializers
 
 from apps.courses.models import (
@@ -8,7 +9,10 @@ from apps.courses.models import (
     AssessmentToLOContribution,
     LOtoPOContribution,
 )
+from apps.core.changelog import record_changes
 from apps.core.models import Department, ProgramOutcome
+from apps.courses.enrollment import EnrollmentIndex
+from apps.users.models import User
 from .core import DepartmentSerializer, ProgramOutcomeSerializer
 
 
@@ -34,6 +38,26 @@ class CourseTemplateSerializer(serializers.ModelSerializer):
         read_only_fields = ["id"]
 
 
+class EnrolledStudentsField(serializers.ManyRelatedField):
+    """Reads enrolled student ids from the enrollment index instead of querying the M2M per row."""
+
+    def get_attribute(self, instance):
+        prefetched = self.context.get("enrolled_student_ids")
+        if prefetched is not None and instance.pk in prefetched:
+            return prefetched[instance.pk]
+        return EnrollmentIndex.student_ids(instance.pk)
+
+    def to_representation(self, iterable):
+        return list(iterable)
+
+
+class CourseInstanceListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        instances = list(data.all() if hasattr(data, "all") else data)
+        self.context["enrolled_student_ids"] = EnrollmentIndex.many(obj.pk for obj in instances)
+        return super().to_representation(instances)
+
+
 class CourseInstanceSerializer(serializers.ModelSerializer):
     course_template = CourseTemplateSerializer(read_only=True)
     course_template_id = serializers.PrimaryKeyRelatedField(
@@ -41,10 +65,14 @@ class CourseInstanceSerializer(serializers.ModelSerializer):
         source="course_template",
         write_only=True,
     )
+    students = EnrolledStudentsField(
+        child_relation=serializers.PrimaryKeyRelatedField(queryset=User.objects.filter(role=User.Role.STUDENT))
+    )
     get_full_code = serializers.ReadOnlyField()
 
     class Meta:
         model = CourseInstance
+        list_serializer_class = CourseInstanceListSerializer
         fields = [
             "id",
             "course_template",
@@ -170,3 +198,110 @@ class LOtoPOContributionSerializer(serializers.ModelSerializer):
             "approved_by",
             "approved_at",
         ]
+
+
+class PlannedLOWeightSerializer(serializers.Serializer):
+    learning_outcome_id = serializers.IntegerField()
+    weight = serializers.DecimalField(max_digits=2, decimal_places=1, min_value=1, max_value=5)
+
+
+class PlannedAssessmentSerializer(serializers.ModelSerializer):
+    learning_outcomes = PlannedLOWeightSerializer(many=True, required=False, default=list)
+
+    class Meta:
+        model = Assessment
+        fields = ["name", "assessment_type", "max_score", "weight", "learning_outcomes"]
+
+    def validate_learning_outcomes(self, value):
+        ids = [item["learning_outcome_id"] for item in value]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("Each learning outcome can only be listed once per assessment.")
+        return value
+
+
+class AssessmentPlanSerializer(serializers.Serializer):
+    """A batch of assessments with their LO weights for one course instance, validated in a single pass."""
+    assessments = PlannedAssessmentSerializer(many=True, allow_empty=False)
+
+    def validate_assessments(self, value):
+        course_instance = self.context["course_instance"]
+        template_lo_ids = set(
+            LearningOutcome.objects.filter(
+                course_template_id=course_instance.course_template_id
+            ).values_list("id", flat=True)
+        )
+        errors = []
+        for item in value:
+            unknown = sorted(
+                lo["learning_outcome_id"] for lo in item["learning_outcomes"]
+                if lo["learning_outcome_id"] not in template_lo_ids
+            )
+            errors.append(
+                {"learning_outcomes": [f"Learning outcomes {unknown} do not belong to this course."]}
+                if unknown else {}
+            )
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return value
+
+    @transaction.atomic
+    def create(self, validated_data):
+        course_instance = self.context["course_instance"]
+        items = validated_data["assessments"]
+        assessments = Assessment.objects.bulk_create([
+            Assessment(
+                course_instance=course_instance,
+                **{k: v for k, v in item.items() if k != "learning_outcomes"},
+            )
+            for item in items
+        ])
+        contributions = AssessmentToLOContribution.objects.bulk_create([
+            AssessmentToLOContribution(
+                assessment=assessment,
+                learning_outcome_id=lo["learning_outcome_id"],
+                weight=lo["weight"],
+            )
+            for assessment, item in zip(assessments, items)
+            for lo in item["learning_outcomes"]
+        ])
+        record_changes(assessments)
+        record_changes(contributions)
+        return assessments, contributions
+
+    def to_representation(self, instance):
+        assessments, contributions = instance
+        by_assessment = {}
+        for cont in contributions:
+            by_assessment.setdefault(cont.assessment_id, []).append({
+                "id": cont.id,
+                "learning_outcome_id": cont.learning_outcome_id,
+                "weight": str(cont.weight),
+            })
+        return {
+            "course_instance_id": self.context["course_instance"].id,
+            "assessments": [
+                {
+                    "id": a.id,
+                    "name": a.name,
+                    "assessment_type": a.assessment_type,
+                    "max_score": str(a.max_score),
+                    "weight": str(a.weight),
+                    "learning_outcomes": by_assessment.get(a.id, []),
+                }
+                for a in assessments
+            ],
+        }
+
+
+class CourseInstanceCloneSerializer(serializers.Serializer):
+    course_instance_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    semester = serializers.CharField(max_length=20)
+    year = serializers.IntegerField(min_value=1, max_value=32767)
+    copy_instructor = serializers.BooleanField(default=True)
+
+
+class OutcomeSearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200)
+    department = serializers.IntegerField(required=False)
+    type = serializers.ChoiceField(choices=["LO", "PO"], required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
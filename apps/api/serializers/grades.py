@@ -1,7 +1,9 @@
 from rest_framework import serializers
 
 from apps.grades.models import AssessmentGrade
-from apps.courses.models import Assessment
+from apps.courses.models import Assessment, AssessmentToLOContribution, LOtoPOContribution
+from apps.core.models import Department
+from apps.courses.enrollment import EnrollmentIndex
 from .courses import AssessmentSerializer
 
 
@@ -26,3 +28,72 @@ class AssessmentGradeSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
         read_only_fields = ["id", "created_at", "updated_at", "entered_by"]
+
+
+class WeightOverrideSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    weight = serializers.DecimalField(max_digits=2, decimal_places=1, min_value=1, max_value=5)
+
+
+class WeightSimulationSerializer(serializers.Serializer):
+    department_id = serializers.PrimaryKeyRelatedField(
+        queryset=Department.objects.all(), source="department"
+    )
+    assessment_lo_weights = WeightOverrideSerializer(many=True, required=False, default=list)
+    lo_po_weights = WeightOverrideSerializer(many=True, required=False, default=list)
+
+    def validate(self, attrs):
+        if not attrs["assessment_lo_weights"] and not attrs["lo_po_weights"]:
+            raise serializers.ValidationError("At least one weight override is required.")
+        errors = {}
+        for field, model, department_lookup in (
+            ("assessment_lo_weights", AssessmentToLOContribution, "assessment__department"),
+            ("lo_po_weights", LOtoPOContribution, "program_outcome__department"),
+        ):
+            ids = {override["id"] for override in attrs[field]}
+            if not ids:
+                continue
+            known = set(model.objects.filter(
+                id__in=ids, **{department_lookup: attrs["department"]}
+            ).values_list("id", flat=True))
+            unknown = sorted(ids - known)
+            if unknown:
+                errors[field] = [f"Contributions {unknown} do not exist in this department."]
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+
+class GradeCellChangeSerializer(serializers.Serializer):
+    student_id = serializers.IntegerField()
+    assessment_id = serializers.IntegerField()
+    score = serializers.DecimalField(max_digits=5, decimal_places=2, min_value=0, max_value=100, allow_null=True)
+    version = serializers.IntegerField(allow_null=True)
+
+
+class GradeGridUpdateSerializer(serializers.Serializer):
+    """Changed cells of a course instance's grade grid, validated together against its assessments and roster."""
+    changes = GradeCellChangeSerializer(many=True, allow_empty=False, max_length=5000)
+
+    def validate_changes(self, value):
+        course_instance = self.context["course_instance"]
+        max_scores = dict(course_instance.assessments.values_list("id", "max_score"))
+        enrolled = set(EnrollmentIndex.student_ids(course_instance.id))
+        seen = set()
+        errors = []
+        for cell in value:
+            key = (cell["student_id"], cell["assessment_id"])
+            error = {}
+            if cell["assessment_id"] not in max_scores:
+                error["assessment_id"] = ["Assessment does not belong to this course instance."]
+            elif cell["score"] is not None and cell["score"] > max_scores[cell["assessment_id"]]:
+                error["score"] = [f"Score cannot exceed the maximum score of {max_scores[cell['assessment_id']]}."]
+            if cell["student_id"] not in enrolled:
+                error["student_id"] = ["The student is not enrolled in this course instance."]
+            if key in seen:
+                error["non_field_errors"] = ["This cell is listed more than once."]
+            seen.add(key)
+            errors.append(error)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return value
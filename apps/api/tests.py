@@ -1,3 +1,485 @@
-from django.test import TestCase
+import gzip
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from apps.api.authentication import ClaimsUser, StatelessJWTAuthentication
+from apps.api.renderers import FastJSONRenderer
+from apps.core.changelog import GAP_TIMEOUT
+from apps.core.models import ChangeEvent, ProgramOutcome
+from apps.core.testing import QueryBudgetMixin, build_fixture_dataset
+from apps.courses.enrollment import EnrollmentIndex
+from apps.courses.models import Assessment, AssessmentToLOContribution
+from apps.grades.grid import GradeGrid
+from apps.grades.models import AssessmentGrade
+from apps.users.models import User
+
+
+class EndpointQueryBudgetTests(QueryBudgetMixin, TestCase):
+    query_baseline_file = Path(__file__).resolve().parent / "query_baselines.json"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixture_dataset()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.data["head"])
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response
+
+    def test_me(self):
+        with self.assertQueryBudget("me"):
+            self.get("/api/me/")
+
+    def test_program_outcome_list(self):
+        with self.assertQueryBudget("program_outcome_list"):
+            self.get("/api/program-outcomes/")
+
+    def test_course_template_list(self):
+        with self.assertQueryBudget("course_template_list"):
+            self.get("/api/course-templates/")
+
+    def test_course_instance_list(self):
+        with self.assertQueryBudget("course_instance_list"):
+            self.get("/api/course-instances/")
+
+    def test_course_instance_detail(self):
+        course_instance = self.data["course_instances"][0]
+        with self.assertQueryBudget("course_instance_detail"):
+            self.get(f"/api/course-instances/{course_instance.id}/")
+
+    def test_po_weight_simulation(self):
+        lo_po_id = self.data["program_outcomes"][0].lo_contributions.values_list("id", flat=True)[0]
+        with self.assertQueryBudget("po_weight_simulation"):
+            response = self.client.post(
+                "/api/simulations/po-weights/",
+                {"department_id": self.data["department"].id, "lo_po_weights": [{"id": lo_po_id, "weight": "5"}]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_student_po_trends(self):
+        student = self.data["students"][0]
+        with self.assertQueryBudget("student_po_trends"):
+            response = self.get(f"/api/students/{student.id}/po-trends/")
+        self.assertEqual(len(response.json()["terms"]), 2)
+
+    def test_student_po_explanation(self):
+        student = self.data["students"][0]
+        with self.assertQueryBudget("student_po_explanation"):
+            response = self.get(f"/api/students/{student.id}/po-explanation/")
+        self.assertEqual(len(response.json()["program_outcomes"]), 4)
+
+    def test_department_po_trends(self):
+        with self.assertQueryBudget("department_po_trends"):
+            response = self.get(f"/api/departments/{self.data['department'].id}/po-trends/")
+        self.assertEqual(response.json()["cohort_size"], len(self.data["students"]))
+
+
+class CachedSchemaViewTests(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.artifact = Path(self.tmp.name) / "schema.json"
+        self.artifact.write_bytes(b'{"openapi": "3.0.3"}')
+
+    def test_serves_artifact_with_etag_and_revalidation(self):
+        with override_settings(API_SCHEMA_ARTIFACT=self.artifact):
+            response = self.client.get("/api/schema/")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, b'{"openapi": "3.0.3"}')
+            self.assertIn("max-age", response["Cache-Control"])
+
+            response = self.client.get("/api/schema/", HTTP_IF_NONE_MATCH=response["ETag"])
+            self.assertEqual(response.status_code, 304)
+
+    def test_missing_artifact_without_schema_support_is_404(self):
+        with override_settings(API_SCHEMA_ARTIFACT=Path(self.tmp.name) / "missing.json", ENABLE_API_SCHEMA=False):
+            self.assertEqual(self.client.get("/api/schema/").status_code, 404)
+
+
+class StatelessJWTAuthenticationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixture_dataset(students=2, templates=1, terms=(("Fall", 2024),))
+
+    def obtain_access_token(self):
+        response = self.client.post(
+            "/api/token/", {"email": "head@example.com", "password": "password"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()["access"]
+
+    def test_claims_user_is_built_without_queries(self):
+        token = self.obtain_access_token()
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        with self.assertNumQueries(0):
+            user, _ = StatelessJWTAuthentication().authenticate(request)
+            self.assertIsInstance(user, ClaimsUser)
+            self.assertEqual(user.pk, self.data["head"].pk)
+            self.assertTrue(user.is_department_head())
+            self.assertEqual(user.department_id, self.data["department"].id)
+
+    def test_full_user_is_loaded_on_demand(self):
+        token = self.obtain_access_token()
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        user, _ = StatelessJWTAuthentication().authenticate(request)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, "head@example.com")
+            self.assertEqual(user.department.code, "CSE")
+
+    def test_deactivated_user_keeps_access_until_expiry(self):
+        response = self.client.post(
+            "/api/token/", {"email": "head@example.com", "password": "password"}, content_type="application/json"
+        )
+        access, refresh = response.json()["access"], response.json()["refresh"]
+        User.objects.filter(pk=self.data["head"].pk).update(is_active=False)
+
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {access}")
+        user, _ = StatelessJWTAuthentication().authenticate(request)
+        self.assertEqual(user.pk, self.data["head"].pk)
+        response = self.client.post("/api/token/refresh/", {"refresh": refresh}, content_type="application/json")
+        self.assertEqual(response.status_code, 401)
+
+
+class ChangeFeedTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixture_dataset(students=2, templates=1, terms=(("Fall", 2024),))
+        cls.admin = User.objects.create_superuser("admin@example.com", "password")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.cursor = self.client.get("/api/changes/?limit=1000").json()["next_cursor"]
+
+    def changes(self):
+        return self.client.get(f"/api/changes/?since={self.cursor}&model=grades.assessmentgrade").json()
+
+    def test_updates_are_compacted_and_deletes_reported(self):
+        grade = AssessmentGrade.objects.filter(student=self.data["students"][0]).first()
+        grade.score = 10
+        grade.save()
+        grade.score = 20
+        grade.save()
+        other = AssessmentGrade.objects.exclude(pk=grade.pk).first()
+        other_id = other.pk
+        other.delete()
+
+        feed = self.changes()
+        self.assertFalse(feed["has_more"])
+        events = {(e["id"], e["action"]): e for e in feed["results"]}
+        self.assertEqual(len(feed["results"]), 2)
+        self.assertEqual(events[(grade.pk, "UPSERT")]["data"]["score"], "20.00")
+        self.assertIsNone(events[(other_id, "DELETE")]["data"])
+
+        self.cursor = feed["next_cursor"]
+        self.assertEqual(self.changes()["results"], [])
+
+    def save_grades(self, count):
+        for grade in AssessmentGrade.objects.order_by("id")[:count]:
+            grade.score = 5
+            grade.save()
+        return list(ChangeEvent.objects.filter(id__gt=self.cursor).order_by("id"))
+
+    def test_stops_before_a_missing_id_until_it_commits(self):
+        first, pending, last = self.save_grades(3)
+        # An id that is allocated but not committed yet looks like a missing row.
+        pending_id = pending.id
+        pending.delete()
+
+        feed = self.changes()
+        self.assertEqual([e["id"] for e in feed["results"]], [first.object_id])
+        self.assertEqual(feed["next_cursor"], first.id)
+        self.assertFalse(feed["has_more"])
+
+        self.cursor = feed["next_cursor"]
+        self.assertEqual(self.changes()["next_cursor"], first.id)
+        pending.id = pending_id
+        pending.save(force_insert=True)
+        feed = self.changes()
+        self.assertEqual([e["id"] for e in feed["results"]], [pending.object_id, last.object_id])
+        self.assertEqual(feed["next_cursor"], last.id)
+
+    def test_skips_a_missing_id_after_the_gap_timeout(self):
+        first, pending, last = self.save_grades(3)
+        pending.delete()
+        ChangeEvent.objects.filter(id=last.id).update(created_at=timezone.now() - GAP_TIMEOUT * 2)
+
+        feed = self.changes()
+        self.assertEqual([e["id"] for e in feed["results"]], [first.object_id, last.object_id])
+        self.assertEqual(feed["next_cursor"], last.id)
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(self.data["head"])
+        self.assertEqual(self.client.get("/api/changes/").status_code, 403)
+
+
+class AssessmentPlanTests(QueryBudgetMixin, TestCase):
+    query_baseline_file = EndpointQueryBudgetTests.query_baseline_file
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixture_dataset(students=2, templates=2, terms=(("Fall", 2024),))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.data["instructor"])
+        self.course = self.data["course_instances"][0]
+        self.url = f"/api/course-instances/{self.course.id}/assessment-plan/"
+        self.lo_ids = list(self.course.course_template.learning_outcomes.values_list("id", flat=True))
+
+    def plan(self, count):
+        return {"assessments": [
+            {
+                "name": f"Quiz {i}", "assessment_type": "QUIZ", "max_score": "10", "weight": "5",
+                "learning_outcomes": [{"learning_outcome_id": lo_id, "weight": "2"} for lo_id in self.lo_ids],
+            }
+            for i in range(count)
+        ]}
+
+    def test_creates_plan_with_constant_queries(self):
+        with self.assertQueryBudget("assessment_plan_create"):
+            response = self.client.post(self.url, self.plan(6), format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(len(response.json()["assessments"]), 6)
+        self.assertEqual(
+            AssessmentToLOContribution.objects.filter(assessment__name__startswith="Quiz").count(),
+            6 * len(self.lo_ids),
+        )
+
+    def test_rejects_learning_outcomes_of_another_course(self):
+        foreign_lo = self.data["course_instances"][1].course_template.learning_outcomes.first()
+        payload = self.plan(2)
+        payload["assessments"][1]["learning_outcomes"].append({"learning_outcome_id": foreign_lo.id, "weight": "1"})
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Assessment.objects.filter(name__startswith="Quiz").exists())
+
+
+class CourseInstanceCloneViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixture_dataset(students=2, templates=2, terms=(("Fall", 2024),))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.payload = {
+            "course_instance_ids": [c.id for c in self.data["course_instances"]],
+            "semester": "Fall",
+            "year": 2025,
+        }
+
+    def test_department_head_clones_to_new_term(self):
+        self.client.force_authenticate(self.data["head"])
+        response = self.client.post("/api/course-instances/clone/", self.payload, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(len(response.json()["created"]), 2)
+        self.assertEqual(Assessment.objects.filter(course_instance__year=2025).count(), 4)
+
+    def test_instructor_cannot_clone(self):
+        self.client.force_authenticate(self.data["instructor"])
+        response = self.client.post("/api/course-instances/clone/", self.payload, format="json")
+        self.assertEqual(response.status_code, 403)
+
+
+class GradeGridTests(QueryBudgetMixin, TestCase):
+    query_baseline_file = EndpointQueryBudgetTests.query_baseline_file
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixture_dataset(students=10, templates=1, terms=(("Fall", 2024),))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.data["instructor"])
+        self.course = self.data["course_instances"][0]
+        self.url = f"/api/course-instances/{self.course.id}/grade-grid/"
+
+    def read(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_read_returns_matrix(self):
+        with self.assertQueryBudget("grade_grid_read"):
+            grid = self.read()
+        self.assertEqual(len(grid["students"]), 10)
+        self.assertEqual(len(grid["assessments"]), 2)
+        self.assertTrue(all(len(row) == 2 and None not in row for row in grid["scores"]))
+
+    def test_batched_update_and_clear(self):
+        grid = self.read()
+        changes = [
+            {"student_id": s["id"], "assessment_id": a["id"], "score": "77.50", "version": grid["versions"][i][j]}
+            for i, s in enumerate(grid["students"])
+            for j, a in enumerate(grid["assessments"])
+        ]
+        changes[0]["score"] = None
+        with self.assertQueryBudget("grade_grid_update"):
+            response = self.client.patch(self.url, {"changes": changes}, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(AssessmentGrade.objects.filter(assessment__course_instance=self.course).count(), 19)
+        self.assertEqual(
+            AssessmentGrade.objects.filter(assessment__course_instance=self.course, score=Decimal("77.50")).count(), 19
+        )
+        self.assertEqual(AssessmentGrade.objects.filter(entered_by=self.data["instructor"]).count(), 19)
+
+        # The cleared cell can be filled again as a new grade.
+        cell = dict(changes[0], score="60", version=None)
+        response = self.client.patch(self.url, {"changes": [cell]}, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["saved"][0]["score"], "60.00")
+
+    def test_stale_version_conflicts_without_writing(self):
+        grid = self.read()
+        student, assessment = grid["students"][0], grid["assessments"][0]
+        other = AssessmentGrade.objects.get(student_id=student["id"], assessment_id=assessment["id"])
+        other.score = 10
+        other.save()
+
+        changes = [
+            {"student_id": student["id"], "assessment_id": assessment["id"], "score": "90",
+             "version": grid["versions"][0][0]},
+            {"student_id": student["id"], "assessment_id": grid["assessments"][1]["id"], "score": "90",
+             "version": grid["versions"][0][1]},
+        ]
+        response = self.client.patch(self.url, {"changes": changes}, format="json")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["conflicts"][0]["score"], "10.00")
+        self.assertFalse(AssessmentGrade.objects.filter(score=90).exists())
+
+    def test_concurrently_filled_cell_conflicts(self):
+        grid = self.read()
+        student, assessment = grid["students"][0], grid["assessments"][0]
+        AssessmentGrade.objects.filter(student_id=student["id"], assessment_id=assessment["id"]).delete()
+        change = {"student_id": student["id"], "assessment_id": assessment["id"], "score": "90", "version": None}
+        check = GradeGrid._conflicts
+
+        def racing_check(changes, grades):
+            # Another request fills the cell right after the version check.
+            if not AssessmentGrade.objects.filter(student_id=student["id"], assessment_id=assessment["id"]).exists():
+                AssessmentGrade.objects.create(student_id=student["id"], assessment_id=assessment["id"], score=10)
+            return check(changes, grades)
+
+        with mock.patch.object(GradeGrid, "_conflicts", side_effect=racing_check):
+            response = self.client.patch(self.url, {"changes": [change]}, format="json")
+        self.assertEqual(response.status_code, 409, response.content)
+        self.assertEqual(response.json()["conflicts"][0]["score"], "10.00")
+        self.assertIsNotNone(response.json()["conflicts"][0]["version"])
+        self.assertFalse(AssessmentGrade.objects.filter(score=90).exists())
+
+    def test_integrity_rejection_is_a_bad_request(self):
+        grid = self.read()
+        student, assessments = grid["students"][0], grid["assessments"]
+        AssessmentGrade.objects.filter(student_id=student["id"], assessment_id=assessments[0]["id"]).delete()
+        roster = EnrollmentIndex.student_ids(self.course.id)
+        # Unenrolled by another worker while this one still has the old roster.
+        self.course.students.remove(student["id"])
+        changes = [
+            {"student_id": student["id"], "assessment_id": assessments[0]["id"], "score": "50", "version": None},
+            {"student_id": student["id"], "assessment_id": assessments[1]["id"], "score": "50",
+             "version": grid["versions"][0][1]},
+        ]
+        for cells in (changes[:1], changes[1:]):
+            with mock.patch("apps.api.serializers.grades.EnrollmentIndex.student_ids", return_value=roster):
+                response = self.client.patch(self.url, {"changes": cells}, format="json")
+            self.assertEqual(response.status_code, 400, response.content)
+            self.assertIn("not enrolled", response.json()["changes"][0])
+
+    def test_rejects_students_outside_the_course(self):
+        grid = self.read()
+        change = {"student_id": self.data["head"].id, "assessment_id": grid["assessments"][0]["id"],
+                  "score": "50", "version": None}
+        response = self.client.patch(self.url, {"changes": [change]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("student_id", response.json()["changes"][0])
+
+
+class FastJSONRendererTests(TestCase):
+
+    def test_matches_drf_json_renderer(self):
+        data = {
+            "id": 1,
+            "score": Decimal("12.50"),
+            "created_at": timezone.now(),
+            "label": gettext_lazy("Midterm"),
+            "names": ("Ada", "Grace Hopper"),
+            7: [None, True, 1.5],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_falls_back_without_orjson(self):
+        with mock.patch("apps.api.renderers.orjson", None):
+            self.assertEqual(FastJSONRenderer().render({"a": Decimal("1.0")}), b'{"a":1.0}')
+
+
+@override_settings(COMPRESSION_MIN_BYTES=200)
+class CompressionMiddlewareTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixture_dataset(students=20, templates=1, terms=(("Fall", 2024),))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.data["head"])
+        self.url = f"/api/course-instances/{self.data['course_instances'][0].id}/"
+
+    def test_large_responses_are_gzipped(self):
+        plain = self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_refused_encodings_and_small_responses_are_left_alone(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip;q=0")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        with override_settings(COMPRESSION_MIN_BYTES=10 ** 6):
+            response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+
+class OutcomeSearchViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixture_dataset(students=1, templates=1, terms=(("Fall", 2024),))
+        cls.inactive = ProgramOutcome.objects.create(
+            department=cls.data["department"], code="9", description="Outcome retired last year", is_active=False
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.data["instructor"])
+
+    def test_search(self):
+        response = self.client.get("/api/outcomes/search/", {"q": "outcome", "type": "LO", "limit": 2})
+        self.assertEqual(response.status_code, 200, response.content)
+        results = response.json()["results"]
+        self.assertEqual(len(results), 2)
+        self.assertEqual(
+            {k: v for k, v in results[0].items() if k not in ("id", "code", "description", "score")},
+            {"type": "LO", "department": "CSE", "course": "CSE101"},
+        )
+
+        codes = {r["code"] for r in self.client.get("/api/outcomes/search/", {"q": "outcome", "type": "PO"}).json()["results"]}
+        self.assertNotIn(self.inactive.code, codes)
+        self.assertTrue(codes)
+
+        self.assertEqual(self.client.get("/api/outcomes/search/").status_code, 400)
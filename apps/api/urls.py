@@ -1,9 +1,17 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from .views.core import ProgramOutcomeViewSet
-from .views.courses import CourseTemplateViewSet, CourseInstanceViewSet
+from .views.core import ChangeFeedView, ProgramOutcomeViewSet
+from .views.courses import CourseTemplateViewSet, CourseInstanceViewSet, OutcomeSearchView
+from .views.grades import (
+    DepartmentPOTrendView,
+    StudentPOExplanationView,
+    StudentPOTrendView,
+    WeightSimulationView,
+)
+from .views.schema import CachedSchemaView
 from .views.users import MeView
 
 router = DefaultRouter()
@@ -12,7 +20,16 @@ router.register(r"course-templates", CourseTemplateViewSet, basename="course-tem
 router.register(r"course-instances", CourseInstanceViewSet, basename="course-instance")
 
 urlpatterns = [
+    path("token/", TokenObtainPairView.as_view(), name="token-obtain-pair"),
+    path("token/refresh/", TokenRefreshView.as_view(), name="token-refresh"),
     path("me/", MeView.as_view(), name="me"),
+    path("schema/", CachedSchemaView.as_view(), name="schema"),
+    path("changes/", ChangeFeedView.as_view(), name="change-feed"),
+    path("outcomes/search/", OutcomeSearchView.as_view(), name="outcome-search"),
+    path("simulations/po-weights/", WeightSimulationView.as_view(), name="po-weight-simulation"),
+    path("students/<int:pk>/po-trends/", StudentPOTrendView.as_view(), name="student-po-trends"),
+    path("students/<int:pk>/po-explanation/", StudentPOExplanationView.as_view(), name="student-po-explanation"),
+    path("departments/<int:pk>/po-trends/", DepartmentPOTrendView.as_view(), name="department-po-trends"),
 ]
 
 urlpatterns += router.urls
@@ -1,12 +1,41 @@
-
 from rest_framework.viewsets import ReadOnlyModelViewSet
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser, IsAuthenticatedOrReadOnly
 
+from apps.core.changelog import read_changes
 from apps.core.models import ProgramOutcome
-from apps.api.serializers.core import ProgramOutcomeSerializer
+from apps.api.serializers.core import ChangeEventSerializer, ChangeFeedQuerySerializer, ProgramOutcomeSerializer
 
 
 class ProgramOutcomeViewSet(ReadOnlyModelViewSet):
     queryset = ProgramOutcome.objects.filter(is_active=True)
     serializer_class = ProgramOutcomeSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+
+
+class ChangeFeedView(APIView):
+    """
+    Incremental feed of grade, assessment and contribution changes.
+
+    Pass the returned ``next_cursor`` as ``?since=`` on the next call. Each
+    batch holds only the latest event per object, deletes included.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        params = ChangeFeedQuerySerializer(data={
+            **request.query_params.dict(),
+            "model": request.query_params.getlist("model"),
+        })
+        params.is_valid(raise_exception=True)
+        events, next_cursor, has_more = read_changes(
+            since=params.validated_data["since"],
+            limit=params.validated_data["limit"],
+            models=params.validated_data.get("model"),
+        )
+        return Response({
+            "results": ChangeEventSerializer(events, many=True).data,
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+        })
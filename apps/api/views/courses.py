@@ -1,11 +1,24 @@
-
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticated
 
-from apps.courses.models import CourseTemplate, CourseInstance
+from apps.api.permissions import CanManageCourseInstance, IsDepartmentHead, check_department_access
+from apps.core.models import ProgramOutcome
+from apps.courses.cloning import clone_course_instances
+from apps.courses.models import CourseTemplate, CourseInstance, LearningOutcome
+from apps.courses.search import search_outcomes
+from apps.grades.grid import GradeConflict, GradeGrid
+from apps.api.serializers.grades import GradeGridUpdateSerializer
 from apps.api.serializers.courses import (
+    AssessmentPlanSerializer,
+    CourseInstanceCloneSerializer,
     CourseTemplateSerializer,
     CourseInstanceSerializer,
+    OutcomeSearchQuerySerializer,
 )
 
 
@@ -19,3 +32,113 @@ class CourseInstanceViewSet(ModelViewSet):
     queryset = CourseInstance.objects.select_related("course_template").all()
     serializer_class = CourseInstanceSerializer
     permission_classes = [IsAuthenticated]
+
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path="assessment-plan",
+        serializer_class=AssessmentPlanSerializer,
+        permission_classes=[IsAuthenticated, CanManageCourseInstance],
+    )
+    def assessment_plan(self, request, pk=None):
+        """Create several assessments and their LO weights in one transaction."""
+        course_instance = self.get_object()
+        serializer = AssessmentPlanSerializer(data=request.data, context={"course_instance": course_instance})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(
+        detail=True,
+        methods=["get", "patch"],
+        url_path="grade-grid",
+        serializer_class=GradeGridUpdateSerializer,
+        permission_classes=[IsAuthenticated, CanManageCourseInstance],
+    )
+    def grade_grid(self, request, pk=None):
+        """Student × assessment score matrix; PATCH saves a batch of changed cells."""
+        course_instance = self.get_object()
+        grid = GradeGrid(course_instance)
+        if request.method == "GET":
+            return Response(grid.read())
+
+        serializer = GradeGridUpdateSerializer(data=request.data, context={"course_instance": course_instance})
+        serializer.is_valid(raise_exception=True)
+        try:
+            saved = grid.apply(serializer.validated_data["changes"], request.user)
+        except GradeConflict as exc:
+            return Response({"detail": str(exc), "conflicts": exc.cells}, status=status.HTTP_409_CONFLICT)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError({"changes": exc.messages})
+        return Response({"saved": saved})
+
+    @action(
+        detail=False,
+        methods=["post"],
+        serializer_class=CourseInstanceCloneSerializer,
+        permission_classes=[IsDepartmentHead],
+    )
+    def clone(self, request):
+        """Copy course instances with their assessments and LO weights to another term."""
+        serializer = CourseInstanceCloneSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        for department_id in set(CourseInstance.objects.filter(
+            id__in=data["course_instance_ids"]
+        ).values_list("course_template__department_id", flat=True)):
+            check_department_access(request.user, department_id)
+        try:
+            result = clone_course_instances(
+                data["course_instance_ids"], data["semester"], data["year"], data["copy_instructor"]
+            )
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError({"course_instance_ids": exc.messages})
+        return Response(
+            {
+                "created": [{"source_id": src, "id": new} for src, new in result["created"].items()],
+                "skipped": result["skipped"],
+                "assessments": result["assessments"],
+                "contributions": result["contributions"],
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class OutcomeSearchView(APIView):
+    """
+    Learning and program outcomes matching ``?q=``, best match first.
+
+    Filter with ``?department=<id>`` and ``?type=LO|PO``. Inactive program
+    outcomes are left out.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        params = OutcomeSearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        hits = search_outcomes(
+            data["q"], department_id=data.get("department"), kind=data.get("type"), limit=data["limit"]
+        )
+        los = LearningOutcome.objects.select_related("course_template__department").in_bulk(
+            [pk for kind, pk, _ in hits if kind == "LO"]
+        )
+        pos = ProgramOutcome.objects.filter(is_active=True).select_related("department").in_bulk(
+            [pk for kind, pk, _ in hits if kind == "PO"]
+        )
+        results = []
+        for kind, pk, score in hits:
+            outcome = (los if kind == "LO" else pos).get(pk)
+            if outcome is None:
+                continue
+            template = outcome.course_template if kind == "LO" else None
+            results.append({
+                "type": kind,
+                "id": pk,
+                "code": outcome.code,
+                "description": outcome.description,
+                "department": (template.department if template else outcome.department).code,
+                "course": template.code if template else None,
+                "score": round(score, 4),
+            })
+        return Response({"results": results})
@@ -0,0 +1,97 @@
+from django.shortcuts import get_object_or_404
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAuthenticated
+
+from apps.api.permissions import IsDepartmentHead, check_department_access
+from apps.api.serializers.grades import WeightSimulationSerializer
+from apps.core.models import Department
+from apps.courses.enrollment import EnrollmentIndex
+from apps.grades.calculators import AchievementCalculator
+from apps.grades.longitudinal import POTrendEngine
+from apps.users.models import User
+
+
+def get_visible_student(user, pk):
+    """The student with id ``pk``, if ``user`` is that student or staff of their department."""
+    student = get_object_or_404(User.objects.select_related("department"), pk=pk, role=User.Role.STUDENT)
+    if user.pk != student.pk:
+        if user.is_student():
+            raise PermissionDenied("Students can only view their own results.")
+        check_department_access(user, student.department_id)
+    return student
+
+
+class WeightSimulationView(APIView):
+    """Preview cohort PO achievement under proposed contribution weights, without saving them."""
+    permission_classes = [IsDepartmentHead]
+
+    def post(self, request):
+        serializer = WeightSimulationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        department = serializer.validated_data["department"]
+        check_department_access(request.user, department.id)
+
+        # numpy is only needed here; keep it out of URLconf import time.
+        from apps.grades.simulation import WeightSimulation
+
+        simulation = WeightSimulation(
+            department,
+            assessment_lo_overrides={o["id"]: o["weight"] for o in serializer.validated_data["assessment_lo_weights"]},
+            lo_po_overrides={o["id"]: o["weight"] for o in serializer.validated_data["lo_po_weights"]},
+        )
+        return Response(simulation.run())
+
+
+class StudentPOTrendView(APIView):
+    """PO achievement of one student per (semester, year)."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        student = get_visible_student(request.user, pk)
+        if student.department is None:
+            return Response({"student_id": student.id, "department_id": None, "terms": []})
+        return Response(POTrendEngine(student.department).student_series(student))
+
+
+class StudentPOExplanationView(APIView):
+    """How each of a student's overall PO scores is derived, down to assessment scores.
+
+    ``?program_outcome=<id>`` (repeatable) limits the tree to those POs.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        student = get_visible_student(request.user, pk)
+        program_outcome_ids = request.query_params.getlist("program_outcome") or None
+        if program_outcome_ids and not all(v.isdigit() for v in program_outcome_ids):
+            return Response({"program_outcome": ["A valid integer is required."]}, status=400)
+        return Response({
+            "student_id": student.id,
+            "program_outcomes": AchievementCalculator.explain_student_po_achievements(
+                student, program_outcome_ids and [int(v) for v in program_outcome_ids]
+            ),
+        })
+
+
+class DepartmentPOTrendView(APIView):
+    """Average PO achievement of a department cohort per (semester, year).
+
+    The cohort is every student of the department, or only those enrolled in
+    ``?course_instance=<id>`` when given.
+    """
+    permission_classes = [IsDepartmentHead]
+
+    def get(self, request, pk):
+        department = get_object_or_404(Department, pk=pk)
+        check_department_access(request.user, department.id)
+        student_ids = User.objects.filter(
+            department=department, role=User.Role.STUDENT
+        ).values_list("id", flat=True)
+        course_instance = request.query_params.get("course_instance")
+        if course_instance:
+            if not course_instance.isdigit():
+                return Response({"course_instance": ["A valid integer is required."]}, status=400)
+            student_ids = EnrollmentIndex.intersection(int(course_instance), student_ids)
+        return Response(POTrendEngine(department).cohort_series(student_ids))
@@ -0,0 +1,29 @@
+from django.http import HttpResponse, HttpResponseNotModified, Http404
+from django.utils.cache import patch_cache_control
+from rest_framework.permissions import AllowAny
+from rest_framework.views import APIView
+
+from apps.api.schema import get_schema_document
+
+SCHEMA_MAX_AGE = 60 * 60 * 24
+
+
+class CachedSchemaView(APIView):
+    """OpenAPI schema served from the build-time artifact, with ETag revalidation."""
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    schema = None
+
+    def get(self, request):
+        document = get_schema_document()
+        if document is None:
+            raise Http404("No schema artifact; run `manage.py build_openapi_schema`.")
+        content, etag = document
+
+        if etag in request.headers.get("If-None-Match", ""):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type="application/vnd.oai.openapi+json")
+        response["ETag"] = etag
+        patch_cache_control(response, public=True, max_age=SCHEMA_MAX_AGE)
+        return response
@@ -1,13 +1,17 @@
-
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
+from apps.api.authentication import ClaimsUser
 from apps.api.serializers.users import UserMeSerializer
 
 class MeView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        serializer = UserMeSerializer(request.user)
+        user = request.user
+        if isinstance(user, ClaimsUser):
+            # Loads the row together with its department for the nested representation.
+            user = user.get_full_user()
+        serializer = UserMeSerializer(user)
         return Response(serializer.data)
@@ -1,5 +1,6 @@
 # apps/core/admin.py
 from django.contrib import admin
+from apps.courses.search import matching_ids
 from .models import Department, ProgramOutcome
 
 
@@ -20,8 +21,16 @@ class ProgramOutcomeAdmin(admin.ModelAdmin):
         "is_active",
         "created_by",
     )
+    list_select_related = ("department", "created_by")
     list_filter = ("is_active", "department")
-    search_fields = ("code", "description", "department__name")
+    # Descriptions are searched through the full-text index (apps.courses.search).
+    search_fields = ("code", "department__name")
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            results |= queryset.filter(pk__in=matching_ids(search_term, "PO"))
+        return results, may_have_duplicates
 
     def save_model(self, request, obj, form, change):
         if not obj.pk:
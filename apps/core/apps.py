@@ -1,6 +1,27 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+# Backends whose entries are private to one process.
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def require_shared_cache():
+    """Refuse to run several processes on a cache that each of them keeps separately."""
+    backend = settings.CACHES["default"]["BACKEND"]
+    if not settings.SINGLE_PROCESS and backend in PROCESS_LOCAL_CACHES:
+        raise ImproperlyConfigured(
+            f"The default cache ({backend}) is not shared between processes. Set PO_PILOT_CACHE_URL to a "
+            "shared cache, or PO_PILOT_SINGLE_PROCESS=1 if only one process serves the site."
+        )
 
 
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.core"
+
+    def ready(self):
+        require_shared_cache()
@@ -0,0 +1,86 @@
+"""
+Recording and reading the change log behind /api/changes/.
+
+Signals record single-row saves and deletes. Code that writes with
+``bulk_create``/``update()`` bypasses signals and must call
+``record_changes`` itself.
+"""
+from datetime import timedelta
+
+from django.db import models
+from django.utils import timezone
+
+from apps.core.models import ChangeEvent
+
+# model label -> fields copied into the event payload
+TRACKED_FIELDS = {
+    "grades.assessmentgrade": ("student_id", "assessment_id", "score"),
+    "courses.assessment": ("course_instance_id", "name", "assessment_type", "max_score", "weight"),
+    "courses.assessmenttolocontribution": ("assessment_id", "learning_outcome_id", "weight"),
+    "courses.lotopocontribution": ("learning_outcome_id", "program_outcome_id", "weight", "is_approved"),
+}
+
+# Ids are allocated at insert time, so a slower concurrent transaction can
+# commit a lower id after a higher one is already visible. The feed therefore
+# never moves its cursor past a missing id. A missing id is either still in
+# flight or was rolled back; it is given up on once the event after it is
+# older than GAP_TIMEOUT, which is longer than any transaction that records
+# changes should take.
+GAP_TIMEOUT = timedelta(minutes=1)
+
+
+def _payload(instance, label):
+    data = {}
+    for name in TRACKED_FIELDS[label]:
+        value = getattr(instance, name)
+        field = instance._meta.get_field(name.removesuffix("_id"))
+        if value is not None and isinstance(field, models.DecimalField):
+            # Same fixed-point string the API serializers produce, even if a plain int was assigned.
+            value = f"{field.to_python(value):.{field.decimal_places}f}"
+        data[name.removesuffix("_id")] = value
+    return data
+
+
+def _event(instance, action):
+    label = instance._meta.label_lower
+    return ChangeEvent(
+        model=label,
+        object_id=instance.pk,
+        action=action,
+        data=_payload(instance, label) if action == ChangeEvent.Action.UPSERT else None,
+    )
+
+
+def record_change(instance, action=ChangeEvent.Action.UPSERT):
+    _event(instance, action).save()
+
+
+def record_changes(instances, action=ChangeEvent.Action.UPSERT):
+    ChangeEvent.objects.bulk_create([_event(instance, action) for instance in instances])
+
+
+def read_changes(since=0, limit=500, models=None):
+    """
+    Events after cursor ``since``, compacted to the latest event per object.
+
+    The cursor is the id of the last event read. Reading stops before the first
+    missing id that may still be committed. ``since=0`` starts from the oldest
+    event. ``models`` filters the page after gaps are checked, so ``limit``
+    counts events of every model. Returns (events, next_cursor, has_more).
+    """
+    batch = list(ChangeEvent.objects.filter(id__gt=since).order_by("id")[: limit + 1])
+    has_more = len(batch) > limit
+    cutoff = timezone.now() - GAP_TIMEOUT
+    next_cursor = since
+    latest = {}
+    for event in batch[:limit]:
+        if next_cursor and event.id != next_cursor + 1 and event.created_at > cutoff:
+            has_more = False
+            break
+        next_cursor = event.id
+        if models and event.model not in models:
+            continue
+        key = (event.model, event.object_id)
+        latest.pop(key, None)
+        latest[key] = event
+    return list(latest.values()), next_cursor, has_more
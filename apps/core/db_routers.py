@@ -0,0 +1,99 @@
+"""
+Read-replica routing for reporting queries.
+
+Only code running inside ``analytics_reads()`` (the calculators, trend
+engine, weight simulation and snapshot export) reads from the aliases in
+``settings.READ_REPLICA_DATABASES``; everything else, and every write, uses
+``default``. Reads stay on ``default`` while:
+
+- a transaction is open on ``default``;
+- the current request has already written;
+- the requesting user wrote within the last ``REPLICA_PIN_SECONDS``
+  (recorded by ``ReplicaPinningMiddleware``), so they see their own changes
+  while the replicas catch up.
+
+The pin is kept in the Django cache. A write served by one worker has to pin
+reads served by the others, so ``apps.core`` refuses to start on a cache that
+is not shared between processes (see ``settings.CACHES``).
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_CACHE_KEY = "db:pin:{}"
+
+_analytics = ContextVar("analytics_reads", default=False)
+_request_state = ContextVar("replica_request_state", default=None)
+
+
+@contextmanager
+def analytics_reads():
+    """Route reads in this block (or decorated function) to a read replica."""
+    token = _analytics.set(True)
+    try:
+        yield
+    finally:
+        _analytics.reset(token)
+
+
+def _pinned_to_primary():
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return True
+    state = _request_state.get()
+    if state is None:
+        return False
+    if state["wrote"]:
+        return True
+    if state["pinned"] is None:
+        # DRF sets the authenticated user on the underlying request, so this
+        # works for token auth too once the view has authenticated.
+        user = getattr(state["request"], "user", None)
+        if user is None or not user.is_authenticated:
+            return False
+        state["pinned"] = bool(cache.get(PIN_CACHE_KEY.format(user.pk)))
+    return state["pinned"]
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.READ_REPLICA_DATABASES
+        if not replicas or not _analytics.get() or _pinned_to_primary():
+            return None
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state["wrote"] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as default.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.READ_REPLICA_DATABASES
+
+
+class ReplicaPinningMiddleware:
+    """Pins a user's reads to ``default`` for a while after a request of theirs wrote."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = {"request": request, "wrote": False, "pinned": None}
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        user = getattr(request, "user", None)
+        if state["wrote"] and user is not None and user.is_authenticated:
+            cache.set(PIN_CACHE_KEY.format(user.pk), True, settings.REPLICA_PIN_SECONDS)
+        return response
@@ -0,0 +1,91 @@
+"""
+Cross-table invariants enforced by the database.
+
+Triggers installed by the grades and courses migrations reject rows that
+break these rules, on SQLite and PostgreSQL. Each rule fails with its name
+as the error message. The rules hold for bulk_create(), bulk_update() and
+raw SQL too, so those paths need no full_clean().
+``rejections_as_validation_errors`` turns a rejected single-row save back
+into the ValidationError that clean() used to raise.
+
+The migrations describe their triggers as a list of
+``(table, columns whose update re-checks the row, {rule: condition that
+breaks it})`` and install them with ``create_triggers``/``drop_triggers``.
+"""
+from contextlib import contextmanager
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+# trigger error -> message
+RULES = {
+    "grade_score_above_max_score": "Score cannot exceed the maximum score for this assessment.",
+    "grade_student_not_enrolled": "The student is not enrolled in the course for this assessment.",
+    "grade_student_not_student": "Grades can only be given to users with the student role.",
+    "grade_entered_by_not_staff": "Grades can only be entered by instructors, department heads or superusers.",
+    "assessment_lo_course_mismatch": "Learning Outcome must belong to the same course as the Assessment.",
+    "lo_po_department_mismatch": "Program Outcome must belong to the same department as the Learning Outcome.",
+}
+
+
+def broken_rule(exc):
+    """Name of the rule an IntegrityError reports, or None."""
+    message = str(exc)
+    return next((rule for rule in RULES if rule in message), None)
+
+
+@contextmanager
+def rejections_as_validation_errors(using=None, savepoint=True):
+    # The savepoint keeps an enclosing transaction usable after a rejection.
+    # Callers that abandon the transaction on a rejection can skip it.
+    try:
+        with transaction.atomic(using=using, savepoint=savepoint):
+            yield
+    except IntegrityError as exc:
+        rule = broken_rule(exc)
+        if rule is None:
+            raise
+        raise ValidationError(RULES[rule], code=rule) from exc
+
+
+def trigger_sql(vendor, table, columns, rules):
+    """CREATE statements for a trigger that rejects rows matching any of ``rules`` ({name: condition on NEW})."""
+    if vendor == "sqlite":
+        checks = " ".join(f"SELECT RAISE(ABORT, '{name}') WHERE {condition};" for name, condition in rules.items())
+        return [
+            f"CREATE TRIGGER {table}_integrity_insert BEFORE INSERT ON {table} BEGIN {checks} END",
+            f"CREATE TRIGGER {table}_integrity_update BEFORE UPDATE OF {columns} ON {table} BEGIN {checks} END",
+        ]
+    if vendor == "postgresql":
+        checks = " ".join(
+            f"IF {condition} THEN RAISE EXCEPTION '{name}' USING ERRCODE = 'check_violation'; END IF;"
+            for name, condition in rules.items()
+        )
+        return [
+            f"CREATE FUNCTION {table}_integrity() RETURNS trigger LANGUAGE plpgsql AS $$ "
+            f"BEGIN {checks} RETURN NEW; END $$",
+            f"CREATE TRIGGER {table}_integrity BEFORE INSERT OR UPDATE OF {columns} ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION {table}_integrity()",
+        ]
+    return []
+
+
+def drop_sql(vendor, table):
+    if vendor == "sqlite":
+        return [f"DROP TRIGGER IF EXISTS {table}_integrity_insert", f"DROP TRIGGER IF EXISTS {table}_integrity_update"]
+    if vendor == "postgresql":
+        return [f"DROP FUNCTION IF EXISTS {table}_integrity() CASCADE"]
+    return []
+
+
+# RunPython callables; migrations bind ``triggers`` with functools.partial.
+def create_triggers(apps, schema_editor, triggers):
+    for table, columns, rules in triggers:
+        for sql in trigger_sql(schema_editor.connection.vendor, table, columns, rules):
+            schema_editor.execute(sql, params=None)
+
+
+def drop_triggers(apps, schema_editor, triggers):
+    for table, _, _ in triggers:
+        for sql in drop_sql(schema_editor.connection.vendor, table):
+            schema_editor.execute(sql, params=None)
@@ -0,0 +1,82 @@
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+FIRST_REQUEST_SCRIPT = """
+import os, sys, time
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "po_pilot.settings")
+import django
+django.setup()
+from django.test import Client
+start = time.perf_counter()
+Client().get(sys.argv[1], HTTP_HOST="localhost")
+print(f"first request: {(time.perf_counter() - start) * 1000:.1f} ms")
+"""
+
+
+class Command(BaseCommand):
+    requires_system_checks = []
+    help = (
+        "Run a management command (default: check) or a first request in a fresh interpreter "
+        "with -X importtime and report import cost by module."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("target", nargs="*", default=["check"], help="Management command and its arguments")
+        parser.add_argument("--first-request", metavar="PATH", help="Profile setup plus one request to PATH instead")
+        parser.add_argument("--top", type=int, default=25)
+        parser.add_argument("--by-package", action="store_true", help="Group self time by top-level package")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs used for the wall-clock median")
+
+    def handle(self, *args, **options):
+        if options["first_request"]:
+            cmd = [sys.executable, "-X", "importtime", "-c", FIRST_REQUEST_SCRIPT, options["first_request"]]
+        else:
+            cmd = [sys.executable, "-X", "importtime", str(settings.BASE_DIR / "manage.py"), *options["target"]]
+
+        timings = []
+        stderr = ""
+        for _ in range(max(options["repeat"], 1)):
+            start = time.perf_counter()
+            proc = subprocess.run(cmd, capture_output=True, text=True, cwd=settings.BASE_DIR, env=os.environ.copy())
+            timings.append(time.perf_counter() - start)
+            stderr = proc.stderr
+            if proc.returncode != 0:
+                raise CommandError(f"Profiled process failed:\n{proc.stderr[-2000:]}")
+            if options["first_request"]:
+                self.stdout.write(proc.stdout.strip().splitlines()[-1])
+
+        self_us = defaultdict(int)
+        cumulative_us = {}
+        for line in stderr.splitlines():
+            match = IMPORTTIME_LINE.match(line)
+            if not match:
+                continue
+            own, cumulative, indent, module = match.groups()
+            key = module.split(".")[0] if options["by_package"] else module
+            self_us[key] += int(own)
+            if len(indent) == 1:
+                cumulative_us[module] = int(cumulative)
+
+        total_ms = sum(self_us.values()) / 1000
+        self.stdout.write(
+            f"wall time: median {statistics.median(timings) * 1000:.0f} ms over {len(timings)} run(s), "
+            f"import time: {total_ms:.0f} ms"
+        )
+        self.stdout.write(f"{'self ms':>9} {'share':>6}  module")
+        for module, own in sorted(self_us.items(), key=lambda kv: kv[1], reverse=True)[:options["top"]]:
+            self.stdout.write(f"{own / 1000:9.1f} {own / 1000 / total_ms:6.1%}  {module}")
+
+        if not options["by_package"]:
+            self.stdout.write("\nslowest top-level imports (cumulative):")
+            for module, cumulative in sorted(cumulative_us.items(), key=lambda kv: kv[1], reverse=True)[:10]:
+                self.stdout.write(f"{cumulative / 1000:9.1f}  {module}")
@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.core.models import ChangeEvent
+
+
+class Command(BaseCommand):
+    help = "Delete change log events older than the retention window."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=90, help="Keep events from the last N days (default: 90)")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        deleted, _ = ChangeEvent.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} change events older than {cutoff:%Y-%m-%d}."))
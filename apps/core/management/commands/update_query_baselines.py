@@ -0,0 +1,21 @@
+import os
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from apps.core.testing import UPDATE_ENV
+
+
+class Command(BaseCommand):
+    help = "Re-run the query budget tests and rewrite their query_baselines.json files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("test_labels", nargs="*", default=["apps"], help="Test labels to run (default: apps)")
+
+    def handle(self, *args, **options):
+        os.environ[UPDATE_ENV] = "1"
+        try:
+            call_command("test", *options["test_labels"], verbosity=options["verbosity"])
+        finally:
+            del os.environ[UPDATE_ENV]
+        self.stdout.write(self.style.SUCCESS("Query baselines updated."))
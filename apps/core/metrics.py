@@ -0,0 +1,294 @@
+"""
+Operational metrics, exported at /metrics in the Prometheus text format.
+
+Counters and histograms are recorded per process. With ``METRICS_DIR`` set
+(needed under gunicorn with several workers, and to see management-command
+jobs) every process writes its values to its own memory-mapped file in that
+directory, and /metrics sums the files of all processes, past and present.
+Empty the directory when the server starts. Without ``METRICS_DIR`` values
+live in process memory.
+
+Recording is a dict lookup and a float add (plus an 8-byte store into the
+mmap), so instrumenting every request stays cheap.
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+JOB_BUCKETS = (1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0)
+
+_lock = threading.Lock()
+
+
+class _MemoryValues:
+
+    def __init__(self):
+        self.values = {}
+
+    def inc(self, key, amount):
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def items(self):
+        return list(self.values.items())
+
+
+class _MmapValues:
+    """
+    ``key -> float`` in a file only this process writes.
+
+    Layout: an 8-byte header holding the used length, then entries of
+    [uint32 key length][utf-8 key, padded to 8 bytes][float64 value]. The
+    header is updated after an entry is complete, so readers never see a
+    partial one.
+    """
+
+    initial_size = 64 * 1024
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "a+b")
+        if os.fstat(self.file.fileno()).st_size == 0:
+            self.file.truncate(self.initial_size)
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        self.positions = {}
+        used = struct.unpack_from("Q", self.map, 0)[0] or 8
+        for key, _, pos in _read_entries(self.map, used):
+            self.positions[key] = pos
+        self.used = used
+
+    def _append(self, key):
+        encoded = key.encode("utf-8")
+        padded = len(encoded) + (-(4 + len(encoded)) % 8)
+        size = 4 + padded + 8
+        while self.used + size > len(self.map):
+            new_size = len(self.map) * 2
+            self.map.close()
+            self.file.truncate(new_size)
+            self.map = mmap.mmap(self.file.fileno(), 0)
+        struct.pack_into(f"I{padded}sd", self.map, self.used, len(encoded), encoded, 0.0)
+        self.positions[key] = self.used + 4 + padded
+        self.used += size
+        struct.pack_into("Q", self.map, 0, self.used)
+
+    def inc(self, key, amount):
+        if key not in self.positions:
+            self._append(key)
+        pos = self.positions[key]
+        struct.pack_into("d", self.map, pos, struct.unpack_from("d", self.map, pos)[0] + amount)
+
+    def items(self):
+        return [(key, struct.unpack_from("d", self.map, pos)[0]) for key, pos in self.positions.items()]
+
+
+def _read_entries(buf, used):
+    pos = 8
+    while pos < used:
+        length = struct.unpack_from("I", buf, pos)[0]
+        padded = length + (-(4 + length) % 8)
+        key = bytes(buf[pos + 4:pos + 4 + length]).decode("utf-8")
+        value_pos = pos + 4 + padded
+        yield key, struct.unpack_from("d", buf, value_pos)[0], value_pos
+        pos = value_pos + 8
+
+
+_store = None
+_store_pid = None
+
+
+def _values():
+    global _store, _store_pid
+    # Forked workers must not write into their parent's file.
+    if _store_pid != os.getpid():
+        directory = settings.METRICS_DIR
+        if directory:
+            Path(directory).mkdir(parents=True, exist_ok=True)
+            _store = _MmapValues(Path(directory) / f"{os.getpid()}.db")
+        else:
+            _store = _MemoryValues()
+        _store_pid = os.getpid()
+    return _store
+
+
+def _collect():
+    """Summed ``key -> value`` over every process."""
+    directory = settings.METRICS_DIR
+    if not directory:
+        with _lock:
+            return dict(_values().items())
+    totals = {}
+    for path in Path(directory).glob("*.db"):
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < 8:
+            continue
+        for key, value, _ in _read_entries(data, struct.unpack_from("Q", data, 0)[0]):
+            totals[key] = totals.get(key, 0.0) + value
+    return totals
+
+
+REGISTRY = {}
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._keys = {}
+        REGISTRY[name] = self
+
+    def _key(self, suffix, labels, extra=()):
+        cache_key = (suffix, tuple(labels.get(n, "") for n in self.labelnames), extra)
+        key = self._keys.get(cache_key)
+        if key is None:
+            key = self._keys[cache_key] = json.dumps(
+                [self.name + suffix, [[n, str(v)] for n, v in zip(self.labelnames, cache_key[1])] + list(extra)]
+            )
+        return key
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        with _lock:
+            _values().inc(self._key("_total", labels), amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        # Buckets are stored non-cumulatively and summed up on export.
+        le = next((b for b in self.buckets if value <= b), "+Inf")
+        with _lock:
+            values = _values()
+            values.inc(self._key("_bucket", labels, (("le", str(le)),)), 1)
+            values.inc(self._key("_sum", labels), value)
+            values.inc(self._key("_count", labels), 1)
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs):
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+def render():
+    samples = {}
+    for key, value in _collect().items():
+        name, pairs = json.loads(key)
+        samples.setdefault(name, []).append((pairs, value))
+
+    lines = []
+    for metric in REGISTRY.values():
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        if metric.kind == "counter":
+            for pairs, value in sorted(samples.get(metric.name + "_total", [])):
+                lines.append(f"{metric.name}_total{_labels(pairs)} {_number(value)}")
+            continue
+        per_series = {}
+        for pairs, value in samples.get(metric.name + "_bucket", []):
+            le = pairs[-1][1]
+            per_series.setdefault(tuple(map(tuple, pairs[:-1])), {})[le] = value
+        sums = {tuple(map(tuple, p)): v for p, v in samples.get(metric.name + "_sum", [])}
+        counts = {tuple(map(tuple, p)): v for p, v in samples.get(metric.name + "_count", [])}
+        for series in sorted(counts):
+            buckets = per_series.get(series, {})
+            cumulative = 0.0
+            for le in [str(b) for b in metric.buckets] + ["+Inf"]:
+                cumulative += buckets.get(le, 0.0)
+                lines.append(f"{metric.name}_bucket{_labels([*series, ('le', le)])} {_number(cumulative)}")
+            lines.append(f"{metric.name}_sum{_labels(series)} {_number(sums.get(series, 0.0))}")
+            lines.append(f"{metric.name}_count{_labels(series)} {_number(counts[series])}")
+    return "\n".join(lines) + "\n"
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time to serve a request, by view.", ["view", "method"]
+)
+REQUESTS = Counter("http_requests", "Requests served, by view and status.", ["view", "method", "status"])
+DB_QUERIES = Counter("db_queries", "Database queries run while serving requests, by view.", ["view"])
+CACHE_REQUESTS = Counter(
+    "achievement_cache_requests", "Achievement result cache lookups, by cache and hit/miss.", ["cache", "result"]
+)
+CALCULATOR_DURATION = Histogram(
+    "calculator_duration_seconds", "AchievementCalculator call durations.", ["calculator"]
+)
+JOB_ITEMS = Counter("job_items", "Items processed by batch jobs (imports, recomputes, clones).", ["job"])
+JOB_DURATION = Histogram("job_duration_seconds", "Batch job run times.", ["job"], buckets=JOB_BUCKETS)
+
+
+def record_job(job, items, seconds):
+    JOB_ITEMS.inc(items, job=job)
+    JOB_DURATION.observe(seconds, job=job)
+
+
+def observe_calculator(trace):
+    """``apps.grades.profiling`` hook."""
+    CALCULATOR_DURATION.observe(trace.seconds, calculator=trace.name)
+
+
+def _view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "<unmatched>"
+    return match.view_name or match.route
+
+
+class MetricsMiddleware:
+    """Request latency, status and query count per view. Goes first in MIDDLEWARE."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = [0]
+
+        def count(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(count))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        view = _view_name(request)
+        REQUEST_LATENCY.observe(elapsed, view=view, method=request.method)
+        REQUESTS.inc(view=view, method=request.method, status=response.status_code)
+        if queries[0]:
+            DB_QUERIES.inc(queries[0], view=view)
+        return response
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(help_text='Ex: grades.assessmentgrade', max_length=50, verbose_name='Model')),
+                ('object_id', models.BigIntegerField(verbose_name='Object ID')),
+                ('action', models.CharField(choices=[('UPSERT', 'Created or updated'), ('DELETE', 'Deleted')], max_length=10, verbose_name='Action')),
+                ('data', models.JSONField(blank=True, null=True, verbose_name='Data')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Created At')),
+            ],
+            options={
+                'verbose_name': 'Change Event',
+                'verbose_name_plural': 'Change Events',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['model', 'id'], name='core_change_model_43be86_idx')],
+            },
+        ),
+    ]
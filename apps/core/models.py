@@ -96,4 +96,29 @@ class ProgramOutcome(models.Model):
 
     def save(self, *args, **kwargs):
         self.full_clean()
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+
+class ChangeEvent(models.Model):
+    """Append-only log of changes to grades, assessments and contributions, read by /api/changes/."""
+
+    class Action(models.TextChoices):
+        UPSERT = "UPSERT", "Created or updated"
+        DELETE = "DELETE", "Deleted"
+
+    model = models.CharField("Model", max_length=50, help_text="Ex: grades.assessmentgrade")
+    object_id = models.BigIntegerField("Object ID")
+    action = models.CharField("Action", max_length=10, choices=Action.choices)
+    data = models.JSONField("Data", null=True, blank=True)
+    created_at = models.DateTimeField("Created At", auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Change Event"
+        verbose_name_plural = "Change Events"
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["model", "id"]),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.action} {self.model}:{self.object_id}"
@@ -0,0 +1,175 @@
+"""
+Test helpers shared by the app test suites.
+
+``QueryBudgetMixin`` records the number and shape of SQL queries a block runs
+and compares them with a committed baseline file, so a serializer or
+calculator change that introduces an N+1 fails the suite. Regenerate the
+baselines with ``python manage.py update_query_baselines`` after an intended
+change.
+"""
+import json
+import os
+import re
+from contextlib import contextmanager
+from decimal import Decimal
+from pathlib import Path
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+UPDATE_ENV = "QUERY_BASELINES_UPDATE"
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN \((?:\?|%s)(?:, (?:\?|%s))*\)")
+_VALUES_ROWS = re.compile(r"(\((?:\?, )*\?\))(?:, \((?:\?, )*\?\))+")
+_SAVEPOINT = re.compile(r'"s\d+_x\d+"')
+_SPACES = re.compile(r"\s+")
+
+
+def query_shape(sql):
+    """SQL with literals and IN-lists collapsed, so the same query at another size has the same shape."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (?)", sql)
+    sql = _VALUES_ROWS.sub(r"\1, ...", sql)
+    sql = _SAVEPOINT.sub('"?"', sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin checking query budgets against ``query_baseline_file``.
+
+    Use ``with self.assertQueryBudget("name"):`` around the code under test.
+    """
+
+    query_baseline_file = None
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._recorded_baselines = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        if os.environ.get(UPDATE_ENV) and cls._recorded_baselines:
+            path = Path(cls.query_baseline_file)
+            baselines = json.loads(path.read_text()) if path.exists() else {}
+            baselines.update(cls._recorded_baselines)
+            path.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        super().tearDownClass()
+
+    def _load_baselines(self):
+        path = Path(self.query_baseline_file)
+        if not hasattr(type(self), "_baselines_cache"):
+            type(self)._baselines_cache = json.loads(path.read_text()) if path.exists() else {}
+        return type(self)._baselines_cache
+
+    @contextmanager
+    def assertQueryBudget(self, name):
+        # Budgets are measured cold so they do not depend on which test warmed the cache.
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            yield ctx
+        shapes = [query_shape(q["sql"]) for q in ctx.captured_queries]
+
+        if os.environ.get(UPDATE_ENV):
+            self._recorded_baselines[name] = {"count": len(shapes), "shapes": shapes}
+            return
+
+        baseline = self._load_baselines().get(name)
+        if baseline is None:
+            self.fail(f"No query baseline for {name!r}; run `python manage.py update_query_baselines`.")
+        if len(shapes) > baseline["count"]:
+            new_shapes = [s for s in shapes if s not in baseline["shapes"]]
+            detail = "\n".join(f"  + {s}" for s in new_shapes) or "  (same shapes, more repetitions)"
+            self.fail(
+                f"{name!r} ran {len(shapes)} queries, budget is {baseline['count']}.\n"
+                f"Queries not in the baseline:\n{detail}"
+            )
+
+
+def build_fixture_dataset(students=20, templates=3, terms=(("Fall", 2024), ("Spring", 2025))):
+    """
+    Deterministic department with POs, course templates, instances, contributions and grades.
+
+    Query budgets are recorded against this dataset, so keep its size fixed
+    unless the baselines are regenerated in the same change.
+    """
+    from apps.core.models import Department, ProgramOutcome
+    from apps.courses.models import (
+        Assessment,
+        AssessmentToLOContribution,
+        CourseInstance,
+        CourseTemplate,
+        LearningOutcome,
+        LOtoPOContribution,
+    )
+    from apps.grades.models import AssessmentGrade
+    from apps.users.models import User
+
+    department = Department.objects.create(name="Computer Engineering", code="CSE")
+    head = User.objects.create_user(
+        "head@example.com", "password", role=User.Role.DEPARTMENT_HEAD, department=department
+    )
+    instructor = User.objects.create_user(
+        "instructor@example.com", "password", role=User.Role.INSTRUCTOR, department=department
+    )
+    User.objects.bulk_create([
+        User(email=f"student{i}@example.com", role=User.Role.STUDENT, department=department,
+             student_id=str(100000 + i))
+        for i in range(students)
+    ])
+    student_list = list(User.objects.filter(role=User.Role.STUDENT).order_by("id"))
+    pos = [
+        ProgramOutcome.objects.create(department=department, code=str(i), description=f"Program outcome {i}")
+        for i in range(1, 5)
+    ]
+
+    course_instances = []
+    for t in range(templates):
+        template = CourseTemplate.objects.create(
+            department=department, code=f"CSE{101 + t}", name=f"Course {t + 1}", credit=3 + t % 2
+        )
+        los = [
+            LearningOutcome.objects.create(course_template=template, code=str(j), description=f"Outcome {j}")
+            for j in range(1, 4)
+        ]
+        for j, lo in enumerate(los):
+            for k in range(2):
+                LOtoPOContribution.objects.create(
+                    learning_outcome=lo, program_outcome=pos[(j + k + t) % len(pos)],
+                    weight=Decimal(1 + (j + k) % 5), is_approved=True, approved_by=head,
+                )
+        for semester, year in terms:
+            instance = CourseInstance.objects.create(
+                course_template=template, semester=semester, year=year, instructor=instructor
+            )
+            instance.students.set(student_list)
+            course_instances.append(instance)
+            assessments = [
+                Assessment.objects.create(course_instance=instance, name=name, assessment_type=kind, weight=w)
+                for name, kind, w in (("Midterm", "MIDTERM", 40), ("Final", "FINAL", 60))
+            ]
+            for a, assessment in enumerate(assessments):
+                for j, lo in enumerate(los):
+                    if (a + j) % 3 != 2:
+                        AssessmentToLOContribution.objects.create(
+                            assessment=assessment, learning_outcome=lo, weight=Decimal(1 + (a + j) % 5)
+                        )
+            AssessmentGrade.objects.bulk_create([
+                AssessmentGrade(student=s, assessment=assessment, score=Decimal(40 + (i * 7 + a * 13) % 60))
+                for i, s in enumerate(student_list)
+                for a, assessment in enumerate(assessments)
+            ])
+
+    return {
+        "department": department,
+        "head": head,
+        "instructor": instructor,
+        "students": student_list,
+        "program_outcomes": pos,
+        "course_instances": course_instances,
+    }
@@ -1,3 +1,194 @@
-from django.test import TestCase
+import tempfile
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.core import metrics
+from apps.core.apps import require_shared_cache
+from apps.core.db_routers import ReplicaPinningMiddleware, ReplicaRouter, analytics_reads
+from apps.core.testing import build_fixture_dataset
+from apps.courses.cloning import clone_course_instances
+from apps.core.models import Department, ProgramOutcome
+from apps.courses.models import CourseInstance, CourseTemplate, LearningOutcome, LOtoPOContribution
+from apps.grades.models import AssessmentGrade
+from apps.users.models import User
+
+CHANGELISTS = [
+    "/admin/core/programoutcome/",
+    "/admin/courses/coursetemplate/",
+    "/admin/courses/courseinstance/",
+    "/admin/courses/assessment/",
+    "/admin/courses/learningoutcome/",
+    "/admin/courses/assessmenttolocontribution/",
+    "/admin/courses/lotopocontribution/",
+    "/admin/grades/assessmentgrade/",
+    "/admin/users/user/",
+]
+
+
+@skipUnless(settings.ENABLE_ADMIN, "admin is disabled")
+class AdminChangelistQueryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixture_dataset(students=3, templates=2, terms=(("Fall", 2024),))
+        cls.admin = User.objects.create_superuser("admin@example.com", "password")
+
+    def query_counts(self):
+        counts = {}
+        for url in CHANGELISTS:
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            counts[url] = len(ctx)
+        return counts
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.client.force_login(self.admin)
+        before = self.query_counts()
+
+        result = clone_course_instances([c.id for c in self.data["course_instances"]], "Spring", 2025)
+        students = self.data["students"]
+        for course in CourseInstance.objects.filter(pk__in=result["created"].values()):
+            course.students.set(students)
+            AssessmentGrade.objects.bulk_create([
+                AssessmentGrade(student=s, assessment=a, score=50)
+                for s in students for a in course.assessments.all()
+            ])
+
+        # Rows for the changelists the clone does not grow, in a second department.
+        other = Department.objects.create(name="Electrical Engineering", code="EE")
+        head = User.objects.create_user(
+            "ee-head@example.com", "password", role=User.Role.DEPARTMENT_HEAD, department=other
+        )
+        pos = [ProgramOutcome.objects.create(department=other, code=str(i), description="Extra") for i in (1, 2, 3)]
+        template = CourseTemplate.objects.create(department=other, code="EE101", name="Circuits", credit=3)
+        for i in (1, 2, 3):
+            lo = LearningOutcome.objects.create(course_template=template, code=str(i), description="Extra")
+            for po in pos:
+                LOtoPOContribution.objects.create(
+                    learning_outcome=lo, program_outcome=po, weight=2, is_approved=True, approved_by=head
+                )
+        User.objects.bulk_create([
+            User(email=f"ee-student{i}@example.com", role=User.Role.STUDENT, department=other) for i in range(3)
+        ])
+
+        self.assertEqual(self.query_counts(), before)
+
+
+@override_settings(READ_REPLICA_DATABASES=["replica1"], REPLICA_PIN_SECONDS=30)
+class ReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.router = ReplicaRouter()
+        self.user = User(pk=7, email="instructor@example.com")
+
+    def request(self, view):
+        request = RequestFactory().post("/")
+        request.user = self.user
+        return ReplicaPinningMiddleware(view)(request)
+
+    def test_only_analytics_reads_use_replicas(self):
+        self.assertIsNone(self.router.db_for_read(User))
+        with analytics_reads():
+            self.assertEqual(self.router.db_for_read(User), "replica1")
+        self.assertEqual(self.router.db_for_write(User), "default")
+
+    def analytics_route(self, write_first=False):
+        routes = []
+
+        def view(request):
+            with analytics_reads():
+                if write_first:
+                    self.router.db_for_write(User)
+                routes.append(self.router.db_for_read(User))
+            return HttpResponse()
+
+        self.request(view)
+        return routes[0]
+
+    def test_reads_after_a_write_stay_on_primary(self):
+        self.assertEqual(self.analytics_route(), "replica1")
+        self.assertIsNone(self.analytics_route(write_first=True))
+        # Later requests of the same user are pinned until REPLICA_PIN_SECONDS pass.
+        self.assertIsNone(self.analytics_route())
+        self.user = User(pk=8, email="other@example.com")
+        self.assertEqual(self.analytics_route(), "replica1")
+
+    def test_pin_is_visible_to_other_workers(self):
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": location},
+        }):
+            worker_a, worker_b = caches.create_connection("default"), caches.create_connection("default")
+            with mock.patch("apps.core.db_routers.cache", worker_a):
+                self.assertIsNone(self.analytics_route(write_first=True))
+            with mock.patch("apps.core.db_routers.cache", worker_b):
+                self.assertIsNone(self.analytics_route())
+
+
+class SharedCacheTests(SimpleTestCase):
+
+    LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+    def test_process_local_cache_is_refused_with_several_processes(self):
+        with override_settings(CACHES=self.LOCMEM, SINGLE_PROCESS=False):
+            with self.assertRaisesMessage(ImproperlyConfigured, "PO_PILOT_CACHE_URL"):
+                require_shared_cache()
+        with override_settings(CACHES=self.LOCMEM, SINGLE_PROCESS=True):
+            require_shared_cache()
+
+    def test_shared_cache_is_accepted(self):
+        shared = {"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "cache"}}
+        with override_settings(CACHES=shared, SINGLE_PROCESS=False):
+            require_shared_cache()
+
+
+@skipUnless(settings.METRICS_ENABLED, "metrics are disabled")
+class MetricsTests(TestCase):
+
+    def setUp(self):
+        # A fresh per-process store for each test.
+        metrics._store_pid = None
+        self.addCleanup(setattr, metrics, "_store_pid", None)
+
+    def test_requests_are_recorded_per_view(self):
+        self.client.post("/api/token/", {"email": "nobody@example.com", "password": "x"})
+        body = self.client.get("/metrics").content.decode()
+        self.assertIn("# TYPE http_request_duration_seconds histogram", body)
+        self.assertIn('http_request_duration_seconds_count{view="token-obtain-pair",method="POST"} 1', body)
+        self.assertIn('http_requests_total{view="token-obtain-pair",method="POST",status="401"} 1', body)
+        self.assertRegex(body, r'db_queries_total\{view="token-obtain-pair"\} [1-9]')
+
+    def test_histogram_buckets_are_cumulative(self):
+        for value in (0.003, 0.2, 20):
+            metrics.CALCULATOR_DURATION.observe(value, calculator="test")
+        body = metrics.render()
+        self.assertIn('calculator_duration_seconds_bucket{calculator="test",le="0.005"} 1', body)
+        self.assertIn('calculator_duration_seconds_bucket{calculator="test",le="0.25"} 2', body)
+        self.assertIn('calculator_duration_seconds_bucket{calculator="test",le="+Inf"} 3', body)
+        self.assertIn('calculator_duration_seconds_count{calculator="test"} 3', body)
+
+    def test_process_files_are_summed(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            metrics.record_job("import", 5, 2.0)
+            other = metrics._MmapValues(f"{directory}/999999.db")
+            other.inc(metrics.JOB_ITEMS._key("_total", {"job": "import"}), 7)
+            for i in range(2000):
+                # Forces the other file to grow past its initial size.
+                other.inc(metrics.JOB_ITEMS._key("_total", {"job": f"job{i}"}), 1)
+            body = metrics.render()
+        self.assertIn('job_items_total{job="import"} 12', body)
+        self.assertIn('job_items_total{job="job1999"} 1', body)
+        self.assertIn('job_duration_seconds_count{job="import"} 1', body)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret").status_code, 200)
@@ -1,4 +1,7 @@
 from django.contrib import admin, messages
+
+from apps.core.paginators import EstimatedCountPaginator
+from .search import matching_ids
 from .models import (
     CourseTemplate,
     CourseInstance,
@@ -28,6 +31,7 @@ class AssessmentToLOInline(admin.TabularInline):
     model = AssessmentToLOContribution
     extra = 1
     fields = ["learning_outcome", "weight"]
+    autocomplete_fields = ["learning_outcome"]
 
 
 class LOtoPOInline(admin.TabularInline):
@@ -35,6 +39,7 @@ class LOtoPOInline(admin.TabularInline):
     extra = 1
     fields = ["program_outcome", "weight", "is_approved", "approved_by", "approved_at"]
     readonly_fields = ["is_approved", "approved_by", "approved_at"]
+    autocomplete_fields = ["program_outcome"]
 
 
 # -------------------
@@ -44,6 +49,7 @@ class LOtoPOInline(admin.TabularInline):
 @admin.register(CourseTemplate)
 class CourseTemplateAdmin(admin.ModelAdmin):
     list_display = ("department", "code", "name", "credit")
+    list_select_related = ("department",)
     list_filter = ("department",)
     search_fields = ("code", "name", "department__code", "department__name")
     inlines = [LearningOutcomeInline]
@@ -52,9 +58,10 @@ class CourseTemplateAdmin(admin.ModelAdmin):
 @admin.register(CourseInstance)
 class CourseInstanceAdmin(admin.ModelAdmin):
     list_display = ("get_full_code", "semester", "year", "instructor", "is_active")
+    list_select_related = ("course_template__department", "instructor")
     list_filter = ("course_template__department", "semester", "year", "is_active")
     search_fields = ("course_template__code", "course_template__name", "instructor__email")
-    filter_horizontal = ("students",)
+    autocomplete_fields = ("course_template", "instructor", "students")
     inlines = [AssessmentInline]
 
     def get_full_code(self, obj):
@@ -65,7 +72,9 @@ class CourseInstanceAdmin(admin.ModelAdmin):
 @admin.register(Assessment)
 class AssessmentAdmin(admin.ModelAdmin):
     list_display = ("name", "course_instance", "assessment_type", "max_score", "weight")
-    list_filter = ("assessment_type", "course_instance__course_template__department")
+    list_select_related = ("course_instance__course_template__department",)
+    autocomplete_fields = ("course_instance",)
+    list_filter = ("assessment_type", "department", "year", "semester")
     search_fields = ("name", "course_instance__course_template__code", "course_instance__course_template__name")
     inlines = [AssessmentToLOInline]
 
@@ -73,10 +82,19 @@ class AssessmentAdmin(admin.ModelAdmin):
 @admin.register(LearningOutcome)
 class LearningOutcomeAdmin(admin.ModelAdmin):
     list_display = ("code", "course_template", "get_department", "description")
+    list_select_related = ("course_template__department",)
+    autocomplete_fields = ("course_template",)
     list_filter = ("course_template__department",)
-    search_fields = ("code", "description", "course_template__code", "course_template__name")
+    # Descriptions are searched through the full-text index (apps.courses.search).
+    search_fields = ("code", "course_template__code", "course_template__name")
     inlines = [LOtoPOInline]
 
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            results |= queryset.filter(pk__in=matching_ids(search_term, "LO"))
+        return results, may_have_duplicates
+
     def get_department(self, obj):
         return obj.course_template.department
     get_department.short_description = "Department"
@@ -85,6 +103,13 @@ class LearningOutcomeAdmin(admin.ModelAdmin):
 @admin.register(AssessmentToLOContribution)
 class AssessmentToLOContributionAdmin(admin.ModelAdmin):
     list_display = ("assessment", "learning_outcome", "weight")
+    list_select_related = (
+        "assessment__course_instance__course_template__department",
+        "learning_outcome__course_template__department",
+    )
+    autocomplete_fields = ("assessment", "learning_outcome")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_filter = ("assessment__course_instance__course_template__department",)
     search_fields = ("assessment__name", "learning_outcome__code")
 
@@ -92,6 +117,12 @@ class AssessmentToLOContributionAdmin(admin.ModelAdmin):
 @admin.register(LOtoPOContribution)
 class LOtoPOContributionAdmin(admin.ModelAdmin):
     list_display = ("learning_outcome", "program_outcome", "weight", "is_approved", "approved_by", "approved_at")
+    list_select_related = (
+        "learning_outcome__course_template__department",
+        "program_outcome__department",
+        "approved_by",
+    )
+    autocomplete_fields = ("learning_outcome", "program_outcome")
     list_filter = (
         "is_approved",
         "learning_outcome__course_template__department",
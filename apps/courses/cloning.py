@@ -0,0 +1,127 @@
+"""
+Rolling course instances over to a new term.
+
+``clone_course_instances`` copies instances with their assessments and
+assessment→LO weights using one ``INSERT ... SELECT`` per table, so the cost
+does not grow with the number of rows copied. Enrollments and grades are not
+copied. Cloned assessments are matched to their source by (name, type), so a
+source instance with two assessments sharing both cannot be cloned.
+"""
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from apps.core.changelog import record_changes
+from apps.courses.models import Assessment, AssessmentToLOContribution, CourseInstance
+
+
+def _table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def _columns(model, *names):
+    return ", ".join(connection.ops.quote_name(model._meta.get_field(n).column) for n in names)
+
+
+@transaction.atomic
+def clone_course_instances(source_ids, semester, year, copy_instructor=True):
+    """
+    Clone course instances into (semester, year).
+
+    Sources whose course template already has an instance in the target term
+    are skipped. Returns {"created": {source_id: new_id}, "skipped": [...],
+    "assessments": n, "contributions": n}.
+    """
+    source_ids = sorted(set(source_ids))
+    templates = dict(CourseInstance.objects.filter(id__in=source_ids).values_list("id", "course_template_id"))
+    missing = [pk for pk in source_ids if pk not in templates]
+    if missing:
+        raise ValidationError(f"Course instances {missing} do not exist.")
+
+    by_template = {}
+    for pk, template_id in templates.items():
+        by_template.setdefault(template_id, []).append(pk)
+    conflicting = sorted(ids for ids in by_template.values() if len(ids) > 1)
+    if conflicting:
+        raise ValidationError(f"Course instances {conflicting} share a course template; clone one of each.")
+
+    existing = set(CourseInstance.objects.filter(
+        semester=semester, year=year, course_template_id__in=by_template
+    ).values_list("course_template_id", flat=True))
+    skipped = sorted(pk for pk, template_id in templates.items() if template_id in existing)
+    to_clone = [pk for pk in source_ids if templates[pk] not in existing]
+    result = {"created": {}, "skipped": skipped, "assessments": 0, "contributions": 0}
+    if not to_clone:
+        return result
+
+    ambiguous = sorted({
+        row["course_instance_id"]
+        for row in Assessment.objects.filter(course_instance_id__in=to_clone).values(
+            "course_instance_id", "name", "assessment_type"
+        ).annotate(n=Count("id")).filter(n__gt=1).order_by()
+    })
+    if ambiguous:
+        raise ValidationError(
+            f"Course instances {ambiguous} have assessments with the same name and type; rename them first."
+        )
+
+    qn = connection.ops.quote_name
+    ci, assessment, contribution = _table(CourseInstance), _table(Assessment), _table(AssessmentToLOContribution)
+    ids_sql = ", ".join(["%s"] * len(to_clone))
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    # Joins source instance "s" to its clone "t" in the target term.
+    target_join = (
+        f"INNER JOIN {ci} s ON s.{qn('id')} = {{}} "
+        f"INNER JOIN {ci} t ON t.{qn('course_template_id')} = s.{qn('course_template_id')} "
+        f"AND t.{qn('semester')} = %s AND t.{qn('year')} = %s"
+    )
+    instance_columns = _columns(CourseInstance, "course_template", "semester", "year", "instructor", "is_active")
+    assessment_columns = _columns(
+        Assessment, "course_instance", "name", "assessment_type", "max_score", "weight", "department", "semester",
+        "year", "created_at", "updated_at"
+    )
+    contribution_columns = _columns(
+        AssessmentToLOContribution, "assessment", "learning_outcome", "weight", "created_at", "updated_at"
+    )
+    instructor = qn("instructor_id") if copy_instructor else "NULL"
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {ci} ({instance_columns}) "
+            f"SELECT {qn('course_template_id')}, %s, %s, {instructor}, %s "
+            f"FROM {ci} WHERE {qn('id')} IN ({ids_sql})",
+            [semester, year, True, *to_clone],
+        )
+        cursor.execute(
+            f"INSERT INTO {assessment} ({assessment_columns}) "
+            f"SELECT t.{qn('id')}, a.{qn('name')}, a.{qn('assessment_type')}, a.{qn('max_score')}, "
+            f"a.{qn('weight')}, a.{qn('department_id')}, %s, %s, %s, %s "
+            f"FROM {assessment} a {target_join.format('a.' + qn('course_instance_id'))} "
+            f"WHERE s.{qn('id')} IN ({ids_sql})",
+            [semester, year, now, now, semester, year, *to_clone],
+        )
+        result["assessments"] = cursor.rowcount
+        cursor.execute(
+            f"INSERT INTO {contribution} ({contribution_columns}) "
+            f"SELECT na.{qn('id')}, c.{qn('learning_outcome_id')}, c.{qn('weight')}, %s, %s "
+            f"FROM {contribution} c "
+            f"INNER JOIN {assessment} oa ON oa.{qn('id')} = c.{qn('assessment_id')} "
+            f"{target_join.format('oa.' + qn('course_instance_id'))} "
+            f"INNER JOIN {assessment} na ON na.{qn('course_instance_id')} = t.{qn('id')} "
+            f"AND na.{qn('name')} = oa.{qn('name')} AND na.{qn('assessment_type')} = oa.{qn('assessment_type')} "
+            f"WHERE s.{qn('id')} IN ({ids_sql})",
+            [now, now, semester, year, *to_clone],
+        )
+        result["contributions"] = cursor.rowcount
+
+    targets = dict(CourseInstance.objects.filter(
+        semester=semester, year=year, course_template_id__in=[templates[pk] for pk in to_clone]
+    ).values_list("course_template_id", "id"))
+    result["created"] = {pk: targets[templates[pk]] for pk in to_clone}
+
+    # Raw inserts bypass the change-log signals.
+    new_ids = list(result["created"].values())
+    record_changes(Assessment.objects.filter(course_instance_id__in=new_ids))
+    record_changes(AssessmentToLOContribution.objects.filter(assessment__course_instance_id__in=new_ids))
+    return result
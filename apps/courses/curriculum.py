@@ -0,0 +1,101 @@
+"""
+Applying scraper changesets (src/scrape_curSunit.py, data/outputs/changes/)
+to a department's course templates.
+
+A changeset lists added, removed and changed courses keyed by course code, so
+an import touches only the templates that actually changed. Applying is
+idempotent: added courses that already exist are updated, removed courses that
+are already gone are ignored. Templates that still have instances or learning
+outcomes are never deleted, since deleting them would cascade to authored
+outcomes and their contributions. PO matrix cells are course → PO weights,
+which have no direct counterpart here (contributions go LO → PO), so they are
+only counted for review.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+
+from apps.courses.models import CourseTemplate
+
+CODE_LENGTH = CourseTemplate._meta.get_field("code").max_length
+NAME_LENGTH = CourseTemplate._meta.get_field("name").max_length
+
+
+def parse_credit(ects):
+    """OBS ECTS text ("6", "7,5") as a whole number of credits."""
+    try:
+        return int(Decimal(str(ects).replace(",", ".")).to_integral_value())
+    except (InvalidOperation, ValueError):
+        raise ValidationError(f"Invalid ECTS value {ects!r}.")
+
+
+def _course_values(course):
+    code = course["code"].strip()
+    if not code or len(code) > CODE_LENGTH:
+        raise ValidationError(f"Invalid course code {code!r}.")
+    return code, {"name": course["name"].strip()[:NAME_LENGTH], "credit": parse_credit(course["ects"])}
+
+
+@transaction.atomic
+def apply_changeset(department, changes):
+    """
+    Apply one changeset to ``department``'s course templates.
+
+    Returns {"created", "updated", "deleted", "kept", "missing", "matrix_cells"}
+    where "kept" are removed courses whose template still has instances or
+    learning outcomes and "missing" are changed courses with no template to
+    update.
+    """
+    courses = changes["courses"]
+    upserts = dict(_course_values(c) for c in courses["added"])
+    renamed = {}
+    for change in courses["changed"]:
+        fields = change["fields"]
+        values = {}
+        if "name" in fields:
+            values["name"] = fields["name"][1].strip()[:NAME_LENGTH]
+        if "ects" in fields:
+            values["credit"] = parse_credit(fields["ects"][1])
+        if values:
+            renamed[change["code"]] = values
+    removed = {c["code"] for c in courses["removed"]}
+
+    templates = {
+        t.code: t
+        for t in CourseTemplate.objects.filter(department=department, code__in=[*upserts, *renamed, *removed]).order_by()
+    }
+    result = {"created": 0, "updated": 0, "deleted": 0, "kept": [], "missing": [], "matrix_cells": 0}
+
+    new, changed = [], []
+    for code, values in upserts.items():
+        template = templates.get(code)
+        if template is None:
+            new.append(CourseTemplate(department=department, code=code, **values))
+        else:
+            renamed.setdefault(code, {}).update(values)
+    for code, values in renamed.items():
+        template = templates.get(code)
+        if template is None:
+            result["missing"].append(code)
+            continue
+        if any(getattr(template, k) != v for k, v in values.items()):
+            for k, v in values.items():
+                setattr(template, k, v)
+            changed.append(template)
+    CourseTemplate.objects.bulk_create(new)
+    CourseTemplate.objects.bulk_update(changed, ["name", "credit"])
+    result["created"], result["updated"] = len(new), len(changed)
+
+    in_use = set(CourseTemplate.objects.filter(
+        Q(instances__isnull=False) | Q(learning_outcomes__isnull=False),
+        department=department,
+        code__in=removed,
+    ).values_list("code", flat=True).order_by())
+    result["kept"] = sorted(in_use)
+    _, deleted = CourseTemplate.objects.filter(department=department, code__in=removed - in_use).delete()
+    result["deleted"] = deleted.get(CourseTemplate._meta.label, 0)
+
+    result["matrix_cells"] = sum(len(row["cells"]) for row in changes["matrix"])
+    return result
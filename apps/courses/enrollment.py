@@ -0,0 +1,111 @@
+"""
+Cached, compact index of course enrollments.
+
+Each course instance's student ids are kept as a sorted ``array('q')`` in the
+Django cache, so membership is a binary search and counts or intersections
+never load ``User`` rows. Entries are dropped whenever
+``CourseInstance.students`` changes (see ``apps.courses.signals``). The drop
+happens in the process that made the change, so the cache must be shared by
+all workers (``settings.CACHES``, checked at startup by ``apps.core``).
+"""
+from array import array
+from bisect import bisect_left
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+CACHE_KEY = "enrollment:v1:{}"
+CACHE_TIMEOUT = 60 * 60 * 6
+
+
+def _pack(ids):
+    return array("q", sorted(ids)).tobytes()
+
+
+def _unpack(raw):
+    ids = array("q")
+    ids.frombytes(raw)
+    return ids
+
+
+class EnrollmentIndex:
+
+    @staticmethod
+    def _through():
+        from apps.courses.models import CourseInstance
+        return CourseInstance.students.through
+
+    @classmethod
+    def _rows(cls):
+        # Always fill from the primary: a roster read from a lagging replica
+        # would stay cached long after the replica caught up.
+        return cls._through().objects.using(DEFAULT_DB_ALIAS)
+
+    @classmethod
+    def student_ids(cls, course_instance_id):
+        """Sorted ``array('q')`` of the student ids enrolled in the course instance."""
+        raw = cache.get(CACHE_KEY.format(course_instance_id))
+        if raw is None:
+            ids = cls._rows().filter(
+                courseinstance_id=course_instance_id
+            ).values_list("user_id", flat=True)
+            raw = _pack(ids)
+            cache.set(CACHE_KEY.format(course_instance_id), raw, CACHE_TIMEOUT)
+        return _unpack(raw)
+
+    @classmethod
+    def many(cls, course_instance_ids):
+        """{course_instance_id: sorted student ids} with one cache round trip and at most one query."""
+        course_instance_ids = list(course_instance_ids)
+        keys = {CACHE_KEY.format(pk): pk for pk in course_instance_ids}
+        found = cache.get_many(keys)
+        result = {keys[key]: _unpack(raw) for key, raw in found.items()}
+
+        missing = [pk for pk in course_instance_ids if pk not in result]
+        if missing:
+            grouped = {pk: [] for pk in missing}
+            for course_id, user_id in cls._rows().filter(
+                courseinstance_id__in=missing
+            ).values_list("courseinstance_id", "user_id"):
+                grouped[course_id].append(user_id)
+            packed = {pk: _pack(ids) for pk, ids in grouped.items()}
+            cache.set_many({CACHE_KEY.format(pk): raw for pk, raw in packed.items()}, CACHE_TIMEOUT)
+            result.update({pk: _unpack(raw) for pk, raw in packed.items()})
+        return result
+
+    @classmethod
+    def is_enrolled(cls, course_instance_id, student_id):
+        ids = cls.student_ids(course_instance_id)
+        i = bisect_left(ids, student_id)
+        return i < len(ids) and ids[i] == student_id
+
+    @classmethod
+    def count(cls, course_instance_id):
+        return len(cls.student_ids(course_instance_id))
+
+    @classmethod
+    def intersection(cls, course_instance_id, student_ids):
+        """Sorted ids from ``student_ids`` that are enrolled in the course instance."""
+        enrolled = cls.student_ids(course_instance_id)
+        candidates = sorted(set(student_ids))
+        result = array("q")
+        i = j = 0
+        while i < len(enrolled) and j < len(candidates):
+            if enrolled[i] == candidates[j]:
+                result.append(enrolled[i])
+                i += 1
+                j += 1
+            elif enrolled[i] < candidates[j]:
+                i += 1
+            else:
+                j += 1
+        return result
+
+    @staticmethod
+    def invalidate(course_instance_ids):
+        keys = [CACHE_KEY.format(pk) for pk in course_instance_ids]
+        if not keys:
+            return
+        cache.delete_many(keys)
+        # A read inside the writing transaction may have cached uncommitted rows.
+        transaction.on_commit(lambda: cache.delete_many(keys))
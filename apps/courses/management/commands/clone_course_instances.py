@@ -0,0 +1,54 @@
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.metrics import record_job
+from apps.courses.cloning import clone_course_instances
+from apps.courses.models import CourseInstance
+
+
+class Command(BaseCommand):
+    help = "Copy course instances with their assessments and assessment-LO weights to a new term."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from-semester")
+        parser.add_argument("--from-year", type=int)
+        parser.add_argument("--to-semester", required=True)
+        parser.add_argument("--to-year", type=int, required=True)
+        parser.add_argument(
+            "--department",
+            action="append",
+            dest="departments",
+            help="Department code to roll over (repeatable). Defaults to all departments.",
+        )
+        parser.add_argument("--id", type=int, action="append", dest="ids", help="Course instance id (repeatable)")
+        parser.add_argument("--no-instructor", action="store_true", help="Leave the instructor of the clones empty")
+
+    def handle(self, *args, **options):
+        if options["ids"]:
+            source_ids = options["ids"]
+        elif options["from_semester"] and options["from_year"]:
+            qs = CourseInstance.objects.filter(semester=options["from_semester"], year=options["from_year"])
+            if options["departments"]:
+                qs = qs.filter(course_template__department__code__in=options["departments"])
+            source_ids = list(qs.values_list("id", flat=True))
+        else:
+            raise CommandError("Pass --id, or --from-semester and --from-year.")
+        if not source_ids:
+            raise CommandError("No course instances to clone.")
+
+        start = time.perf_counter()
+        try:
+            result = clone_course_instances(
+                source_ids, options["to_semester"], options["to_year"], copy_instructor=not options["no_instructor"]
+            )
+        except ValidationError as exc:
+            raise CommandError(" ".join(exc.messages))
+        record_job("clone_course_instances", len(result["created"]), time.perf_counter() - start)
+        if result["skipped"]:
+            self.stdout.write(f"skipped (already in target term): {result['skipped']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Cloned {len(result['created'])} course instances, {result['assessments']} assessments, "
+            f"{result['contributions']} LO contributions."
+        ))
@@ -0,0 +1,83 @@
+import json
+import time
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.core.metrics import record_job
+from apps.core.models import Department
+from apps.courses.curriculum import apply_changeset
+from apps.courses.models import AppliedChangeset
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply scraper changesets (data/outputs/changes/*.json) to a department's course templates. "
+        "Applied changesets are recorded and skipped on later runs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="Changeset files or directories of them")
+        parser.add_argument("--department", required=True, help="Department code the changesets belong to")
+        parser.add_argument(
+            "--cur-sunit", help="Only apply changesets of this OBS curSunit (useful with a directory)"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            department = Department.objects.get(code=options["department"].strip().upper())
+        except Department.DoesNotExist:
+            raise CommandError(f"Department {options['department']} does not exist.")
+
+        files = []
+        for path in map(Path, options["paths"]):
+            files.extend(sorted(path.glob("*.json")) if path.is_dir() else [path])
+        # Names are <curSunit>_<timestamp>, so sorting applies them in scrape order.
+        files.sort(key=lambda p: p.name)
+
+        done = set(AppliedChangeset.objects.filter(
+            filename__in=[p.name for p in files]
+        ).values_list("filename", flat=True))
+        applied = skipped = courses = 0
+        start = time.perf_counter()
+        for path in files:
+            if path.name in done:
+                skipped += 1
+                continue
+            changes = json.loads(path.read_text(encoding="utf-8"))
+            if options["cur_sunit"] and changes["curSunit"] != options["cur_sunit"]:
+                continue
+            # Each changeset is a diff against the bundle of the one before it.
+            last = AppliedChangeset.objects.filter(department=department, cur_sunit=changes["curSunit"]).last()
+            if last is not None and changes.get("base_sha256") != last.bundle_sha256:
+                raise CommandError(
+                    f"{path.name} does not follow {last.filename} (base_sha256 mismatch); "
+                    "a changeset in between is missing."
+                )
+            try:
+                with transaction.atomic():
+                    result = apply_changeset(department, changes)
+                    AppliedChangeset.objects.create(
+                        department=department,
+                        filename=path.name,
+                        cur_sunit=changes["curSunit"],
+                        base_sha256=changes.get("base_sha256") or "",
+                        bundle_sha256=changes.get("bundle_sha256") or "",
+                    )
+            except ValidationError as exc:
+                raise CommandError(f"{path.name}: {' '.join(exc.messages)}")
+            applied += 1
+            courses += result["created"] + result["updated"] + result["deleted"]
+            self.stdout.write(
+                f"{path.name}: +{result['created']} ~{result['updated']} -{result['deleted']}"
+                + (f", kept (has instances): {result['kept']}" if result["kept"] else "")
+                + (f", missing: {result['missing']}" if result["missing"] else "")
+                + (f", {result['matrix_cells']} PO matrix cells to review" if result["matrix_cells"] else "")
+            )
+        record_job("import_curriculum_changes", courses, time.perf_counter() - start)
+        self.stdout.write(self.style.SUCCESS(
+            f"Applied {applied} changesets to {department.code}"
+            + (f", skipped {skipped} applied earlier." if skipped else ".")
+        ))
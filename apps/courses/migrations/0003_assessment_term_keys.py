@@ -0,0 +1,62 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:23
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def backfill(apps, schema_editor):
+    Assessment = apps.get_model("courses", "Assessment")
+    CourseInstance = apps.get_model("courses", "CourseInstance")
+    instance = CourseInstance.objects.filter(pk=OuterRef("course_instance_id"))
+    Assessment.objects.update(
+        department_id=Subquery(instance.values("course_template__department_id")[:1]),
+        semester=Subquery(instance.values("semester")[:1]),
+        year=Subquery(instance.values("year")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_change_event'),
+        ('courses', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assessment',
+            name='department',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.department'),
+        ),
+        migrations.AddField(
+            model_name='assessment',
+            name='semester',
+            field=models.CharField(editable=False, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='assessment',
+            name='year',
+            field=models.PositiveSmallIntegerField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='assessment',
+            name='department',
+            field=models.ForeignKey(db_index=False, editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.department'),
+        ),
+        migrations.AlterField(
+            model_name='assessment',
+            name='semester',
+            field=models.CharField(editable=False, max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='assessment',
+            name='year',
+            field=models.PositiveSmallIntegerField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='assessment',
+            index=models.Index(fields=['department', 'year', 'semester'], name='assessment_dept_term_idx'),
+        ),
+    ]
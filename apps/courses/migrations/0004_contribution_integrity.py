@@ -0,0 +1,52 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:28
+
+from functools import partial
+
+from django.db import migrations, models
+
+from apps.core.integrity import create_triggers, drop_triggers
+
+# (table, columns whose update re-checks the row, {rule: condition that breaks it}); rule names are
+# matched by apps.core.integrity.
+TRIGGERS = [
+    (
+        "courses_assessmenttolocontribution",
+        "assessment_id, learning_outcome_id",
+        {
+            "assessment_lo_course_mismatch":
+                "(SELECT course_template_id FROM courses_learningoutcome WHERE id = NEW.learning_outcome_id) "
+                "<> (SELECT ci.course_template_id FROM courses_assessment a "
+                "JOIN courses_courseinstance ci ON ci.id = a.course_instance_id WHERE a.id = NEW.assessment_id)",
+        },
+    ),
+    (
+        "courses_lotopocontribution",
+        "learning_outcome_id, program_outcome_id",
+        {
+            "lo_po_department_mismatch":
+                "(SELECT t.department_id FROM courses_learningoutcome lo "
+                "JOIN courses_coursetemplate t ON t.id = lo.course_template_id WHERE lo.id = NEW.learning_outcome_id) "
+                "<> (SELECT department_id FROM core_programoutcome WHERE id = NEW.program_outcome_id)",
+        },
+    ),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_change_event'),
+        ('courses', '0003_assessment_term_keys'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='assessmenttolocontribution',
+            constraint=models.CheckConstraint(check=models.Q(('weight__gte', 1), ('weight__lte', 5)), name='assessment_lo_weight_range'),
+        ),
+        migrations.AddConstraint(
+            model_name='lotopocontribution',
+            constraint=models.CheckConstraint(check=models.Q(('weight__gte', 1), ('weight__lte', 5)), name='lo_po_weight_range'),
+        ),
+        migrations.RunPython(partial(create_triggers, triggers=TRIGGERS), partial(drop_triggers, triggers=TRIGGERS)),
+    ]
@@ -0,0 +1,130 @@
+from django.db import migrations
+
+# One row per outcome, keyed id * 2 for program outcomes and id * 2 + 1 for
+# learning outcomes. See apps.courses.search.
+LO_DEPARTMENT = "(SELECT department_id FROM courses_coursetemplate WHERE id = NEW.course_template_id)"
+
+SQLITE_PO_ROW = (
+    "INSERT INTO courses_outcomesearch (rowid, kind, object_id, department_id, code, description) "
+    "VALUES (NEW.id * 2, 'PO', NEW.id, NEW.department_id, NEW.code, NEW.description);"
+)
+SQLITE_LO_ROW = (
+    "INSERT INTO courses_outcomesearch (rowid, kind, object_id, department_id, code, description) "
+    f"VALUES (NEW.id * 2 + 1, 'LO', NEW.id, {LO_DEPARTMENT}, NEW.code, NEW.description);"
+)
+
+SQLITE = [
+    "CREATE VIRTUAL TABLE courses_outcomesearch USING fts5("
+    "kind UNINDEXED, object_id UNINDEXED, department_id UNINDEXED, code, description, "
+    "tokenize = 'porter unicode61 remove_diacritics 2')",
+    "INSERT INTO courses_outcomesearch (rowid, kind, object_id, department_id, code, description) "
+    "SELECT id * 2, 'PO', id, department_id, code, description FROM core_programoutcome",
+    "INSERT INTO courses_outcomesearch (rowid, kind, object_id, department_id, code, description) "
+    "SELECT lo.id * 2 + 1, 'LO', lo.id, t.department_id, lo.code, lo.description "
+    "FROM courses_learningoutcome lo JOIN courses_coursetemplate t ON t.id = lo.course_template_id",
+    f"CREATE TRIGGER core_programoutcome_search_insert AFTER INSERT ON core_programoutcome "
+    f"BEGIN {SQLITE_PO_ROW} END",
+    f"CREATE TRIGGER core_programoutcome_search_update AFTER UPDATE OF department_id, code, description "
+    f"ON core_programoutcome BEGIN DELETE FROM courses_outcomesearch WHERE rowid = OLD.id * 2; {SQLITE_PO_ROW} END",
+    "CREATE TRIGGER core_programoutcome_search_delete AFTER DELETE ON core_programoutcome "
+    "BEGIN DELETE FROM courses_outcomesearch WHERE rowid = OLD.id * 2; END",
+    f"CREATE TRIGGER courses_learningoutcome_search_insert AFTER INSERT ON courses_learningoutcome "
+    f"BEGIN {SQLITE_LO_ROW} END",
+    f"CREATE TRIGGER courses_learningoutcome_search_update AFTER UPDATE OF course_template_id, code, description "
+    f"ON courses_learningoutcome "
+    f"BEGIN DELETE FROM courses_outcomesearch WHERE rowid = OLD.id * 2 + 1; {SQLITE_LO_ROW} END",
+    "CREATE TRIGGER courses_learningoutcome_search_delete AFTER DELETE ON courses_learningoutcome "
+    "BEGIN DELETE FROM courses_outcomesearch WHERE rowid = OLD.id * 2 + 1; END",
+    "CREATE TRIGGER courses_coursetemplate_search_update AFTER UPDATE OF department_id ON courses_coursetemplate "
+    "BEGIN UPDATE courses_outcomesearch SET department_id = NEW.department_id "
+    "WHERE rowid IN (SELECT id * 2 + 1 FROM courses_learningoutcome WHERE course_template_id = NEW.id); END",
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS core_programoutcome_search_insert",
+    "DROP TRIGGER IF EXISTS core_programoutcome_search_update",
+    "DROP TRIGGER IF EXISTS core_programoutcome_search_delete",
+    "DROP TRIGGER IF EXISTS courses_learningoutcome_search_insert",
+    "DROP TRIGGER IF EXISTS courses_learningoutcome_search_update",
+    "DROP TRIGGER IF EXISTS courses_learningoutcome_search_delete",
+    "DROP TRIGGER IF EXISTS courses_coursetemplate_search_update",
+    "DROP TABLE IF EXISTS courses_outcomesearch",
+]
+
+
+def postgresql_upsert(key, kind, department):
+    return (
+        "INSERT INTO courses_outcomesearch (id, kind, object_id, department_id, code, document) "
+        f"VALUES ({key}, '{kind}', NEW.id, {department}, NEW.code, "
+        "courses_outcomesearch_document(NEW.code, NEW.description)) "
+        "ON CONFLICT (id) DO UPDATE SET department_id = EXCLUDED.department_id, code = EXCLUDED.code, "
+        "document = EXCLUDED.document;"
+    )
+
+
+def postgresql_trigger(table, key, kind, department, columns):
+    return [
+        f"CREATE FUNCTION {table}_search() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+        f"IF TG_OP = 'DELETE' THEN DELETE FROM courses_outcomesearch WHERE id = {key.replace('NEW.', 'OLD.')}; "
+        f"RETURN OLD; END IF; {postgresql_upsert(key, kind, department)} RETURN NEW; END $$",
+        f"CREATE TRIGGER {table}_search AFTER INSERT OR UPDATE OF {columns} OR DELETE ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION {table}_search()",
+    ]
+
+
+POSTGRESQL = [
+    "CREATE TABLE courses_outcomesearch ("
+    "id bigint PRIMARY KEY, kind varchar(2) NOT NULL, object_id bigint NOT NULL, "
+    "department_id bigint NOT NULL, code varchar(10) NOT NULL, document tsvector NOT NULL)",
+    # Codes are matched as written; descriptions with both English and Turkish stemming.
+    "CREATE FUNCTION courses_outcomesearch_document(text, text) RETURNS tsvector LANGUAGE sql IMMUTABLE AS $$ "
+    "SELECT setweight(to_tsvector('simple', $1), 'A') "
+    "|| to_tsvector('english', $2) || to_tsvector('turkish', $2) $$",
+    "INSERT INTO courses_outcomesearch (id, kind, object_id, department_id, code, document) "
+    "SELECT id * 2, 'PO', id, department_id, code, courses_outcomesearch_document(code, description) "
+    "FROM core_programoutcome",
+    "INSERT INTO courses_outcomesearch (id, kind, object_id, department_id, code, document) "
+    "SELECT lo.id * 2 + 1, 'LO', lo.id, t.department_id, lo.code, courses_outcomesearch_document(lo.code, lo.description) "
+    "FROM courses_learningoutcome lo JOIN courses_coursetemplate t ON t.id = lo.course_template_id",
+    "CREATE INDEX courses_outcomesearch_document_idx ON courses_outcomesearch USING GIN (document)",
+    *postgresql_trigger("core_programoutcome", "NEW.id * 2", "PO", "NEW.department_id", "department_id, code, description"),
+    *postgresql_trigger(
+        "courses_learningoutcome", "NEW.id * 2 + 1", "LO", LO_DEPARTMENT, "course_template_id, code, description"
+    ),
+    "CREATE FUNCTION courses_coursetemplate_search() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+    "UPDATE courses_outcomesearch SET department_id = NEW.department_id "
+    "WHERE id IN (SELECT id * 2 + 1 FROM courses_learningoutcome WHERE course_template_id = NEW.id); "
+    "RETURN NEW; END $$",
+    "CREATE TRIGGER courses_coursetemplate_search AFTER UPDATE OF department_id ON courses_coursetemplate "
+    "FOR EACH ROW EXECUTE FUNCTION courses_coursetemplate_search()",
+]
+
+POSTGRESQL_DROP = [
+    "DROP FUNCTION IF EXISTS core_programoutcome_search() CASCADE",
+    "DROP FUNCTION IF EXISTS courses_learningoutcome_search() CASCADE",
+    "DROP FUNCTION IF EXISTS courses_coursetemplate_search() CASCADE",
+    "DROP TABLE IF EXISTS courses_outcomesearch",
+    "DROP FUNCTION IF EXISTS courses_outcomesearch_document(text, text)",
+]
+
+
+def create_index(apps, schema_editor):
+    for sql in {"sqlite": SQLITE, "postgresql": POSTGRESQL}.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql, params=None)
+
+
+def drop_index(apps, schema_editor):
+    for sql in {"sqlite": SQLITE_DROP, "postgresql": POSTGRESQL_DROP}.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_change_event'),
+        ('courses', '0004_contribution_integrity'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
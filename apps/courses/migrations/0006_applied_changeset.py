@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_change_event'),
+        ('courses', '0005_outcome_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppliedChangeset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filename', models.CharField(max_length=255, unique=True)),
+                ('cur_sunit', models.CharField(max_length=20)),
+                ('base_sha256', models.CharField(blank=True, max_length=64)),
+                ('bundle_sha256', models.CharField(max_length=64)),
+                ('applied_at', models.DateTimeField(auto_now_add=True)),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='applied_changesets', to='core.department')),
+            ],
+            options={
+                'ordering': ['applied_at', 'id'],
+            },
+        ),
+    ]
@@ -5,9 +5,19 @@ from django.conf import settings
 from django.utils import timezone
 from django.db.models import Q
 
+from apps.core.integrity import rejections_as_validation_errors
 from apps.core.models import Department
 
 
+class TermKeysQuerySet(models.QuerySet):
+    """``bulk_create`` fills the model's denormalized department/term keys first."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        self.model.fill_term_keys(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 # Create your models here.
 class CourseTemplate(models.Model):
     department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name="course_templates")
@@ -23,7 +33,31 @@ class CourseTemplate(models.Model):
         return f"{self.department.code} - {self.code}: {self.name}"
     def get_full_code(self):
         return f"{self.department.code} - {self.code}"
-    
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Grades follow through apps.grades.signals.
+        Assessment.objects.filter(course_instance__course_template=self).exclude(
+            department_id=self.department_id
+        ).update(department_id=self.department_id)
+
+
+class AppliedChangeset(models.Model):
+    """A scraper changeset applied by ``manage.py import_curriculum_changes``, so it is not applied again."""
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name="applied_changesets")
+    filename = models.CharField(max_length=255, unique=True)
+    cur_sunit = models.CharField(max_length=20)
+    base_sha256 = models.CharField(max_length=64, blank=True)
+    bundle_sha256 = models.CharField(max_length=64)
+    applied_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["applied_at", "id"]
+
+    def __str__(self):
+        return self.filename
+
+
 class CourseInstance(models.Model):
     course_template = models.ForeignKey(CourseTemplate, on_delete=models.CASCADE, related_name="instances")
     semester = models.CharField(max_length=20, help_text="Ex: Fall 2024")
@@ -50,6 +84,17 @@ class CourseInstance(models.Model):
     def get_full_code(self):
         return f"{self.course_template.get_full_code()} - {self.semester} {self.year}"
 
+    def term_keys(self):
+        return {"department_id": self.course_template.department_id, "semester": self.semester, "year": self.year}
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if not adding:
+            # Grades follow through apps.grades.signals.
+            keys = self.term_keys()
+            self.assessments.exclude(**keys).update(**keys)
+
 
 
 
@@ -120,16 +165,64 @@ class Assessment(models.Model):
             validators=[MinValueValidator(0), MaxValueValidator(100)],
             help_text="Weight of this assessment towards the final course grade ex: 20 for 20%",)
 
+    # Copies of the course instance's department and term, so grade and report
+    # queries filter on one indexed column instead of joining up to the
+    # department. Kept in sync by save(), bulk_create(), CourseInstance.save()
+    # and CourseTemplate.save(); manage.py backfill_term_keys repairs drift.
+    department = models.ForeignKey(
+        Department, on_delete=models.CASCADE, related_name="+", editable=False, db_index=False
+    )
+    semester = models.CharField(max_length=20, editable=False)
+    year = models.PositiveSmallIntegerField(editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TermKeysQuerySet.as_manager()
+
     class Meta:
             verbose_name = "Assessment"
             verbose_name_plural = "Assessments"
             ordering = ["course_instance", "assessment_type", "name"]
+            indexes = [
+                models.Index(fields=["department", "year", "semester"], name="assessment_dept_term_idx"),
+            ]
 
     def __str__(self):
             return f"{self.course_instance.get_full_code()} - {self.name}"
 
+    @classmethod
+    def fill_term_keys(cls, assessments):
+        """Set department and term from each assessment's course instance, in at most one query."""
+        keys = {}
+        for a in assessments:
+            instance = a._state.fields_cache.get("course_instance")
+            if instance is not None and "course_template" in instance._state.fields_cache:
+                keys[instance.pk] = instance.term_keys()
+        missing = {a.course_instance_id for a in assessments} - keys.keys()
+        if missing:
+            for pk, department_id, semester, year in CourseInstance.objects.filter(pk__in=missing).values_list(
+                "id", "course_template__department_id", "semester", "year"
+            ).order_by():
+                keys[pk] = {"department_id": department_id, "semester": semester, "year": year}
+        for a in assessments:
+            for name, value in keys.get(a.course_instance_id, {}).items():
+                setattr(a, name, value)
+
+    def term_keys(self):
+        return {
+            "course_instance_id": self.course_instance_id,
+            "department_id": self.department_id,
+            "semester": self.semester,
+            "year": self.year,
+        }
+
+    def save(self, *args, **kwargs):
+        Assessment.fill_term_keys([self])
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "department", "semester", "year"}
+        super().save(*args, **kwargs)
+
 
 class AssessmentToLOContribution(models.Model):
     assessment = models.ForeignKey(
@@ -154,15 +247,22 @@ class AssessmentToLOContribution(models.Model):
         verbose_name = "Assessment to Learning Outcome Contribution"
         verbose_name_plural = "Assessment to Learning Outcome Contributions"
         unique_together = ("assessment", "learning_outcome")
+        constraints = [
+            models.CheckConstraint(check=Q(weight__gte=1, weight__lte=5), name="assessment_lo_weight_range"),
+        ]
 
     def __str__(self):
         return f"{self.assessment} -> {self.learning_outcome.code} (Weight: {self.weight})"
     def clean(self):
-        if self.learning_outcome.course_template != self.assessment.course_instance.course_template:
+        # Form-level copy of the assessment_lo_course_mismatch trigger (apps.core.integrity).
+        if self.learning_outcome.course_template_id != self.assessment.course_instance.course_template_id:
             raise ValidationError(
                 "Learning Outcome must belong to the same course as the Assessment."
             )
-        
+    def save(self, *args, **kwargs):
+        with rejections_as_validation_errors(kwargs.get("using")):
+            super().save(*args, **kwargs)
+
 
 class LOtoPOContribution(models.Model):
     learning_outcome = models.ForeignKey(
@@ -197,14 +297,21 @@ class LOtoPOContribution(models.Model):
         verbose_name = "Learning Outcome to Program Outcome Contribution"
         verbose_name_plural = "Learning Outcome to Program Outcome Contributions"
         unique_together = ("learning_outcome", "program_outcome")
+        constraints = [
+            models.CheckConstraint(check=Q(weight__gte=1, weight__lte=5), name="lo_po_weight_range"),
+        ]
 
     def __str__(self):
         return f"{self.learning_outcome.code} -> {self.program_outcome.code} (Weight: {self.weight})"
     def clean(self):
-        if self.learning_outcome.course_template.department != self.program_outcome.department:
+        # Form-level copy of the lo_po_department_mismatch trigger (apps.core.integrity).
+        if self.learning_outcome.course_template.department_id != self.program_outcome.department_id:
             raise ValidationError(
                 "Program Outcome must belong to the same department as the Learning Outcome."
             )
+    def save(self, *args, **kwargs):
+        with rejections_as_validation_errors(kwargs.get("using")):
+            super().save(*args, **kwargs)
     def approve(self, user):
         if not user.is_department_head():
             raise PermissionError("Only department heads can approve LO-PO contributions.")
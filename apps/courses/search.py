@@ -0,0 +1,89 @@
+"""
+Ranked full-text search over learning and program outcomes.
+
+The ``courses_outcomesearch`` table (migration 0005_outcome_search) holds
+one row per outcome. On SQLite it is an FTS5 table; on PostgreSQL it has a
+tsvector column with a GIN index. Database triggers update it on every
+write to outcomes, including bulk and raw SQL writes, and when a course
+template changes department.
+
+PostgreSQL stems descriptions with both the english and turkish snowball
+configurations. SQLite only has the Porter (English) stemmer, with
+diacritics folded. On both backends every query word is also matched as a
+prefix. That covers most Turkish suffixes on SQLite too: "tasarım" finds
+"tasarımı" and "tasarımlar".
+
+Other databases have no index. There every query word must appear in the
+code or description, case-insensitively, and all hits score the same.
+"""
+import re
+
+from django.db import connections, router
+from django.db.models import Q
+
+from apps.core.models import ProgramOutcome
+from apps.courses.models import LearningOutcome
+
+WORD = re.compile(r"\w+")
+
+
+def search_outcomes(text, department_id=None, kind=None, limit=20):
+    """``[(kind, object_id, score)]`` for outcomes matching every word of ``text``, best first.
+
+    ``kind`` is "LO" or "PO". A higher score means a better match.
+    """
+    words = WORD.findall(text)
+    if not words:
+        return []
+    connection = connections[router.db_for_read(LearningOutcome)]
+    filters, filter_params = "", []
+    if department_id is not None:
+        filters += " AND department_id = %s"
+        filter_params.append(department_id)
+    if kind is not None:
+        filters += " AND kind = %s"
+        filter_params.append(kind)
+
+    if connection.vendor == "postgresql":
+        query = " & ".join(f"{word}:*" for word in words)
+        sql = (
+            "SELECT kind, object_id, ts_rank(document, q.query) AS score FROM courses_outcomesearch, "
+            "(SELECT to_tsquery('english', %s) || to_tsquery('turkish', %s) AS query) q "
+            f"WHERE document @@ q.query{filters} ORDER BY score DESC, id LIMIT %s"
+        )
+        params = [query, query, *filter_params, limit]
+    elif connection.vendor == "sqlite":
+        # bm25() is lower for better matches; a code hit counts five times a description hit.
+        sql = (
+            "SELECT kind, object_id, -bm25(courses_outcomesearch, 0, 0, 0, 5.0, 1.0) AS score "
+            f"FROM courses_outcomesearch WHERE courses_outcomesearch MATCH %s{filters} "
+            "ORDER BY score DESC, rowid LIMIT %s"
+        )
+        params = [" ".join(f'"{word}"*' for word in words), *filter_params, limit]
+    else:
+        return _unindexed_search(words, department_id, kind, limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(kind, int(object_id), float(score)) for kind, object_id, score in cursor.fetchall()]
+
+
+def matching_ids(text, kind):
+    """Ids of the outcomes of one kind whose code or description matches ``text``."""
+    return [object_id for _, object_id, _ in search_outcomes(text, kind=kind, limit=1000)]
+
+
+def _unindexed_search(words, department_id, kind, limit):
+    hits = []
+    for outcome_kind, queryset, department in (
+        ("LO", LearningOutcome.objects, "course_template__department"),
+        ("PO", ProgramOutcome.objects, "department"),
+    ):
+        if kind not in (None, outcome_kind):
+            continue
+        if department_id is not None:
+            queryset = queryset.filter(**{department: department_id})
+        for word in words:
+            queryset = queryset.filter(Q(code__icontains=word) | Q(description__icontains=word))
+        hits += [(outcome_kind, pk, 1.0) for pk in queryset.order_by("pk").values_list("pk", flat=True)[:limit]]
+    return hits[:limit]
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from apps.core.changelog import record_change
+from apps.core.models import ChangeEvent
+from apps.courses.enrollment import EnrollmentIndex
+from apps.courses.models import Assessment, AssessmentToLOContribution, CourseInstance, LOtoPOContribution
+
+
+@receiver(m2m_changed, sender=CourseInstance.students.through)
+def invalidate_enrollment_on_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and reverse:
+        # pk_set is None for clears; remember which courses the student is leaving.
+        instance._cleared_course_ids = list(instance.enrolled_courses.values_list("id", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        EnrollmentIndex.invalidate([instance.pk])
+    elif action == "post_clear":
+        EnrollmentIndex.invalidate(getattr(instance, "_cleared_course_ids", []))
+    else:
+        EnrollmentIndex.invalidate(pk_set or [])
+
+
+@receiver(post_delete, sender=CourseInstance)
+def invalidate_enrollment_on_course_delete(sender, instance, **kwargs):
+    EnrollmentIndex.invalidate([instance.pk])
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_enrollment_on_student_delete(sender, instance, **kwargs):
+    # Deleting a user removes its enrollment rows without sending m2m_changed.
+    if instance.is_student():
+        EnrollmentIndex.invalidate(list(instance.enrolled_courses.values_list("id", flat=True)))
+
+
+@receiver(post_save, sender=Assessment)
+@receiver(post_save, sender=AssessmentToLOContribution)
+@receiver(post_save, sender=LOtoPOContribution)
+def log_course_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_change(instance)
+
+
+@receiver(post_delete, sender=Assessment)
+@receiver(post_delete, sender=AssessmentToLOContribution)
+@receiver(post_delete, sender=LOtoPOContribution)
+def log_course_delete(sender, instance, **kwargs):
+    record_change(instance, ChangeEvent.Action.DELETE)
@@ -1,3 +1,325 @@
-from django.test import TestCase
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache, caches
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connections, transaction
+from django.test import TestCase, override_settings
+
+from apps.core.db_routers import analytics_reads
+from apps.core.models import ChangeEvent, Department, ProgramOutcome
+from apps.core.testing import build_fixture_dataset
+from apps.courses.cloning import clone_course_instances
+from apps.courses.curriculum import apply_changeset
+from apps.courses.enrollment import EnrollmentIndex
+from apps.courses.search import search_outcomes
+from apps.courses.models import (
+    Assessment,
+    AssessmentToLOContribution,
+    CourseInstance,
+    CourseTemplate,
+    LearningOutcome,
+    LOtoPOContribution,
+)
+from apps.users.models import User
+
+
+class EnrollmentIndexTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixture_dataset(students=5, templates=1, terms=(("Fall", 2024),))
+
+    def setUp(self):
+        cache.clear()
+        self.course = self.data["course_instances"][0]
+        self.students = self.data["students"]
+
+    def test_membership_and_count_are_served_from_cache(self):
+        EnrollmentIndex.student_ids(self.course.id)
+        with self.assertNumQueries(0):
+            self.assertTrue(EnrollmentIndex.is_enrolled(self.course.id, self.students[0].id))
+            self.assertFalse(EnrollmentIndex.is_enrolled(self.course.id, self.data["head"].id))
+            self.assertEqual(EnrollmentIndex.count(self.course.id), 5)
+
+    def test_intersection(self):
+        ids = [self.students[1].id, self.data["head"].id, self.students[3].id]
+        self.assertEqual(
+            list(EnrollmentIndex.intersection(self.course.id, ids)),
+            sorted([self.students[1].id, self.students[3].id]),
+        )
+
+    def test_m2m_changes_invalidate(self):
+        self.assertEqual(EnrollmentIndex.count(self.course.id), 5)
+        self.course.students.remove(self.students[0])
+        self.assertEqual(EnrollmentIndex.count(self.course.id), 4)
+        self.students[1].enrolled_courses.clear()
+        self.assertEqual(EnrollmentIndex.count(self.course.id), 3)
+        self.students[0].enrolled_courses.add(self.course)
+        self.assertTrue(EnrollmentIndex.is_enrolled(self.course.id, self.students[0].id))
+
+    def test_invalidation_is_visible_to_other_cache_clients(self):
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": location},
+        }):
+            # Two workers, each with its own client of the shared cache.
+            worker_a, worker_b = caches.create_connection("default"), caches.create_connection("default")
+            with mock.patch("apps.courses.enrollment.cache", worker_b):
+                self.assertEqual(EnrollmentIndex.count(self.course.id), 5)
+            with mock.patch("apps.courses.enrollment.cache", worker_a):
+                self.course.students.remove(self.students[0])
+            with mock.patch("apps.courses.enrollment.cache", worker_b), self.assertNumQueries(1):
+                self.assertEqual(EnrollmentIndex.count(self.course.id), 4)
+
+    @override_settings(DATABASE_ROUTERS=["apps.core.db_routers.ReplicaRouter"], READ_REPLICA_DATABASES=["replica1"])
+    def test_rosters_are_filled_from_the_primary(self):
+        # The test transaction would otherwise pin every read to the primary.
+        with mock.patch("apps.core.db_routers._pinned_to_primary", return_value=False), analytics_reads():
+            with self.assertNumQueries(2, using="default"):
+                self.assertEqual(EnrollmentIndex.count(self.course.id), 5)
+                self.assertEqual(len(EnrollmentIndex.many([self.course.id, 0])[self.course.id]), 5)
+
+    def test_many_fetches_misses_in_one_query(self):
+        with self.assertNumQueries(1):
+            result = EnrollmentIndex.many([self.course.id])
+        self.assertEqual(len(result[self.course.id]), 5)
+        with self.assertNumQueries(0):
+            EnrollmentIndex.many([self.course.id])
+
+
+class CourseInstanceCloneTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixture_dataset(students=3, templates=3, terms=(("Fall", 2024),))
+
+    def test_clones_assessments_and_lo_weights(self):
+        sources = self.data["course_instances"]
+        with self.assertNumQueries(13):
+            result = clone_course_instances([c.id for c in sources], "Fall", 2025)
+
+        self.assertEqual(result["skipped"], [])
+        self.assertEqual(result["assessments"], 6)
+        for source in sources:
+            clone = CourseInstance.objects.get(pk=result["created"][source.id])
+            self.assertEqual((clone.semester, clone.year), ("Fall", 2025))
+            self.assertEqual(clone.course_template_id, source.course_template_id)
+            self.assertEqual(clone.instructor_id, source.instructor_id)
+            self.assertFalse(clone.students.exists())
+            self.assertEqual(
+                sorted(AssessmentToLOContribution.objects.filter(assessment__course_instance=clone).values_list(
+                    "assessment__name", "learning_outcome_id", "weight")),
+                sorted(AssessmentToLOContribution.objects.filter(assessment__course_instance=source).values_list(
+                    "assessment__name", "learning_outcome_id", "weight")),
+            )
+        self.assertEqual(
+            ChangeEvent.objects.filter(
+                model="courses.assessmenttolocontribution", data__assessment__in=list(
+                    Assessment.objects.filter(course_instance_id__in=result["created"].values()).values_list(
+                        "id", flat=True)
+                ),
+            ).count(),
+            result["contributions"],
+        )
+
+    def test_skips_templates_already_in_target_term(self):
+        sources = self.data["course_instances"]
+        clone_course_instances([sources[0].id], "Spring", 2025, copy_instructor=False)
+        result = clone_course_instances([c.id for c in sources], "Spring", 2025)
+        self.assertEqual(result["skipped"], [sources[0].id])
+        self.assertEqual(len(result["created"]), 2)
+        self.assertIsNone(CourseInstance.objects.get(
+            course_template=sources[0].course_template, semester="Spring", year=2025
+        ).instructor_id)
+
+    def test_rejects_ambiguous_assessment_names(self):
+        source = self.data["course_instances"][0]
+        Assessment.objects.create(course_instance=source, name="Midterm", assessment_type="MIDTERM", weight=10)
+        with self.assertRaises(ValidationError):
+            clone_course_instances([source.id], "Fall", 2025)
+        self.assertFalse(CourseInstance.objects.filter(year=2025).exists())
+
+    def test_management_command(self):
+        call_command(
+            "clone_course_instances", from_semester="Fall", from_year=2024, departments=["CSE"],
+            to_semester="Spring", to_year=2025, stdout=open("/dev/null", "w"),
+        )
+        self.assertEqual(CourseInstance.objects.filter(semester="Spring", year=2025).count(), 3)
+
+
+class CurriculumChangesetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixture_dataset(students=1, templates=2, terms=(("Fall", 2024),))
+        cls.department = cls.data["department"]
+        CourseTemplate.objects.create(department=cls.department, code="CSE900", name="Unused", credit=3)
+
+    def changeset(self, added=(), removed=(), changed=(), matrix=()):
+        return {
+            "curSunit": "6166",
+            "about": {},
+            "courses": {"added": list(added), "removed": list(removed), "changed": list(changed)},
+            "matrix": list(matrix),
+        }
+
+    def test_applies_only_the_deltas(self):
+        changes = self.changeset(
+            added=[{"term": "1", "code": "CSE201", "name": "Data Structures", "ects": "7,5", "status": "Z"}],
+            removed=[{"code": "CSE101"}, {"code": "CSE900"}],
+            changed=[{"code": "CSE102", "fields": {"name": ["Course 2", "Algorithms"], "term": ["1", "2"]}}],
+            matrix=[{"course_code": "CSE102", "cells": {"P1": ["3", "4"]}}],
+        )
+        # Deleting a template also collects its instances and LOs for the cascade.
+        with self.assertNumQueries(10):
+            result = apply_changeset(self.department, changes)
+        self.assertEqual(
+            {k: result[k] for k in ("created", "updated", "deleted", "kept", "missing", "matrix_cells")},
+            {"created": 1, "updated": 1, "deleted": 1, "kept": ["CSE101"], "missing": [], "matrix_cells": 1},
+        )
+        templates = dict(self.department.course_templates.values_list("code", "name"))
+        self.assertEqual(templates, {"CSE101": "Course 1", "CSE102": "Algorithms", "CSE201": "Data Structures"})
+        self.assertEqual(CourseTemplate.objects.get(code="CSE201").credit, 8)
+
+        # Re-applying the same changeset changes nothing.
+        result = apply_changeset(self.department, changes)
+        self.assertEqual((result["created"], result["updated"], result["deleted"]), (0, 0, 0))
+
+    def test_templates_with_learning_outcomes_are_kept(self):
+        CourseInstance.objects.filter(course_template__code="CSE102").delete()
+        result = apply_changeset(self.department, self.changeset(removed=[{"code": "CSE102"}]))
+        self.assertEqual((result["deleted"], result["kept"]), (0, ["CSE102"]))
+        self.assertTrue(LearningOutcome.objects.filter(course_template__code="CSE102").exists())
+
+    def test_command_skips_applied_changesets(self):
+        first = {**self.changeset(removed=[{"code": "CSE900"}]), "base_sha256": None, "bundle_sha256": "a"}
+        second = {
+            **self.changeset(added=[{"term": "1", "code": "CSE201", "name": "B", "ects": "6", "status": "Z"}]),
+            "base_sha256": "a",
+            "bundle_sha256": "b",
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            Path(directory, "6166_20260101T000000.json").write_text(json.dumps(first))
+            command = ("import_curriculum_changes", directory)
+            call_command(*command, department="CSE", stdout=open("/dev/null", "w"))
+            self.assertFalse(CourseTemplate.objects.filter(code="CSE900").exists())
+
+            # A re-created template is not deleted again by a later run over the same directory.
+            CourseTemplate.objects.create(department=self.department, code="CSE900", name="Unused", credit=3)
+            Path(directory, "6166_20260102T000000.json").write_text(json.dumps(second))
+            call_command(*command, department="CSE", stdout=open("/dev/null", "w"))
+            self.assertTrue(CourseTemplate.objects.filter(code="CSE900").exists())
+            self.assertTrue(CourseTemplate.objects.filter(code="CSE201").exists())
+
+            Path(directory, "6166_20260103T000000.json").write_text(json.dumps({**second, "base_sha256": "x"}))
+            with self.assertRaisesMessage(CommandError, "base_sha256 mismatch"):
+                call_command(*command, department="CSE", stdout=open("/dev/null", "w"))
+
+    def test_invalid_ects_rolls_back(self):
+        changes = self.changeset(added=[
+            {"term": "1", "code": "CSE301", "name": "A", "ects": "6", "status": "Z"},
+            {"term": "1", "code": "CSE302", "name": "B", "ects": "?", "status": "Z"},
+        ])
+        with self.assertRaises(ValidationError):
+            apply_changeset(self.department, changes)
+        self.assertFalse(CourseTemplate.objects.filter(code="CSE301").exists())
+
+
+class ContributionIntegrityTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixture_dataset(students=1, templates=2, terms=(("Fall", 2024),))
+        first, second = cls.data["course_instances"]
+        cls.assessment = first.assessments.first()
+        cls.other_lo = second.course_template.learning_outcomes.first()
+        other = Department.objects.create(name="Electrical Engineering", code="EE")
+        cls.other_po = ProgramOutcome.objects.create(department=other, code="1", description="Other")
+
+    def test_learning_outcome_of_another_course_is_rejected(self):
+        with self.assertRaisesMessage(ValidationError, "same course"):
+            AssessmentToLOContribution.objects.create(
+                assessment=self.assessment, learning_outcome=self.other_lo, weight=1
+            )
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            AssessmentToLOContribution.objects.bulk_create([
+                AssessmentToLOContribution(assessment=self.assessment, learning_outcome=self.other_lo, weight=1)
+            ])
+
+    def test_program_outcome_of_another_department_is_rejected(self):
+        lo = LearningOutcome.objects.first()
+        with self.assertRaisesMessage(ValidationError, "same department"):
+            LOtoPOContribution.objects.create(learning_outcome=lo, program_outcome=self.other_po, weight=1)
+        contribution = LOtoPOContribution.objects.first()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            LOtoPOContribution.objects.filter(pk=contribution.pk).update(program_outcome=self.other_po)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            LOtoPOContribution.objects.filter(pk=contribution.pk).update(weight=6)
+
+
+class OutcomeSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixture_dataset(students=1, templates=2, terms=(("Fall", 2024),))
+        cls.template = CourseTemplate.objects.get(code="CSE101")
+        cls.design = LearningOutcome.objects.create(
+            course_template=cls.template, code="9", description="Designing algorithms for sorting problems."
+        )
+        cls.turkish = LearningOutcome.objects.create(
+            course_template=cls.template, code="10", description="Yazılım tasarımı ve algoritma analizi."
+        )
+        cls.po = ProgramOutcome.objects.create(
+            department=cls.data["department"], code="9", description="Design a system to meet desired needs."
+        )
+
+    def ids(self, text, **kwargs):
+        return [(kind, pk) for kind, pk, _ in search_outcomes(text, **kwargs)]
+
+    def test_stemming_prefixes_and_filters(self):
+        self.assertEqual(set(self.ids("designs")), {("LO", self.design.pk), ("PO", self.po.pk)})
+        self.assertEqual(self.ids("tasarım"), [("LO", self.turkish.pk)])
+        self.assertEqual(self.ids("Algoritma analizi"), [("LO", self.turkish.pk)])
+        self.assertEqual(self.ids("design", kind="PO"), [("PO", self.po.pk)])
+        self.assertEqual(self.ids("design", department_id=self.data["department"].pk + 1), [])
+        self.assertEqual(self.ids("  -- "), [])
+
+    def test_ranking(self):
+        dense = LearningOutcome.objects.create(
+            course_template=self.template, code="11", description="Sorting and sorting networks."
+        )
+        hits = search_outcomes("sorting")
+        self.assertEqual([pk for _, pk, _ in hits], [dense.pk, self.design.pk])
+        self.assertGreater(hits[0][2], hits[1][2])
+
+    def test_other_databases_filter_without_the_index(self):
+        admin = User.objects.create_superuser("admin@example.com", "password")
+        self.client.force_login(admin)
+        with mock.patch.object(connections["default"], "vendor", "mysql"):
+            self.assertEqual(self.ids("DESIGN sort"), [("LO", self.design.pk)])
+            self.assertEqual(self.ids("design", kind="PO"), [("PO", self.po.pk)])
+            self.assertEqual(self.ids("design", department_id=self.data["department"].pk + 1), [])
+            response = self.client.get("/admin/courses/learningoutcome/", {"q": "sorting"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["cl"].result_list), [self.design])
+
+    def test_index_follows_writes(self):
+        self.design.description = "Proving graph theorems."
+        self.design.save()
+        self.assertEqual(self.ids("sorting"), [])
+        self.assertEqual(self.ids("theorem"), [("LO", self.design.pk)])
+
+        LearningOutcome.objects.filter(pk=self.design.pk).update(description="Compiler construction.")
+        self.assertEqual(self.ids("compilers"), [("LO", self.design.pk)])
+
+        other = Department.objects.create(name="Electrical Engineering", code="EE")
+        self.template.department = other
+        self.template.save()
+        self.assertEqual(self.ids("compiler", department_id=other.pk), [("LO", self.design.pk)])
+
+        self.po.delete()
+        self.assertEqual(self.ids("desired"), [])
@@ -1,3 +1,17 @@
 from django.contrib import admin
 
-# Register your models here.
+from apps.core.paginators import EstimatedCountPaginator
+from .models import AssessmentGrade
+
+
+@admin.register(AssessmentGrade)
+class AssessmentGradeAdmin(admin.ModelAdmin):
+    list_display = ("student", "assessment", "score", "entered_by", "updated_at")
+    list_select_related = ("student", "assessment__course_instance__course_template__department", "entered_by")
+    list_filter = ("department", "year", "semester", "assessment__assessment_type")
+    search_fields = ("student__email", "student__student_id", "assessment__name")
+    autocomplete_fields = ("student", "assessment", "entered_by")
+    # Newest first. The model ordering groups by student id, which means nothing to someone browsing.
+    ordering = ("-id",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class GradesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.grades'
+
+    def ready(self):
+        from apps.grades import signals  # noqa: F401
+
+        if settings.METRICS_ENABLED:
+            from apps.core.metrics import observe_calculator
+            from apps.grades.profiling import add_hook
+
+            add_hook(observe_calculator)
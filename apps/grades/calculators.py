@@ -2,12 +2,30 @@ from collections import defaultdict
 from decimal import Decimal
 from django.db.models import Avg,Count,Q,Prefetch
 from apps.courses.models import (LearningOutcome,AssessmentToLOContribution,LOtoPOContribution,CourseInstance,CourseTemplate)
+from apps.core.db_routers import analytics_reads
+from apps.courses.enrollment import EnrollmentIndex
 from apps.grades.models import AssessmentGrade
+from apps.grades.profiling import profiled, stage
+
+
+def weighted_mean(pairs):
+    """Weighted mean of (value, weight) pairs. Missing values are skipped; None when nothing contributes."""
+    total = 0
+    weight_total = 0
+    for value, weight in pairs:
+        if value is not None:
+            total += value * weight
+            weight_total += weight
+    if weight_total > 0:
+        return total / weight_total
+    return None
 
 
 class AchievementCalculator:
 
     @staticmethod
+    @analytics_reads()
+    @profiled("calculate_all_po_achievement_for_course")
     def calculate_all_po_achievement_for_course(student, course_instance: CourseInstance):
         course_template = course_instance.course_template
         program_outcomes = course_template.department.program_outcomes.filter(is_active=True)
@@ -28,227 +46,266 @@ class AchievementCalculator:
         )
         student_grades = AssessmentGrade.objects.filter(
             student=student,
-            assessment__course_instance=course_instance,
+            course_instance=course_instance,
         )
-        grades_map = {grade.assessment_id: grade.score for grade in student_grades}
-        assessment_lo_map = defaultdict(list)
-        lo_po_map = defaultdict(list)
-        lo_cache = {}
-        for lo in los_with_po_conts:
-            for cont in lo.relevant_assessment_conts:
-                assessment_lo_map[lo.id].append((cont.assessment_id, cont.weight))
-            for cont in lo.approved_po_conts:
-                lo_po_map[cont.program_outcome_id].append((lo.id, cont.weight))
-        results = []
-        for po in program_outcomes:
-            po_ach_total = Decimal(0)
-            po_weight_total  = Decimal(0)
-            for lo_id, po_weight in lo_po_map.get(po.id, []):
-                if lo_id not in lo_cache:
-                    lo_score_total = Decimal(0)
-                    lo_weight_total = Decimal(0)
-                    for assessment_id, assess_lo_weight in assessment_lo_map.get(lo_id, []):
-                        score = grades_map.get(assessment_id)
-                        if score is not None:
-                            lo_score_total += score * assess_lo_weight
-                            lo_weight_total += assess_lo_weight
-                    if lo_weight_total > 0:
-                        lo_cache[lo_id] = lo_score_total / lo_weight_total
-                    else:
-                        lo_cache[lo_id] = None
-                lo_achievement = lo_cache.get(lo_id)
-                if lo_achievement is not None:
-                    po_ach_total += lo_achievement * po_weight
-                    po_weight_total += po_weight
-
-            if po_weight_total > 0:
-                po_achievement = po_ach_total / po_weight_total
-                results.append({
-                    'program_outcome': po,
-                    'achievement': round(float(po_achievement), 2)
-                })
-        return results
+        with stage("query") as s:
+            student_grades = list(student_grades)
+            los_with_po_conts = list(los_with_po_conts)
+            program_outcomes = list(program_outcomes)
+            s.rows = len(student_grades) + len(los_with_po_conts) + len(program_outcomes)
+
+        with stage("graph"):
+            grades_map = {grade.assessment_id: grade.score for grade in student_grades}
+            assessment_lo_map = defaultdict(list)
+            lo_po_map = defaultdict(list)
+            for lo in los_with_po_conts:
+                for cont in lo.relevant_assessment_conts:
+                    assessment_lo_map[lo.id].append((cont.assessment_id, cont.weight))
+                for cont in lo.approved_po_conts:
+                    lo_po_map[cont.program_outcome_id].append((lo.id, cont.weight))
+
+        with stage("compute") as s:
+            lo_cache = {}
+            achievements = []
+            for po in program_outcomes:
+                po_ach_total = Decimal(0)
+                po_weight_total  = Decimal(0)
+                for lo_id, po_weight in lo_po_map.get(po.id, []):
+                    if lo_id not in lo_cache:
+                        lo_cache[lo_id] = weighted_mean(
+                            (grades_map.get(assessment_id), assess_lo_weight)
+                            for assessment_id, assess_lo_weight in assessment_lo_map.get(lo_id, [])
+                        )
+                    lo_achievement = lo_cache.get(lo_id)
+                    if lo_achievement is not None:
+                        po_ach_total += lo_achievement * po_weight
+                        po_weight_total += po_weight
+
+                if po_weight_total > 0:
+                    achievements.append((po, po_ach_total / po_weight_total))
+            s.rows = len(achievements)
+
+        with stage("format"):
+            return [
+                {'program_outcome': po, 'achievement': round(float(po_achievement), 2)}
+                for po, po_achievement in achievements
+            ]
     
     @staticmethod
+    def _student_po_tree(student, program_outcome_ids=None):
+        """
+        Derivation tree behind the student's overall PO scores, from one pass over their active courses.
+
+        ``[(po, achievement, [(course, achievement, [(lo, po_weight, achievement, [(contribution, score)])])])]``
+        with unrounded achievements. Each (course, LO) achievement is computed once and shared by every PO
+        it contributes to. Courses and POs without any graded contribution are left out.
+        """
+        with stage("query") as s:
+            program_outcomes = student.department.program_outcomes.filter(is_active=True)
+            if program_outcome_ids is not None:
+                program_outcomes = program_outcomes.filter(id__in=program_outcome_ids)
+            program_outcomes = list(program_outcomes)
+            enrolled_courses = list(
+                student.get_active_enrolled_courses().filter(is_active=True).select_related('course_template__department')
+            )
+            grades_map = dict(AssessmentGrade.objects.filter(
+                student=student, course_instance__in=enrolled_courses
+            ).values_list('assessment_id', 'score'))
+            los = LearningOutcome.objects.filter(
+                course_template__in={c.course_template_id for c in enrolled_courses}
+            ).prefetch_related(
+                Prefetch(
+                    'po_contributions',
+                    queryset=LOtoPOContribution.objects.filter(is_approved=True, program_outcome__in=program_outcomes),
+                    to_attr='approved_po_conts'
+                ),
+                Prefetch(
+                    'assessment_contributions',
+                    queryset=AssessmentToLOContribution.objects.filter(
+                        assessment__course_instance__in=enrolled_courses
+                    ).select_related('assessment'),
+                    to_attr='relevant_assessment_conts'
+                ),
+            )
+            los = list(los)
+            s.rows = len(program_outcomes) + len(enrolled_courses) + len(grades_map) + len(los)
+
+        with stage("graph"):
+            lo_by_id = {}
+            assessment_lo_map = defaultdict(list)
+            lo_po_map = defaultdict(list)
+            for lo in los:
+                lo_by_id[lo.id] = lo
+                for cont in lo.relevant_assessment_conts:
+                    assessment_lo_map[(cont.assessment.course_instance_id, lo.id)].append(cont)
+                for cont in lo.approved_po_conts:
+                    lo_po_map[(cont.program_outcome_id, lo.course_template_id)].append((lo.id, cont.weight))
+
+        with stage("compute") as s:
+            lo_cache = {}
+
+            def lo_node(course_id, lo_id):
+                if (course_id, lo_id) not in lo_cache:
+                    scored = [
+                        (cont, grades_map.get(cont.assessment_id))
+                        for cont in assessment_lo_map.get((course_id, lo_id), [])
+                    ]
+                    lo_cache[(course_id, lo_id)] = (
+                        weighted_mean((score, cont.weight) for cont, score in scored), scored
+                    )
+                return lo_cache[(course_id, lo_id)]
+
+            tree = []
+            for po in program_outcomes:
+                course_nodes = []
+                for course in enrolled_courses:
+                    lo_nodes = []
+                    for lo_id, po_weight in lo_po_map.get((po.id, course.course_template_id), []):
+                        achievement, scored = lo_node(course.id, lo_id)
+                        lo_nodes.append((lo_by_id[lo_id], po_weight, achievement, scored))
+                    course_achievement = weighted_mean((a, w) for _, w, a, _ in lo_nodes)
+                    if course_achievement is not None:
+                        course_nodes.append((course, course_achievement, lo_nodes))
+                overall = weighted_mean(
+                    (achievement, Decimal(course.course_template.credit)) for course, achievement, _ in course_nodes
+                )
+                if overall is not None:
+                    tree.append((po, overall, course_nodes))
+            s.rows = len(tree)
+        return tree
+
+    @staticmethod
+    @analytics_reads()
+    @profiled("calculate_student_overall_po_achievements")
     def calculate_student_overall_po_achievements(student):
         if not student.department:
             return []
-        program_outcomes = student.department.program_outcomes.filter(is_active=True)
-        enrolled_courses = student.get_active_enrolled_courses().filter(is_active=True).select_related('course_template__department')
-        course_templates = [c.course_template for c in enrolled_courses]
-        
-        student_grades = AssessmentGrade.objects.filter(
-            student=student,
-            assessment__course_instance__in=enrolled_courses)
-        los_with_conts = LearningOutcome.objects.filter(
-            course_template__in=course_templates
-        ).prefetch_related(
-            Prefetch(
-                'po_contributions',
-                queryset=LOtoPOContribution.objects.filter(is_approved=True, program_outcome__in=program_outcomes),
-                to_attr='approved_po_conts'
-            ),
-            'assessment_contributions__assessment'
-        )
-        grades_map = {grade.assessment_id: grade.score for grade in student_grades}
-        
-        course_credit_map = {ct.id: Decimal(ct.credit) for ct in course_templates}
-        
-        assessment_lo_map = defaultdict(list)
-        lo_po_map = defaultdict(list)
-        lo_cache = defaultdict(dict)
-        for lo in los_with_conts:
-            for cont in lo.assessment_contributions.all():
-                assessment_lo_map[lo.id].append(
-                    (cont.assessment_id, cont.weight, cont.assessment.course_instance_id)
-                )
-            for cont in lo.approved_po_conts:
-                lo_po_map[cont.program_outcome_id].append(
-                    (lo.id, cont.weight, lo.course_template_id)
-                )
-        results = []
-        for po in program_outcomes:
-            total_weighted_achievement = Decimal(0)
-            total_credit_weight = Decimal(0)
-            contributing_courses_list = []
-            for course in enrolled_courses:
-                course_template_id = course.course_template_id
-                course_id = course.id
-                
-                total_weighted_po_ach_for_course = Decimal(0)
-                total_po_weight_for_course = Decimal(0)
-
-                
-                relevant_los = [
-                    (lo_id, weight) for lo_id, weight, ct_id in lo_po_map.get(po.id, [])
-                    if ct_id == course_template_id
-                ]
-
-                for lo_id, lo_po_weight in relevant_los:
-                    
-                    
-                    if lo_id not in lo_cache[course_id]:
-                        total_weighted_lo_score = Decimal(0)
-                        total_lo_weight = Decimal(0)
-                        
-                        
-                        relevant_assessments = [
-                            (assess_id, weight) for assess_id, weight, c_id in assessment_lo_map.get(lo_id, [])
-                            if c_id == course_id
-                        ]
-
-                        for assessment_id, assess_lo_weight in relevant_assessments:
-                            score = grades_map.get(assessment_id) 
-                            if score is not None:
-                                total_weighted_lo_score += score * assess_lo_weight
-                                total_lo_weight += assess_lo_weight
-                        
-                        if total_lo_weight > 0:
-                            lo_cache[course_id][lo_id] = total_weighted_lo_score / total_lo_weight
-                        else:
-                            lo_cache[course_id][lo_id] = None
-                    
-                   
-                    
-                    lo_achievement = lo_cache[course_id].get(lo_id)
-                    
-                    if lo_achievement is not None:
-                        total_weighted_po_ach_for_course += lo_achievement * lo_po_weight
-                        total_po_weight_for_course += lo_po_weight
-
-                
-                
-                if total_po_weight_for_course > 0:
-                    course_po_achievement = total_weighted_po_ach_for_course / total_po_weight_for_course
-                    credit = course_credit_map.get(course_template_id, Decimal(0))
-                    
-                    
-                    total_weighted_achievement += course_po_achievement * credit
-                    total_credit_weight += credit
-                    
-                    contributing_courses_list.append({
-                        'course': course,
-                        'achievement': round(float(course_po_achievement), 2)
-                    })
-
-            
-            
-            if total_credit_weight > 0:
-                overall_achievement = total_weighted_achievement / total_credit_weight
-                results.append({
+        tree = AchievementCalculator._student_po_tree(student)
+        with stage("format"):
+            return [
+                {
                     'program_outcome': po,
                     'overall_achievement': round(float(overall_achievement), 2),
-                    'contributing_courses': contributing_courses_list,
-                    'course_count': len(contributing_courses_list)
-                })
-                
-        return results
-    
+                    'contributing_courses': [
+                        {'course': course, 'achievement': round(float(achievement), 2)}
+                        for course, achievement, _ in course_nodes
+                    ],
+                    'course_count': len(course_nodes)
+                }
+                for po, overall_achievement, course_nodes in tree
+            ]
+
     @staticmethod
+    @analytics_reads()
+    @profiled("explain_student_po_achievements")
+    def explain_student_po_achievements(student, program_outcome_ids=None):
+        """
+        Derivation tree PO -> courses -> LOs -> assessments behind the student's overall PO scores.
+
+        The same tree ``calculate_student_overall_po_achievements`` reduces to its flat result.
+        """
+        if not student.department:
+            return []
+        tree = AchievementCalculator._student_po_tree(student, program_outcome_ids)
+        with stage("format"):
+            return [
+                {
+                    'program_outcome_id': po.id,
+                    'code': po.code,
+                    'description': po.description,
+                    'achievement': round(float(overall), 2),
+                    'courses': [
+                        {
+                            'course_instance_id': course.id,
+                            'course': course.get_full_code(),
+                            'credit': course.course_template.credit,
+                            'achievement': round(float(course_achievement), 2),
+                            'learning_outcomes': [
+                                {
+                                    'learning_outcome_id': lo.id,
+                                    'code': lo.code,
+                                    'po_weight': str(po_weight),
+                                    'achievement': None if achievement is None else round(float(achievement), 2),
+                                    'assessments': [
+                                        {
+                                            'assessment_id': cont.assessment_id,
+                                            'name': cont.assessment.name,
+                                            'assessment_type': cont.assessment.assessment_type,
+                                            'max_score': str(cont.assessment.max_score),
+                                            'lo_weight': str(cont.weight),
+                                            'score': None if score is None else str(score),
+                                        }
+                                        for cont, score in scored
+                                    ],
+                                }
+                                for lo, po_weight, achievement, scored in lo_nodes
+                            ],
+                        }
+                        for course, course_achievement, lo_nodes in course_nodes
+                    ],
+                }
+                for po, overall, course_nodes in tree
+            ]
+
+    @staticmethod
+    @analytics_reads()
+    @profiled("get_course_lo_statistics")
     def get_course_lo_statistics(course_instance: CourseInstance):
-        students = course_instance.students.all()
-        student_ids = [s.id for s in students]
-        learning_outcomes = LearningOutcome.objects.filter(
-            course_template=course_instance.course_template
-        ).prefetch_related(
-            Prefetch(
-                'assessment_contributions',
-                queryset=AssessmentToLOContribution.objects.filter(assessment__course_instance=course_instance),
-                to_attr='relevant_assessment_conts'
-            )
-        )
+        with stage("query") as s:
+            student_ids = EnrollmentIndex.student_ids(course_instance.id)
+            learning_outcomes = list(LearningOutcome.objects.filter(
+                course_template=course_instance.course_template
+            ).prefetch_related(
+                Prefetch(
+                    'assessment_contributions',
+                    queryset=AssessmentToLOContribution.objects.filter(assessment__course_instance=course_instance),
+                    to_attr='relevant_assessment_conts'
+                )
+            ))
 
-        all_grades = AssessmentGrade.objects.filter(
-            assessment__course_instance=course_instance,
-            student_id__in=student_ids
-        )
+            all_grades = list(AssessmentGrade.objects.filter(
+                course_instance=course_instance,
+                student_id__in=list(student_ids)
+            ))
+            s.rows = len(learning_outcomes) + len(all_grades)
+
+        with stage("graph"):
+            grades_map = {(grade.student_id, grade.assessment_id): grade.score for grade in all_grades}
+
+            assessment_lo_map = defaultdict(list)
+            for lo in learning_outcomes:
+                for cont in lo.relevant_assessment_conts:
+                    assessment_lo_map[lo.id].append((cont.assessment_id, cont.weight))
+
+        with stage("compute") as s:
+            achievements = []
+            for lo in learning_outcomes:
+                achievements_float = []
+                assessments_for_this_lo = assessment_lo_map.get(lo.id, [])
+
+                if not assessments_for_this_lo:
+                    continue
+
+                for student_id in student_ids:
+                    lo_achievement = weighted_mean(
+                        (grades_map.get((student_id, assessment_id)), assess_lo_weight)
+                        for assessment_id, assess_lo_weight in assessments_for_this_lo
+                    )
+                    if lo_achievement is not None:
+                        achievements_float.append(float(lo_achievement))
+
+                if achievements_float:
+                    achievements.append((lo, achievements_float))
+            s.rows = sum(len(values) for _, values in achievements)
 
-      
-        
-        
-        grades_map = {(grade.student_id, grade.assessment_id): grade.score for grade in all_grades}
-        
-        
-        assessment_lo_map = defaultdict(list)
-        for lo in learning_outcomes:
-            for cont in lo.relevant_assessment_conts:
-                assessment_lo_map[lo.id].append((cont.assessment_id, cont.weight))
-
-        
-        results = []
-        for lo in learning_outcomes:
-            
-            achievements_float = [] 
-            assessments_for_this_lo = assessment_lo_map.get(lo.id, [])
-            
-            if not assessments_for_this_lo:
-                continue 
-
-            for student in students:
-                total_weighted_lo_score = Decimal(0)
-                total_lo_weight = Decimal(0)
-                
-                for assessment_id, assess_lo_weight in assessments_for_this_lo:
-                    score = grades_map.get((student.id, assessment_id)) 
-                    
-                    if score is not None:
-                        total_weighted_lo_score += score * assess_lo_weight
-                        total_lo_weight += assess_lo_weight
-                
-                if total_lo_weight > 0:
-                    lo_achievement = total_weighted_lo_score / total_lo_weight
-                    achievements_float.append(float(lo_achievement))
-            
-            # Done LO stats
-            
-            if achievements_float:
-                results.append({
+        with stage("format"):
+            return [
+                {
                     'learning_outcome': lo,
-                    'average': round(sum(achievements_float) / len(achievements_float), 2),
-                    'min': round(min(achievements_float), 2),
-                    'max': round(max(achievements_float), 2),
-                    'student_count': len(achievements_float)
-                })
-        
-        return results
-        
\ No newline at end of file
+                    'average': round(sum(values) / len(values), 2),
+                    'min': round(min(values), 2),
+                    'max': round(max(values), 2),
+                    'student_count': len(values)
+                }
+                for lo, values in achievements
+            ]
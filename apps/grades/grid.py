@@ -0,0 +1,167 @@
+"""
+Spreadsheet-style grade entry for one course instance.
+
+``GradeGrid.read`` returns the student × assessment matrix with a version per
+cell (the grade's ``updated_at`` in microseconds). ``GradeGrid.apply`` takes a
+batch of changed cells, each carrying the version the client last saw, and
+writes all of them in one transaction or none if any cell changed since.
+Input is expected to be validated already (see ``GradeGridUpdateSerializer``).
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from apps.core.changelog import record_changes
+from apps.core.integrity import rejections_as_validation_errors
+from apps.courses.enrollment import EnrollmentIndex
+from apps.grades.models import AssessmentGrade
+from apps.users.models import User
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def cell_version(updated_at):
+    return (updated_at - EPOCH) // timedelta(microseconds=1)
+
+
+class GradeConflict(Exception):
+    """Cells that changed since the client read them, with their current score and version."""
+
+    def __init__(self, cells):
+        super().__init__(f"{len(cells)} grade(s) were changed by someone else.")
+        self.cells = cells
+
+
+class GradeGrid:
+
+    def __init__(self, course_instance):
+        self.course_instance = course_instance
+
+    def read(self):
+        assessments = list(
+            self.course_instance.assessments.order_by("id").values("id", "name", "assessment_type", "max_score")
+        )
+        students = list(
+            User.objects.filter(id__in=list(EnrollmentIndex.student_ids(self.course_instance.id)))
+            .order_by("last_name", "first_name", "id")
+            .values("id", "student_id", "first_name", "last_name")
+        )
+        row = {s["id"]: i for i, s in enumerate(students)}
+        column = {a["id"]: j for j, a in enumerate(assessments)}
+        scores = [[None] * len(assessments) for _ in students]
+        versions = [[None] * len(assessments) for _ in students]
+        for student_id, assessment_id, score, updated_at in AssessmentGrade.objects.filter(
+            course_instance=self.course_instance
+        ).values_list("student_id", "assessment_id", "score", "updated_at").order_by():
+            if student_id in row:
+                i, j = row[student_id], column[assessment_id]
+                scores[i][j] = str(score)
+                versions[i][j] = cell_version(updated_at)
+
+        for a in assessments:
+            a["max_score"] = str(a["max_score"])
+        return {
+            "course_instance_id": self.course_instance.id,
+            "assessments": assessments,
+            "students": students,
+            "scores": scores,
+            "versions": versions,
+        }
+
+    @staticmethod
+    def _conflicts(changes, grades):
+        conflicts = []
+        for change in changes:
+            grade = grades.get((change["student_id"], change["assessment_id"]))
+            current = cell_version(grade.updated_at) if grade else None
+            if change["version"] != current:
+                conflicts.append({
+                    "student_id": change["student_id"],
+                    "assessment_id": change["assessment_id"],
+                    "score": str(grade.score) if grade else None,
+                    "version": current,
+                })
+        return conflicts
+
+    @transaction.atomic
+    def apply(self, changes, entered_by):
+        """
+        Write ``changes`` ({student_id, assessment_id, score, version}; score None clears the cell).
+
+        Raises ``GradeConflict`` without writing anything if any cell's version is stale,
+        including an empty cell that another request fills in concurrently, and
+        ``ValidationError`` if a grade breaks a database integrity rule.
+        """
+        existing = {
+            (g.student_id, g.assessment_id): g
+            for g in AssessmentGrade.objects.select_for_update().filter(
+                assessment_id__in={c["assessment_id"] for c in changes},
+                student_id__in={c["student_id"] for c in changes},
+            ).order_by()
+        }
+
+        conflicts = self._conflicts(changes, existing)
+        if conflicts:
+            raise GradeConflict(conflicts)
+
+        now = timezone.now()
+        created, updated, deleted = [], [], []
+        for change in changes:
+            grade = existing.get((change["student_id"], change["assessment_id"]))
+            if change["score"] is None:
+                if grade:
+                    deleted.append(grade)
+            elif grade is None:
+                created.append(AssessmentGrade(
+                    student_id=change["student_id"],
+                    assessment_id=change["assessment_id"],
+                    score=change["score"],
+                    entered_by_id=entered_by.pk,
+                ))
+            else:
+                grade.score = change["score"]
+                grade.entered_by_id = entered_by.pk
+                grade.updated_at = now
+                updated.append(grade)
+
+        if created:
+            try:
+                with rejections_as_validation_errors():
+                    AssessmentGrade.objects.bulk_create(created)
+            except IntegrityError as exc:
+                # Not an integrity rule, so a uniqueness clash: another request
+                # filled one of these cells after the select_for_update() above.
+                filled = {
+                    (g.student_id, g.assessment_id): g
+                    for g in AssessmentGrade.objects.filter(
+                        assessment_id__in={g.assessment_id for g in created},
+                        student_id__in={g.student_id for g in created},
+                    ).order_by()
+                }
+                new_cells = {(g.student_id, g.assessment_id) for g in created}
+                conflicts = self._conflicts(
+                    [c for c in changes if (c["student_id"], c["assessment_id"]) in new_cells], filled
+                )
+                if not conflicts:
+                    raise
+                raise GradeConflict(conflicts) from exc
+        with rejections_as_validation_errors(savepoint=False):
+            AssessmentGrade.objects.bulk_update(updated, ["score", "entered_by", "updated_at"])
+        if deleted:
+            # Deletes go through the post_delete signal, which records their change events.
+            AssessmentGrade.objects.filter(pk__in=[g.pk for g in deleted]).delete()
+        record_changes(created + updated)
+
+        return [
+            {
+                "student_id": g.student_id,
+                "assessment_id": g.assessment_id,
+                "score": str(g.score),
+                "version": cell_version(g.updated_at),
+            }
+            for g in created + updated
+        ] + [
+            {"student_id": g.student_id, "assessment_id": g.assessment_id, "score": None, "version": None}
+            for g in deleted
+        ]
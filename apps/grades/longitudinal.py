@@ -0,0 +1,229 @@
+"""
+PO achievement over time, bucketed by (semester, year).
+
+Each term is computed like ``calculate_student_overall_po_achievements`` but
+restricted to that term's course instances (active or not). Term results are
+cached per student together with a fingerprint of the grades, contribution
+weights, course credits and active program outcomes they were computed from, so
+a request after a grade change in the latest term only recomputes that term.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+
+from apps.core.db_routers import analytics_reads
+from apps.core.metrics import CACHE_REQUESTS
+from apps.courses.models import AssessmentToLOContribution, CourseInstance, LOtoPOContribution
+from apps.grades.calculators import weighted_mean
+from apps.grades.models import AssessmentGrade
+
+CACHE_KEY = "po-trend:v1:{student_id}:{year}:{semester}"
+CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+SEASON_ORDER = {
+    "winter": 0, "spring": 1, "bahar": 1, "summer": 2, "yaz": 2, "fall": 3, "autumn": 3, "güz": 3, "guz": 3,
+}
+
+
+def term_sort_key(term):
+    """Chronological key for a (semester, year) pair, e.g. ("Spring", 2024) < ("Fall", 2024)."""
+    semester, year = term
+    words = str(semester).lower().split()
+    season = next((SEASON_ORDER[w] for w in words if w in SEASON_ORDER), len(SEASON_ORDER))
+    return (year, season, semester)
+
+
+class POTrendEngine:
+
+    def __init__(self, department):
+        self.department = department
+        self.program_outcomes = list(department.program_outcomes.filter(is_active=True))
+
+    def _fingerprints(self, student_ids):
+        """{(student_id, (semester, year)): fingerprint} for every term a student has grades in."""
+        lo_po = LOtoPOContribution.objects.filter(program_outcome__department=self.department).aggregate(
+            n=Count("id"), last=Max("updated_at")
+        )
+        assessment_lo = {
+            (row["assessment__semester"], row["assessment__year"]): (row["n"], row["last"])
+            for row in AssessmentToLOContribution.objects.filter(
+                assessment__department=self.department
+            ).values("assessment__semester", "assessment__year").annotate(n=Count("id"), last=Max("updated_at")).order_by()
+        }
+        credits = defaultdict(list)
+        for semester, year, template_id, credit in CourseInstance.objects.filter(
+            course_template__department=self.department
+        ).values_list("semester", "year", "course_template_id", "course_template__credit").order_by("id"):
+            credits[(semester, year)].append((template_id, credit))
+        # Deactivating or reactivating a PO changes which POs are computed.
+        active_pos = tuple(sorted(po.id for po in self.program_outcomes))
+        grades = AssessmentGrade.objects.filter(
+            student_id__in=student_ids, department=self.department
+        ).values("student_id", "semester", "year").annotate(
+            n=Count("id"), last=Max("updated_at"), assessments=Max("assessment__updated_at")
+        ).order_by()
+
+        fingerprints = {}
+        for row in grades:
+            term = (row["semester"], row["year"])
+            fingerprints[(row["student_id"], term)] = repr((
+                row["n"], row["last"], row["assessments"], assessment_lo.get(term), lo_po["n"], lo_po["last"],
+                credits.get(term), active_pos,
+            ))
+        return fingerprints
+
+    def _compute(self, student_ids, terms):
+        """{(student_id, term): {po_id: (achievement, course_count)}} for the given students and terms."""
+        po_ids = {po.id for po in self.program_outcomes}
+        term_filter = Q()
+        for semester, year in terms:
+            term_filter |= Q(semester=semester, year=year)
+        courses = {
+            row[0]: row[1:]
+            for row in CourseInstance.objects.filter(
+                term_filter, course_template__department=self.department
+            ).values_list("id", "course_template_id", "course_template__credit", "semester", "year")
+        }
+
+        grades_map = defaultdict(dict)
+        for student_id, assessment_id, course_id, score in AssessmentGrade.objects.filter(
+            student_id__in=student_ids, course_instance_id__in=courses
+        ).values_list("student_id", "assessment_id", "course_instance_id", "score").iterator(
+            chunk_size=10000
+        ):
+            grades_map[(student_id, course_id)][assessment_id] = score
+
+        assessment_lo_map = defaultdict(list)
+        for assessment_id, lo_id, course_id, weight in AssessmentToLOContribution.objects.filter(
+            assessment__course_instance_id__in=courses
+        ).values_list("assessment_id", "learning_outcome_id", "assessment__course_instance_id", "weight"):
+            assessment_lo_map[(course_id, lo_id)].append((assessment_id, weight))
+
+        lo_po_map = defaultdict(lambda: defaultdict(list))
+        for lo_id, po_id, template_id, weight in LOtoPOContribution.objects.filter(
+            is_approved=True,
+            program_outcome_id__in=po_ids,
+            learning_outcome__course_template_id__in={c[0] for c in courses.values()},
+        ).values_list("learning_outcome_id", "program_outcome_id", "learning_outcome__course_template_id",
+                      "weight"):
+            lo_po_map[template_id][po_id].append((lo_id, weight))
+
+        per_term = defaultdict(lambda: defaultdict(list))
+        for (student_id, course_id), grades in grades_map.items():
+            template_id, credit, semester, year = courses[course_id]
+            lo_cache = {}
+            for po_id, lo_conts in lo_po_map[template_id].items():
+                for lo_id, _ in lo_conts:
+                    if lo_id not in lo_cache:
+                        lo_cache[lo_id] = weighted_mean(
+                            (grades.get(assessment_id), weight)
+                            for assessment_id, weight in assessment_lo_map.get((course_id, lo_id), [])
+                        )
+                course_po = weighted_mean((lo_cache[lo_id], weight) for lo_id, weight in lo_conts)
+                if course_po is not None:
+                    per_term[(student_id, (semester, year))][po_id].append((course_po, Decimal(credit)))
+
+        results = {}
+        for student_id in student_ids:
+            for term in terms:
+                results[(student_id, term)] = {
+                    po_id: (round(float(weighted_mean(pairs)), 2), len(pairs))
+                    for po_id, pairs in per_term.get((student_id, term), {}).items()
+                }
+        return results
+
+    @analytics_reads()
+    def term_results(self, student_ids):
+        """
+        {(student_id, term): {po_id: (achievement, course_count)}}, reusing cached terms.
+
+        Only (student, term) pairs whose fingerprint changed are recomputed, in one batch.
+        """
+        student_ids = list(student_ids)
+        fingerprints = self._fingerprints(student_ids)
+        keys = {
+            CACHE_KEY.format(student_id=s, year=t[1], semester="-".join(str(t[0]).split())): (s, t)
+            for s, t in fingerprints
+        }
+        cached = cache.get_many(keys)
+
+        results = {}
+        stale = defaultdict(set)
+        for key, pair in keys.items():
+            entry = cached.get(key)
+            if entry is not None and entry[0] == fingerprints[pair]:
+                results[pair] = entry[1]
+            else:
+                stale[pair[1]].add(pair[0])
+
+        misses = sum(len(ids) for ids in stale.values())
+        CACHE_REQUESTS.inc(len(keys) - misses, cache="po_trend", result="hit")
+        CACHE_REQUESTS.inc(misses, cache="po_trend", result="miss")
+
+        if stale:
+            stale_students = set().union(*stale.values())
+            computed = self._compute(stale_students, list(stale))
+            to_cache = {}
+            for key, pair in keys.items():
+                if pair in computed and pair[0] in stale.get(pair[1], ()):
+                    results[pair] = computed[pair]
+                    to_cache[key] = (fingerprints[pair], computed[pair])
+            cache.set_many(to_cache, CACHE_TIMEOUT)
+        return results
+
+    def _po_rows(self, values, formatter):
+        return [formatter(po, values[po.id]) for po in self.program_outcomes if po.id in values]
+
+    def student_series(self, student):
+        results = self.term_results([student.id])
+        terms = sorted((t for _, t in results), key=term_sort_key)
+        return {
+            "student_id": student.id,
+            "department_id": self.department.id,
+            "terms": [
+                {
+                    "semester": semester,
+                    "year": year,
+                    "program_outcomes": self._po_rows(
+                        results[(student.id, (semester, year))],
+                        lambda po, v: {
+                            "program_outcome_id": po.id,
+                            "code": po.code,
+                            "achievement": v[0],
+                            "course_count": v[1],
+                        },
+                    ),
+                }
+                for semester, year in terms
+            ],
+        }
+
+    def cohort_series(self, student_ids):
+        student_ids = list(student_ids)
+        results = self.term_results(student_ids)
+        by_term = defaultdict(lambda: defaultdict(list))
+        for (student_id, term), values in results.items():
+            for po_id, (achievement, _) in values.items():
+                by_term[term][po_id].append(achievement)
+        return {
+            "department_id": self.department.id,
+            "cohort_size": len(student_ids),
+            "terms": [
+                {
+                    "semester": semester,
+                    "year": year,
+                    "program_outcomes": self._po_rows(
+                        by_term[(semester, year)],
+                        lambda po, v: {
+                            "program_outcome_id": po.id,
+                            "code": po.code,
+                            "average": round(sum(v) / len(v), 2),
+                            "student_count": len(v),
+                        },
+                    ),
+                }
+                for semester, year in sorted(by_term, key=term_sort_key)
+            ],
+        }
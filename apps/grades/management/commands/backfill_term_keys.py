@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+
+from apps.courses.models import Assessment, CourseInstance
+from apps.grades.models import AssessmentGrade
+
+
+def stale_assessments():
+    return Assessment.objects.exclude(
+        department_id=F("course_instance__course_template__department_id"),
+        semester=F("course_instance__semester"),
+        year=F("course_instance__year"),
+    )
+
+
+def stale_grades():
+    return AssessmentGrade.objects.exclude(
+        course_instance_id=F("assessment__course_instance_id"),
+        department_id=F("assessment__department_id"),
+        semester=F("assessment__semester"),
+        year=F("assessment__year"),
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Repair the denormalized course instance, department and term columns on assessments and grades "
+        "after writes that bypassed save() (queryset update(), raw SQL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--check", action="store_true", help="Only count stale rows; exit 1 if there are any")
+
+    def handle(self, *args, **options):
+        if options["check"]:
+            assessments, grades = stale_assessments().count(), stale_grades().count()
+            self.stdout.write(f"stale assessments: {assessments}, stale grades: {grades}")
+            if assessments or grades:
+                raise SystemExit(1)
+            return
+
+        instance = CourseInstance.objects.filter(pk=OuterRef("course_instance_id"))
+        assessments = self._backfill(stale_assessments, Assessment, options["batch_size"], {
+            "department_id": Subquery(instance.values("course_template__department_id")[:1]),
+            "semester": Subquery(instance.values("semester")[:1]),
+            "year": Subquery(instance.values("year")[:1]),
+        })
+        # Grades copy from assessments, so they go second.
+        assessment = Assessment.objects.filter(pk=OuterRef("assessment_id"))
+        grades = self._backfill(stale_grades, AssessmentGrade, options["batch_size"], {
+            name: Subquery(assessment.values(name)[:1])
+            for name in ("course_instance_id", "department_id", "semester", "year")
+        })
+        self.stdout.write(self.style.SUCCESS(f"Updated {assessments} assessments and {grades} grades."))
+
+    def _backfill(self, stale, model, batch_size, values):
+        """Fix ``stale()`` rows in batches of short transactions; returns the number updated."""
+        updated = 0
+        while True:
+            ids = list(stale().order_by("pk").values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                return updated
+            with transaction.atomic():
+                updated += model.objects.filter(pk__in=ids).update(**values)
@@ -0,0 +1,52 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.metrics import record_job
+from apps.core.models import Department
+from apps.grades.recompute import DEFAULT_PARTITION_SIZE, recompute_achievements
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every student's overall PO achievements into POAchievement, "
+        "partitioned by department and student batch across a process pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--department",
+            action="append",
+            dest="departments",
+            help="Department code to recompute (repeatable). Defaults to all departments.",
+        )
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--partition-size", type=int, default=DEFAULT_PARTITION_SIZE, help="Students per partition")
+
+    def handle(self, *args, **options):
+        department_ids = None
+        if options["departments"]:
+            department_ids = list(Department.objects.filter(
+                code__in=options["departments"]
+            ).values_list("id", flat=True))
+            if len(department_ids) != len(set(options["departments"])):
+                raise CommandError("Unknown department code.")
+
+        def progress(department_id, students, rows):
+            if options["verbosity"] > 1:
+                self.stdout.write(f"department {department_id}: {students} students, {rows} rows")
+
+        start = time.perf_counter()
+        partitions, rows = recompute_achievements(
+            department_ids,
+            workers=options["workers"],
+            partition_size=options["partition_size"],
+            progress=progress,
+        )
+        elapsed = time.perf_counter() - start
+        record_job("recompute_achievements", rows, elapsed)
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomputed {partitions} partitions ({rows} rows) with {options['workers']} worker(s) "
+            f"in {elapsed:.1f}s."
+        ))
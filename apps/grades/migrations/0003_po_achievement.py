@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_change_event'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('grades', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='POAchievement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('achievement', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('course_count', models.PositiveSmallIntegerField()),
+                ('computed_at', models.DateTimeField()),
+                ('program_outcome', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_achievements', to='core.programoutcome')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='po_achievements', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'PO Achievement',
+                'verbose_name_plural': 'PO Achievements',
+                'unique_together': {('student', 'program_outcome')},
+            },
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:23
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def backfill(apps, schema_editor):
+    AssessmentGrade = apps.get_model("grades", "AssessmentGrade")
+    Assessment = apps.get_model("courses", "Assessment")
+    assessment = Assessment.objects.filter(pk=OuterRef("assessment_id"))
+    AssessmentGrade.objects.update(
+        course_instance_id=Subquery(assessment.values("course_instance_id")[:1]),
+        department_id=Subquery(assessment.values("department_id")[:1]),
+        semester=Subquery(assessment.values("semester")[:1]),
+        year=Subquery(assessment.values("year")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_change_event'),
+        ('courses', '0003_assessment_term_keys'),
+        ('grades', '0003_po_achievement'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='assessmentgrade',
+            options={'ordering': ['student', '-year', '-semester', 'assessment'], 'verbose_name': 'Assessment Grade', 'verbose_name_plural': 'Assessment Grades'},
+        ),
+        migrations.AddField(
+            model_name='assessmentgrade',
+            name='course_instance',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.courseinstance'),
+        ),
+        migrations.AddField(
+            model_name='assessmentgrade',
+            name='department',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.department'),
+        ),
+        migrations.AddField(
+            model_name='assessmentgrade',
+            name='semester',
+            field=models.CharField(editable=False, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='assessmentgrade',
+            name='year',
+            field=models.PositiveSmallIntegerField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='assessmentgrade',
+            name='course_instance',
+            field=models.ForeignKey(db_index=False, editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.courseinstance'),
+        ),
+        migrations.AlterField(
+            model_name='assessmentgrade',
+            name='department',
+            field=models.ForeignKey(db_index=False, editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.department'),
+        ),
+        migrations.AlterField(
+            model_name='assessmentgrade',
+            name='semester',
+            field=models.CharField(editable=False, max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='assessmentgrade',
+            name='year',
+            field=models.PositiveSmallIntegerField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='assessmentgrade',
+            index=models.Index(fields=['student', 'course_instance', 'assessment', 'score'], name='grade_student_course_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assessmentgrade',
+            index=models.Index(fields=['course_instance', 'student', 'assessment', 'score'], name='grade_course_student_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assessmentgrade',
+            index=models.Index(fields=['department', 'year', 'semester'], name='grade_dept_term_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:28
+
+from functools import partial
+
+from django.db import migrations, models
+
+from apps.core.integrity import create_triggers, drop_triggers
+
+# (table, columns whose update re-checks the row, {rule: condition that breaks it}); rule names are
+# matched by apps.core.integrity.
+TRIGGERS = [
+    (
+        "grades_assessmentgrade",
+        "score, assessment_id, student_id",
+        {
+            "grade_score_above_max_score":
+                "NEW.score > (SELECT max_score FROM courses_assessment WHERE id = NEW.assessment_id)",
+            "grade_student_not_enrolled":
+                "NOT EXISTS (SELECT 1 FROM courses_assessment a "
+                "JOIN courses_courseinstance_students s ON s.courseinstance_id = a.course_instance_id "
+                "WHERE a.id = NEW.assessment_id AND s.user_id = NEW.student_id)",
+        },
+    ),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_contribution_integrity'),
+        ('grades', '0004_grade_term_keys'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='assessmentgrade',
+            constraint=models.CheckConstraint(check=models.Q(('score__gte', 0), ('score__lte', 100)), name='grade_score_range'),
+        ),
+        migrations.RunPython(partial(create_triggers, triggers=TRIGGERS), partial(drop_triggers, triggers=TRIGGERS)),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:42
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grades', '0005_grade_integrity'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='assessmentgrade',
+            options={'ordering': ['student_id', '-year', '-semester', 'assessment_id'], 'verbose_name': 'Assessment Grade', 'verbose_name_plural': 'Assessment Grades'},
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:04
+
+from functools import partial
+from importlib import import_module
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from apps.core.integrity import create_triggers, drop_triggers
+
+# The grade trigger from 0005, re-created with the role rules that limit_choices_to states for
+# the two user columns.
+PREVIOUS = import_module("apps.grades.migrations.0005_grade_integrity").TRIGGERS
+(TABLE, COLUMNS, RULES), = PREVIOUS
+TRIGGERS = [
+    (
+        TABLE,
+        COLUMNS + ", entered_by_id",
+        {
+            **RULES,
+            "grade_student_not_student":
+                "NOT EXISTS (SELECT 1 FROM users_user WHERE id = NEW.student_id AND role = 'STUDENT')",
+            "grade_entered_by_not_staff":
+                "NEW.entered_by_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM users_user WHERE id = NEW.entered_by_id "
+                "AND (role IN ('INSTRUCTOR', 'DEPARTMENT_HEAD') OR is_superuser))",
+        },
+    ),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('grades', '0006_grade_ordering_by_ids'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assessmentgrade',
+            name='entered_by',
+            field=models.ForeignKey(blank=True, limit_choices_to=models.Q(('role', 'INSTRUCTOR'), ('role', 'DEPARTMENT_HEAD'), ('is_superuser', True), _connector='OR'), null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='entered_assessment_grades', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(partial(drop_triggers, triggers=PREVIOUS), partial(create_triggers, triggers=PREVIOUS)),
+        migrations.RunPython(partial(create_triggers, triggers=TRIGGERS), partial(drop_triggers, triggers=TRIGGERS)),
+    ]
@@ -4,6 +4,10 @@ from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db.models import Q
 
+from apps.core.integrity import rejections_as_validation_errors
+from apps.courses.enrollment import EnrollmentIndex
+from apps.courses.models import Assessment, TermKeysQuerySet
+
 # Create your models here.
 
 class AssessmentGrade(models.Model):
@@ -26,33 +30,109 @@ class AssessmentGrade(models.Model):
         null=True,
         blank=True,
         related_name="entered_assessment_grades",
-        limit_choices_to=Q(role="INSTRUCTOR") | Q(role="DEPARTMENT_HEAD"),
+        # Matches the grade_entered_by_not_staff trigger (apps.core.integrity).
+        limit_choices_to=Q(role="INSTRUCTOR") | Q(role="DEPARTMENT_HEAD") | Q(is_superuser=True),
+    )
+    # Copies of the assessment's course instance, department and term (see
+    # Assessment.department), kept in sync by save(), bulk_create() and
+    # apps.grades.signals.
+    course_instance = models.ForeignKey(
+        "courses.CourseInstance", on_delete=models.CASCADE, related_name="+", editable=False, db_index=False
     )
+    department = models.ForeignKey(
+        "core.Department", on_delete=models.CASCADE, related_name="+", editable=False, db_index=False
+    )
+    semester = models.CharField(max_length=20, editable=False)
+    year = models.PositiveSmallIntegerField(editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TermKeysQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Assessment Grade"
         verbose_name_plural = "Assessment Grades"
         unique_together = ("student", "assessment")
-        ordering = ["student__last_name", "student__first_name", "-assessment__course_instance__year", "-assessment__course_instance__semester", "assessment"]
+        # Column names, not the relations: ordering by "assessment" would join up to the course
+        # instance for Assessment's own ordering on every default-ordered grade query.
+        # This groups grades by student id, not by name. No list shown to users relies on it; the
+        # admin orders grades newest first.
+        ordering = ["student_id", "-year", "-semester", "assessment_id"]
         indexes = [
             models.Index(fields=["student", "assessment"]),
             models.Index(fields=["assessment", "score"]),
             models.Index(fields=["assessment","student"]),
+            # Cover the calculators' per-student and per-course reads.
+            models.Index(fields=["student", "course_instance", "assessment", "score"], name="grade_student_course_idx"),
+            models.Index(fields=["course_instance", "student", "assessment", "score"], name="grade_course_student_idx"),
+            models.Index(fields=["department", "year", "semester"], name="grade_dept_term_idx"),
             ]
+        # The score <= max_score and enrollment rules are triggers (see apps.core.integrity).
+        constraints = [
+            models.CheckConstraint(check=Q(score__gte=0, score__lte=100), name="grade_score_range"),
+        ]
     def __str__(self):
         return f"{self.student} - {self.assessment.name} - {self.score}/100"
     def clean(self):
+        # Form-level copy of the database rules in apps.core.integrity.
         super().clean()
         if self.score > self.assessment.max_score:
             raise ValidationError(
                 f"Score cannot exceed the maximum score of {self.assessment.max_score} for this assessment."
             )
-        if not self.assessment.course_instance.students.filter(id=self.student.id).exists():
+        if not EnrollmentIndex.is_enrolled(self.assessment.course_instance_id, self.student_id):
             raise ValidationError(
                 "The student is not enrolled in the course for this assessment."
             )
+    @classmethod
+    def fill_term_keys(cls, grades):
+        """Copy course instance, department and term from each grade's assessment, in at most one query."""
+        keys = {
+            g.assessment_id: g.assessment.term_keys() for g in grades if "assessment" in g._state.fields_cache
+        }
+        missing = {g.assessment_id for g in grades} - keys.keys()
+        if missing:
+            for pk, course_instance_id, department_id, semester, year in Assessment.objects.filter(
+                pk__in=missing
+            ).values_list(
+                "id", "course_instance_id", "department_id", "semester", "year"
+            ).order_by():
+                keys[pk] = {
+                    "course_instance_id": course_instance_id,
+                    "department_id": department_id,
+                    "semester": semester,
+                    "year": year,
+                }
+        for g in grades:
+            for name, value in keys.get(g.assessment_id, {}).items():
+                setattr(g, name, value)
+
     def save(self, *args, **kwargs):
-        self.full_clean()
-        super().save(*args, **kwargs)
\ No newline at end of file
+        AssessmentGrade.fill_term_keys([self])
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "course_instance", "department", "semester", "year"}
+        # The database checks the score, the enrollment, both users' roles and uniqueness,
+        # so no full_clean() here.
+        with rejections_as_validation_errors(kwargs.get("using")):
+            super().save(*args, **kwargs)
+
+class POAchievement(models.Model):
+    """A student's overall PO achievement as last written by ``manage.py recompute_achievements``."""
+    student = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="po_achievements",
+    )
+    program_outcome = models.ForeignKey(
+        "core.ProgramOutcome", on_delete=models.CASCADE, related_name="student_achievements")
+    achievement = models.DecimalField(max_digits=5, decimal_places=2)
+    course_count = models.PositiveSmallIntegerField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "PO Achievement"
+        verbose_name_plural = "PO Achievements"
+        unique_together = ("student", "program_outcome")
+
+    def __str__(self):
+        return f"{self.student_id} - PO {self.program_outcome_id}: {self.achievement}"
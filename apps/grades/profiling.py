@@ -0,0 +1,119 @@
+"""
+Stage timings and opt-in profiling for ``AchievementCalculator``.
+
+A calculator method decorated with ``profiled`` runs inside a trace, and
+marks its stages with ``stage(name)``: "query" (fetching rows, including
+prefetches), "graph" (building the lookup maps such as ``grades_map``),
+"compute" (the weighted means) and "format" (building the result dicts).
+A stage may set ``rows`` on the object it yields. When the call returns, the
+trace is passed to every hook registered with ``add_hook``; with no hooks
+and profiling off, nothing is recorded.
+
+Setting ``CALCULATOR_PROFILE_THRESHOLD_MS`` runs calls under cProfile and
+dumps the profile of each call slower than the threshold to
+``CALCULATOR_PROFILE_DIR`` (open with ``python -m pstats`` or snakeviz).
+"""
+import cProfile
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+
+from django.conf import settings
+
+_trace = ContextVar("calculator_trace", default=None)
+_hooks = []
+
+
+class Stage:
+    __slots__ = ("name", "seconds", "rows")
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.rows = None
+
+
+class Trace:
+    """Stages of one calculator call, in the order they ran."""
+
+    def __init__(self, name):
+        self.name = name
+        self.stages = []
+        self.seconds = 0.0
+        self.profile_path = None
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "ms": round(self.seconds * 1000, 3),
+            "stages": [
+                {"name": s.name, "ms": round(s.seconds * 1000, 3), "rows": s.rows} for s in self.stages
+            ],
+        }
+
+
+def add_hook(hook):
+    """Call ``hook(trace)`` after every profiled calculator call."""
+    _hooks.append(hook)
+
+
+def remove_hook(hook):
+    _hooks.remove(hook)
+
+
+@contextmanager
+def stage(name):
+    current = Stage(name)
+    trace = _trace.get()
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        if trace is not None:
+            current.seconds = time.perf_counter() - start
+            trace.stages.append(current)
+
+
+def _dump(profiler, trace):
+    directory = Path(settings.CALCULATOR_PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{trace.name}-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{id(trace):x}.prof"
+    profiler.dump_stats(path)
+    trace.profile_path = path
+
+
+def profiled(name):
+    """Trace (and, if enabled, profile) calls of the decorated calculator method."""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            threshold = settings.CALCULATOR_PROFILE_THRESHOLD_MS
+            # Nested calls report their stages to the outer trace.
+            if _trace.get() is not None or (not _hooks and threshold is None):
+                return func(*args, **kwargs)
+
+            trace = Trace(name)
+            token = _trace.set(trace)
+            profiler = cProfile.Profile() if threshold is not None else None
+            start = time.perf_counter()
+            try:
+                if profiler:
+                    profiler.enable()
+                return func(*args, **kwargs)
+            finally:
+                if profiler:
+                    profiler.disable()
+                trace.seconds = time.perf_counter() - start
+                _trace.reset(token)
+                if profiler and trace.seconds * 1000 >= threshold:
+                    _dump(profiler, trace)
+                for hook in list(_hooks):
+                    hook(trace)
+
+        return wrapper
+
+    return decorator
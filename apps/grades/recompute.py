@@ -0,0 +1,159 @@
+"""
+Batch recomputation of every student's overall PO achievements.
+
+Work is split into partitions of (department, slice of its students).
+``compute_partition`` evaluates the same formulas as
+``calculate_student_overall_po_achievements`` for one partition; it can run in
+a worker process, which loads each department's contribution graph once and
+reuses it for every partition of that department it is given. The parent
+process persists the results, so there is a single writer.
+"""
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from decimal import Decimal
+from multiprocessing import get_context
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from apps.core.models import ProgramOutcome
+from apps.courses.models import AssessmentToLOContribution, CourseInstance, LOtoPOContribution
+from apps.grades.calculators import weighted_mean
+from apps.grades.models import AssessmentGrade, POAchievement
+from apps.users.models import User
+
+DEFAULT_PARTITION_SIZE = 500
+
+# department_id -> contribution graph, per process
+_graphs = {}
+
+
+def _department_graph(department_id):
+    if department_id not in _graphs:
+        po_ids = list(ProgramOutcome.objects.filter(
+            department_id=department_id, is_active=True
+        ).order_by("id").values_list("id", flat=True))
+        courses = {
+            row[0]: row[1:]
+            for row in CourseInstance.objects.filter(
+                is_active=True, course_template__department_id=department_id
+            ).values_list("id", "course_template_id", "course_template__credit")
+        }
+        assessment_lo = defaultdict(list)
+        for course_id, lo_id, assessment_id, weight in AssessmentToLOContribution.objects.filter(
+            assessment__course_instance__in=list(courses)
+        ).values_list("assessment__course_instance_id", "learning_outcome_id", "assessment_id", "weight"):
+            assessment_lo[(course_id, lo_id)].append((assessment_id, weight))
+        lo_po = defaultdict(lambda: defaultdict(list))
+        for template_id, po_id, lo_id, weight in LOtoPOContribution.objects.filter(
+            is_approved=True, program_outcome_id__in=po_ids
+        ).values_list("learning_outcome__course_template_id", "program_outcome_id", "learning_outcome_id", "weight"):
+            lo_po[template_id][po_id].append((lo_id, weight))
+        _graphs[department_id] = (po_ids, courses, assessment_lo, lo_po)
+    return _graphs[department_id]
+
+
+def compute_partition(department_id, student_ids):
+    """[(student_id, po_id, achievement, course_count)] for the given students of one department."""
+    po_ids, courses, assessment_lo, lo_po = _department_graph(department_id)
+
+    enrolled = defaultdict(list)
+    for student_id, course_id in CourseInstance.students.through.objects.filter(
+        user_id__in=student_ids, courseinstance_id__in=list(courses)
+    ).order_by("courseinstance_id").values_list("user_id", "courseinstance_id"):
+        enrolled[student_id].append(course_id)
+    grades = defaultdict(dict)
+    for student_id, assessment_id, score in AssessmentGrade.objects.filter(
+        student_id__in=student_ids, course_instance_id__in=list(courses)
+    ).values_list("student_id", "assessment_id", "score").iterator(chunk_size=10000):
+        grades[student_id][assessment_id] = score
+
+    rows = []
+    for student_id in student_ids:
+        student_grades = grades.get(student_id, {})
+        per_po = defaultdict(list)
+        for course_id in enrolled.get(student_id, []):
+            template_id, credit = courses[course_id]
+            lo_cache = {}
+            for po_id, lo_conts in lo_po[template_id].items():
+                for lo_id, _ in lo_conts:
+                    if lo_id not in lo_cache:
+                        lo_cache[lo_id] = weighted_mean(
+                            (student_grades.get(assessment_id), weight)
+                            for assessment_id, weight in assessment_lo.get((course_id, lo_id), [])
+                        )
+                course_po = weighted_mean((lo_cache[lo_id], weight) for lo_id, weight in lo_conts)
+                if course_po is not None:
+                    per_po[po_id].append((course_po, Decimal(credit)))
+        for po_id in po_ids:
+            if po_id in per_po:
+                achievement = round(float(weighted_mean(per_po[po_id])), 2)
+                rows.append((student_id, po_id, achievement, len(per_po[po_id])))
+    return rows
+
+
+def partitions(department_ids=None, partition_size=DEFAULT_PARTITION_SIZE):
+    """[(department_id, [student_id, ...])] covering every student of the departments."""
+    students = User.objects.filter(role=User.Role.STUDENT, department__isnull=False)
+    if department_ids is not None:
+        students = students.filter(department_id__in=department_ids)
+    by_department = defaultdict(list)
+    for student_id, department_id in students.order_by("department_id", "id").values_list("id", "department_id"):
+        by_department[department_id].append(student_id)
+    return [
+        (department_id, ids[i:i + partition_size])
+        for department_id, ids in by_department.items()
+        for i in range(0, len(ids), partition_size)
+    ]
+
+
+@transaction.atomic
+def persist_partition(student_ids, rows, computed_at):
+    POAchievement.objects.filter(student_id__in=student_ids).delete()
+    POAchievement.objects.bulk_create([
+        POAchievement(
+            student_id=student_id,
+            program_outcome_id=po_id,
+            achievement=Decimal(str(achievement)),
+            course_count=course_count,
+            computed_at=computed_at,
+        )
+        for student_id, po_id, achievement, course_count in rows
+    ], batch_size=5000)
+
+
+def recompute_achievements(department_ids=None, workers=1, partition_size=DEFAULT_PARTITION_SIZE, progress=None):
+    """
+    Recompute and store overall PO achievements. Returns (partitions, rows written).
+
+    With ``workers > 1`` partitions are computed in a pool of forked processes,
+    each opening its own database connection.
+    """
+    _graphs.clear()
+    work = partitions(department_ids, partition_size)
+    computed_at = timezone.now()
+    written = 0
+    if workers <= 1 or len(work) <= 1:
+        for department_id, student_ids in work:
+            rows = compute_partition(department_id, student_ids)
+            persist_partition(student_ids, rows, computed_at)
+            written += len(rows)
+            if progress:
+                progress(department_id, len(student_ids), len(rows))
+        return len(work), written
+
+    # Forked workers must not inherit open connections; each opens its own.
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=min(workers, len(work)), mp_context=get_context("fork")) as pool:
+        futures = {
+            pool.submit(compute_partition, department_id, student_ids): (department_id, student_ids)
+            for department_id, student_ids in work
+        }
+        for future in as_completed(futures):
+            department_id, student_ids = futures[future]
+            rows = future.result()
+            persist_partition(student_ids, rows, computed_at)
+            written += len(rows)
+            if progress:
+                progress(department_id, len(student_ids), len(rows))
+    return len(work), written
@@ -0,0 +1,48 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core.changelog import TRACKED_FIELDS, record_change, record_changes
+from apps.core.models import ChangeEvent
+from apps.courses.models import Assessment, CourseInstance, CourseTemplate
+from apps.grades.models import AssessmentGrade
+
+
+@receiver(post_save, sender=AssessmentGrade)
+def log_grade_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_change(instance)
+
+
+@receiver(post_delete, sender=AssessmentGrade)
+def log_grade_delete(sender, instance, **kwargs):
+    record_change(instance, ChangeEvent.Action.DELETE)
+
+
+def _sync_grade_keys(grades, **keys):
+    # update() sends no post_save, so the moved grades are logged here for /api/changes/.
+    stale = grades.exclude(**keys)
+    moved = list(stale.only(*TRACKED_FIELDS[AssessmentGrade._meta.label_lower]))
+    if moved:
+        stale.update(**keys)
+        record_changes(moved)
+
+
+@receiver(post_save, sender=Assessment)
+def sync_keys_from_assessment(sender, instance, created=False, raw=False, **kwargs):
+    if not created and not raw:
+        _sync_grade_keys(AssessmentGrade.objects.filter(assessment=instance), **instance.term_keys())
+
+
+@receiver(post_save, sender=CourseInstance)
+def sync_keys_from_course_instance(sender, instance, created=False, raw=False, **kwargs):
+    if not created and not raw:
+        _sync_grade_keys(AssessmentGrade.objects.filter(course_instance=instance), **instance.term_keys())
+
+
+@receiver(post_save, sender=CourseTemplate)
+def sync_keys_from_course_template(sender, instance, created=False, raw=False, **kwargs):
+    if not created and not raw:
+        _sync_grade_keys(
+            AssessmentGrade.objects.filter(course_instance__course_template=instance),
+            department_id=instance.department_id,
+        )
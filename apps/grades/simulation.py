@@ -0,0 +1,203 @@
+"""
+What-if simulation of contribution weight changes.
+
+Loads the contribution graph and grades of the affected cohort once, then
+evaluates the same LO/PO weighted means as ``AchievementCalculator`` as matrix
+products per course instance, for the current weights and for the proposed
+overrides. Nothing is written to the database.
+"""
+from collections import defaultdict
+
+import numpy as np
+from django.db.models import Q
+
+from apps.core.db_routers import analytics_reads
+from apps.courses.models import AssessmentToLOContribution, CourseInstance, LOtoPOContribution
+from apps.grades.models import AssessmentGrade
+
+
+def _safe_divide(num, den):
+    out = np.full(num.shape, np.nan)
+    np.divide(num, den, out=out, where=den > 0)
+    return out
+
+
+class _CourseMatrices:
+    """Dense grade matrix of one course instance plus its baseline and simulated weight matrices."""
+
+    def __init__(self, cohort_rows, assessment_ids, lo_ids, n_pos, credit):
+        self.cohort_rows = cohort_rows
+        self.student_pos = {}
+        self.assessment_pos = {a: i for i, a in enumerate(assessment_ids)}
+        self.lo_pos = {lo: i for i, lo in enumerate(lo_ids)}
+        self.scores = np.zeros((len(cohort_rows), len(assessment_ids)))
+        self.graded = np.zeros((len(cohort_rows), len(assessment_ids)))
+        self.weights = {
+            key: (np.zeros((len(assessment_ids), len(lo_ids))), np.zeros((len(lo_ids), n_pos)))
+            for key in ("baseline", "simulated")
+        }
+        self.credit = credit
+
+    def po_achievements(self, key):
+        assessment_lo, lo_po = self.weights[key]
+        lo_ach = _safe_divide((self.scores * self.graded) @ assessment_lo, self.graded @ assessment_lo)
+        lo_valid = ~np.isnan(lo_ach)
+        return _safe_divide(np.where(lo_valid, lo_ach, 0.0) @ lo_po, lo_valid.astype(float) @ lo_po)
+
+
+class WeightSimulation:
+    """
+    Overall PO achievement of a department cohort under proposed weights.
+
+    ``assessment_lo_overrides`` and ``lo_po_overrides`` map contribution ids to
+    their proposed weight. An overridden LO→PO contribution that is still
+    pending approval counts in the simulated weights only. The cohort is every
+    student enrolled in an active course instance touched by an override.
+    """
+
+    def __init__(self, department, assessment_lo_overrides=None, lo_po_overrides=None):
+        self.department = department
+        self.assessment_lo_overrides = {int(k): float(v) for k, v in (assessment_lo_overrides or {}).items()}
+        self.lo_po_overrides = {int(k): float(v) for k, v in (lo_po_overrides or {}).items()}
+
+    def affected_course_ids(self):
+        template_ids = LOtoPOContribution.objects.filter(
+            id__in=self.lo_po_overrides
+        ).values("learning_outcome__course_template_id")
+        instance_ids = AssessmentToLOContribution.objects.filter(
+            id__in=self.assessment_lo_overrides
+        ).values("assessment__course_instance_id")
+        return list(CourseInstance.objects.filter(
+            Q(course_template_id__in=template_ids) | Q(id__in=instance_ids),
+            is_active=True,
+            course_template__department=self.department,
+        ).order_by("id").values_list("id", flat=True))
+
+    @analytics_reads()
+    def run(self):
+        program_outcomes = list(self.department.program_outcomes.filter(is_active=True))
+        po_index = {po.id: i for i, po in enumerate(program_outcomes)}
+
+        affected = self.affected_course_ids()
+        Enrollment = CourseInstance.students.through
+        cohort_ids = sorted(set(
+            Enrollment.objects.filter(courseinstance_id__in=affected).values_list("user_id", flat=True)
+        ))
+        cohort_index = {s: i for i, s in enumerate(cohort_ids)}
+
+        # Overall achievement spans every active department course the cohort takes, not only the edited ones.
+        course_students = defaultdict(list)
+        for course_id, student_id in Enrollment.objects.filter(
+            user_id__in=cohort_ids,
+            courseinstance__is_active=True,
+            courseinstance__course_template__department=self.department,
+        ).values_list("courseinstance_id", "user_id"):
+            course_students[course_id].append(student_id)
+
+        course_template = {}
+        course_credit = {}
+        for course_id, template_id, credit in CourseInstance.objects.filter(
+            id__in=course_students
+        ).values_list("id", "course_template_id", "course_template__credit"):
+            course_template[course_id] = template_id
+            course_credit[course_id] = float(credit)
+
+        assessment_conts = list(AssessmentToLOContribution.objects.filter(
+            assessment__course_instance_id__in=course_template
+        ).values_list("id", "assessment_id", "learning_outcome_id", "assessment__course_instance_id", "weight"))
+        # Pending contributions only count in the simulation, and only when they are overridden.
+        lo_po_conts = list(LOtoPOContribution.objects.filter(
+            Q(is_approved=True) | Q(id__in=self.lo_po_overrides),
+            program_outcome_id__in=po_index,
+            learning_outcome__course_template_id__in=set(course_template.values()),
+        ).values_list("id", "learning_outcome_id", "program_outcome_id", "learning_outcome__course_template_id",
+                      "weight", "is_approved"))
+
+        assessments_by_course = defaultdict(dict)
+        los_by_template = defaultdict(dict)
+        for _, assessment_id, lo_id, course_id, _ in assessment_conts:
+            assessments_by_course[course_id][assessment_id] = None
+            los_by_template[course_template[course_id]][lo_id] = None
+        for _, lo_id, _, template_id, _, _ in lo_po_conts:
+            los_by_template[template_id][lo_id] = None
+
+        matrices = {}
+        courses_by_template = defaultdict(list)
+        for course_id, students in course_students.items():
+            m = _CourseMatrices(
+                np.array([cohort_index[s] for s in students], dtype=np.int64),
+                list(assessments_by_course[course_id]),
+                list(los_by_template[course_template[course_id]]),
+                len(po_index),
+                course_credit[course_id],
+            )
+            m.student_pos = {s: i for i, s in enumerate(students)}
+            matrices[course_id] = m
+            courses_by_template[course_template[course_id]].append(m)
+
+        for student_id, assessment_id, course_id, score in AssessmentGrade.objects.filter(
+            student_id__in=cohort_ids,
+            course_instance_id__in=course_template,
+        ).values_list("student_id", "assessment_id", "course_instance_id", "score").iterator(
+            chunk_size=10000
+        ):
+            m = matrices[course_id]
+            col = m.assessment_pos.get(assessment_id)
+            # Grades left behind in a course the student has since been unenrolled from are skipped.
+            row = m.student_pos.get(student_id)
+            if col is not None and row is not None:
+                m.scores[row, col] = float(score)
+                m.graded[row, col] = 1.0
+
+        for cont_id, assessment_id, lo_id, course_id, weight in assessment_conts:
+            m = matrices[course_id]
+            pos = (m.assessment_pos[assessment_id], m.lo_pos[lo_id])
+            m.weights["baseline"][0][pos] = float(weight)
+            m.weights["simulated"][0][pos] = self.assessment_lo_overrides.get(cont_id, float(weight))
+        for cont_id, lo_id, po_id, template_id, weight, is_approved in lo_po_conts:
+            for m in courses_by_template[template_id]:
+                pos = (m.lo_pos[lo_id], po_index[po_id])
+                m.weights["baseline"][1][pos] = float(weight) if is_approved else 0.0
+                m.weights["simulated"][1][pos] = self.lo_po_overrides.get(cont_id, float(weight))
+
+        shape = (len(cohort_ids), len(po_index))
+        baseline = self._overall(matrices.values(), "baseline", shape)
+        simulated = self._overall(matrices.values(), "simulated", shape)
+
+        return {
+            "cohort_size": len(cohort_ids),
+            "affected_course_instances": affected,
+            "program_outcomes": [
+                self._po_summary(po, baseline[:, po_index[po.id]], simulated[:, po_index[po.id]])
+                for po in program_outcomes
+            ],
+        }
+
+    @staticmethod
+    def _overall(matrices, key, shape):
+        """Credit-weighted mean of per-course PO achievements, as in calculate_student_overall_po_achievements."""
+        total = np.zeros(shape)
+        credits = np.zeros(shape)
+        for m in matrices:
+            course_po = m.po_achievements(key)
+            valid = ~np.isnan(course_po)
+            total[m.cohort_rows] += np.where(valid, course_po, 0.0) * m.credit
+            credits[m.cohort_rows] += valid * m.credit
+        return _safe_divide(total, credits)
+
+    @staticmethod
+    def _po_summary(po, baseline, simulated):
+        base_valid = ~np.isnan(baseline)
+        sim_valid = ~np.isnan(simulated)
+        both = base_valid & sim_valid
+        base_avg = round(float(baseline[base_valid].mean()), 2) if base_valid.any() else None
+        sim_avg = round(float(simulated[sim_valid].mean()), 2) if sim_valid.any() else None
+        return {
+            "program_outcome_id": po.id,
+            "code": po.code,
+            "baseline_average": base_avg,
+            "simulated_average": sim_avg,
+            "delta": round(sim_avg - base_avg, 2) if base_avg is not None and sim_avg is not None else None,
+            "students_changed": int((np.abs(simulated[both] - baseline[both]) >= 0.005).sum()),
+            "student_count": int(sim_valid.sum()),
+        }
@@ -0,0 +1,289 @@
+"""
+Columnar snapshots of grade data for offline analysis.
+
+A snapshot is a directory of hive-partitioned Parquet (or Arrow IPC) files:
+
+    grades/department=CSE/term=2024-Fall/part-00000.parquet
+    assessment_lo/department=CSE/term=2024-Fall/part-00000.parquet
+    lo_po/department=CSE/part-00000.parquet
+    course_instances/department=CSE/part-00000.parquet
+
+Rows are read from the database in chunks (server-side cursors on PostgreSQL)
+and every chunk is written as its own part file, so memory stays bounded by
+``chunk_size`` no matter how many grades are exported.
+
+Only grades of students still enrolled in the course instance are exported.
+The calculators build a student's courses from enrollments, so a grade left
+behind by a dropped enrollment would otherwise count offline only.
+
+``GradeSnapshot`` loads a snapshot back and runs the same PO/LO math as
+``AchievementCalculator`` without touching the database, with optional weight
+overrides for what-if analysis.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from pathlib import Path
+import shutil
+
+from django.db.models import Exists, OuterRef
+
+from apps.core.db_routers import analytics_reads
+from apps.courses.models import AssessmentToLOContribution, CourseInstance, LOtoPOContribution
+from apps.grades.calculators import weighted_mean
+from apps.grades.models import AssessmentGrade
+
+SNAPSHOT_FORMATS = ("parquet", "arrow")
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise ImportError("Grade snapshots require pyarrow (pip install pyarrow).") from exc
+    return pyarrow
+
+
+def term_key(semester, year):
+    """Partition-safe term label: ("Fall", 2024) -> "2024-Fall"."""
+    return f"{year}-{'-'.join(str(semester).split())}"
+
+
+def _schemas(pa):
+    weight = pa.decimal128(2, 1)
+    return {
+        "grades": pa.schema([
+            ("id", pa.int64()),
+            ("student_id", pa.int64()),
+            ("assessment_id", pa.int64()),
+            ("course_instance_id", pa.int64()),
+            ("score", pa.decimal128(5, 2)),
+            ("max_score", pa.decimal128(6, 2)),
+        ]),
+        "assessment_lo": pa.schema([
+            ("id", pa.int64()),
+            ("assessment_id", pa.int64()),
+            ("learning_outcome_id", pa.int64()),
+            ("course_instance_id", pa.int64()),
+            ("weight", weight),
+        ]),
+        "lo_po": pa.schema([
+            ("id", pa.int64()),
+            ("learning_outcome_id", pa.int64()),
+            ("program_outcome_id", pa.int64()),
+            ("course_template_id", pa.int64()),
+            ("weight", weight),
+            ("is_approved", pa.bool_()),
+            ("po_is_active", pa.bool_()),
+        ]),
+        "course_instances": pa.schema([
+            ("id", pa.int64()),
+            ("course_template_id", pa.int64()),
+            ("credit", pa.int64()),
+            ("semester", pa.string()),
+            ("year", pa.int64()),
+            ("is_active", pa.bool_()),
+        ]),
+    }
+
+
+# table name -> (queryset factory, value fields, department field, (semester, year) fields or None)
+def _sources():
+    return {
+        "grades": (
+            lambda: AssessmentGrade.objects.filter(Exists(CourseInstance.students.through.objects.filter(
+                courseinstance_id=OuterRef("course_instance_id"), user_id=OuterRef("student_id")
+            ))).order_by(),
+            ["id", "student_id", "assessment_id", "course_instance_id", "score", "assessment__max_score"],
+            "department__code",
+            ("semester", "year"),
+        ),
+        "assessment_lo": (
+            lambda: AssessmentToLOContribution.objects.order_by(),
+            ["id", "assessment_id", "learning_outcome_id", "assessment__course_instance_id", "weight"],
+            "assessment__department__code",
+            ("assessment__semester", "assessment__year"),
+        ),
+        "lo_po": (
+            lambda: LOtoPOContribution.objects.order_by(),
+            ["id", "learning_outcome_id", "program_outcome_id", "learning_outcome__course_template_id",
+             "weight", "is_approved", "program_outcome__is_active"],
+            "program_outcome__department__code",
+            None,
+        ),
+        "course_instances": (
+            lambda: CourseInstance.objects.order_by(),
+            ["id", "course_template_id", "course_template__credit", "semester", "year", "is_active"],
+            "course_template__department__code",
+            None,
+        ),
+    }
+
+
+@analytics_reads()
+def export_snapshot(out_dir, fmt="parquet", chunk_size=DEFAULT_CHUNK_SIZE, departments=None):
+    """Write a snapshot of grades and contribution weights to ``out_dir``. Returns row counts per table."""
+    if fmt not in SNAPSHOT_FORMATS:
+        raise ValueError(f"Unknown snapshot format {fmt!r}, expected one of {SNAPSHOT_FORMATS}.")
+    pa = _pyarrow()
+    schemas = _schemas(pa)
+    out_dir = Path(out_dir)
+    suffix = "parquet" if fmt == "parquet" else "arrow"
+
+    counts = {}
+    for table, (queryset, fields, dept_field, term_fields) in _sources().items():
+        qs = queryset()
+        if departments:
+            qs = qs.filter(**{f"{dept_field}__in": departments})
+        columns = fields + [dept_field] + list(term_fields or [])
+        names = schemas[table].names
+        # Part files are numbered per run, so stale parts from an older export must go.
+        shutil.rmtree(out_dir / table, ignore_errors=True)
+
+        chunk, part, total = [], 0, 0
+        for row in qs.values_list(*columns).iterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                _write_chunk(pa, out_dir / table, chunk, names, schemas[table], term_fields, part, suffix, fmt)
+                total += len(chunk)
+                chunk, part = [], part + 1
+        if chunk:
+            _write_chunk(pa, out_dir / table, chunk, names, schemas[table], term_fields, part, suffix, fmt)
+            total += len(chunk)
+        counts[table] = total
+    return counts
+
+
+def _write_chunk(pa, table_dir, rows, names, schema, term_fields, part, suffix, fmt):
+    width = len(names)
+    partitions = defaultdict(list)
+    for row in rows:
+        key = f"department={row[width]}"
+        if term_fields:
+            key += f"/term={term_key(row[width + 1], row[width + 2])}"
+        partitions[key].append(row[:width])
+
+    for key, part_rows in partitions.items():
+        target = table_dir / key
+        target.mkdir(parents=True, exist_ok=True)
+        columns = list(zip(*part_rows))
+        table = pa.Table.from_arrays(
+            [pa.array(col, type=schema.field(i).type) for i, col in enumerate(columns)],
+            schema=schema,
+        )
+        path = target / f"part-{part:05d}.{suffix}"
+        if fmt == "parquet":
+            pa.parquet.write_table(table, path)
+        else:
+            pa.feather.write_feather(table, path, compression="uncompressed")
+
+
+class GradeSnapshot:
+    """Offline view over an exported snapshot that mirrors ``AchievementCalculator``."""
+
+    def __init__(self, grades, assessment_lo, lo_po, course_instances):
+        # grades: {(student_id, assessment_id): score}
+        self.grades = grades
+        # assessment_lo: {contribution_id: (assessment_id, learning_outcome_id, course_instance_id, weight)}
+        self.assessment_lo = assessment_lo
+        # lo_po: {contribution_id: (learning_outcome_id, program_outcome_id, course_template_id, weight)}
+        self.lo_po = lo_po
+        # course_instances: {course_instance_id: (course_template_id, credit, semester, year, is_active)}
+        self.course_instances = course_instances
+        self._index()
+
+    @classmethod
+    def load(cls, path, departments=None, terms=None, fmt="parquet"):
+        """Load a snapshot, optionally restricted to some department codes and term keys."""
+        pa = _pyarrow()
+        path = Path(path)
+
+        def read(table, with_term):
+            dataset = pa.dataset.dataset(path / table, format="parquet" if fmt == "parquet" else "ipc",
+                                         partitioning="hive")
+            expr = None
+            if departments:
+                expr = pa.dataset.field("department").isin(list(departments))
+            if with_term and terms:
+                term_expr = pa.dataset.field("term").isin(list(terms))
+                expr = term_expr if expr is None else expr & term_expr
+            return dataset.to_table(filter=expr).to_pylist()
+
+        grades = {(r["student_id"], r["assessment_id"]): r["score"] for r in read("grades", True)}
+        assessment_lo = {
+            r["id"]: (r["assessment_id"], r["learning_outcome_id"], r["course_instance_id"], r["weight"])
+            for r in read("assessment_lo", True)
+        }
+        lo_po = {
+            r["id"]: (r["learning_outcome_id"], r["program_outcome_id"], r["course_template_id"], r["weight"])
+            for r in read("lo_po", False)
+            if r["is_approved"] and r["po_is_active"]
+        }
+        course_instances = {
+            r["id"]: (r["course_template_id"], r["credit"], r["semester"], r["year"], r["is_active"])
+            for r in read("course_instances", False)
+        }
+        return cls(grades, assessment_lo, lo_po, course_instances)
+
+    def _index(self):
+        self.assessment_lo_map = defaultdict(list)
+        for assessment_id, lo_id, course_instance_id, weight in self.assessment_lo.values():
+            self.assessment_lo_map[(course_instance_id, lo_id)].append((assessment_id, weight))
+        self.lo_po_map = defaultdict(lambda: defaultdict(list))
+        for lo_id, po_id, course_template_id, weight in self.lo_po.values():
+            self.lo_po_map[course_template_id][po_id].append((lo_id, weight))
+        self.student_courses = defaultdict(set)
+        course_by_assessment = {a: c for a, _, c, _ in self.assessment_lo.values()}
+        for student_id, assessment_id in self.grades:
+            course_instance_id = course_by_assessment.get(assessment_id)
+            if course_instance_id is not None:
+                self.student_courses[student_id].add(course_instance_id)
+
+    def with_weights(self, assessment_lo=None, lo_po=None):
+        """Copy of the snapshot with contribution weights replaced ({contribution_id: weight})."""
+        new_assessment_lo = dict(self.assessment_lo)
+        for cont_id, weight in (assessment_lo or {}).items():
+            a, lo, c, _ = new_assessment_lo[cont_id]
+            new_assessment_lo[cont_id] = (a, lo, c, Decimal(str(weight)))
+        new_lo_po = dict(self.lo_po)
+        for cont_id, weight in (lo_po or {}).items():
+            lo, po, ct, _ = new_lo_po[cont_id]
+            new_lo_po[cont_id] = (lo, po, ct, Decimal(str(weight)))
+        return GradeSnapshot(self.grades, new_assessment_lo, new_lo_po, self.course_instances)
+
+    def course_po_achievements(self, student_id, course_instance_id):
+        """{program_outcome_id: achievement} for one student in one course instance."""
+        course_template_id = self.course_instances[course_instance_id][0]
+        lo_cache = {}
+        results = {}
+        for po_id, lo_conts in self.lo_po_map.get(course_template_id, {}).items():
+            lo_scores = []
+            for lo_id, po_weight in lo_conts:
+                if lo_id not in lo_cache:
+                    lo_cache[lo_id] = weighted_mean(
+                        (self.grades.get((student_id, assessment_id)), weight)
+                        for assessment_id, weight in self.assessment_lo_map.get((course_instance_id, lo_id), [])
+                    )
+                lo_scores.append((lo_cache[lo_id], po_weight))
+            achievement = weighted_mean(lo_scores)
+            if achievement is not None:
+                results[po_id] = achievement
+        return results
+
+    def student_overall_po_achievements(self, student_id, active_only=True):
+        """{program_outcome_id: achievement} weighted by course credit, as in the online calculator."""
+        per_po = defaultdict(list)
+        for course_instance_id in self.student_courses.get(student_id, ()):
+            _, credit, _, _, is_active = self.course_instances[course_instance_id]
+            if active_only and not is_active:
+                continue
+            for po_id, achievement in self.course_po_achievements(student_id, course_instance_id).items():
+                per_po[po_id].append((achievement, Decimal(credit)))
+        return {
+            po_id: round(float(value), 2)
+            for po_id, pairs in per_po.items()
+            if (value := weighted_mean(pairs)) is not None
+        }
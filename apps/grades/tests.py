@@ -1,3 +1,523 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from decimal import Decimal
+from importlib.util import find_spec
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+
+from apps.api.serializers.grades import WeightSimulationSerializer
+from apps.core.models import ChangeEvent, Department, ProgramOutcome
+from apps.users.models import User
+from apps.core.testing import QueryBudgetMixin, build_fixture_dataset
+from apps.courses.models import (
+    Assessment, AssessmentToLOContribution, CourseTemplate, LearningOutcome, LOtoPOContribution,
+)
+from apps.grades.calculators import AchievementCalculator
+from apps.grades.longitudinal import POTrendEngine
+from apps.grades.models import AssessmentGrade, POAchievement
+from apps.grades.profiling import add_hook, remove_hook
+from apps.grades.recompute import partitions, recompute_achievements
+from apps.grades.simulation import WeightSimulation
+from apps.grades.snapshots import GradeSnapshot, export_snapshot, term_key
+
+
+class CalculatorQueryBudgetTests(QueryBudgetMixin, TestCase):
+    query_baseline_file = Path(__file__).resolve().parent / "query_baselines.json"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixture_dataset()
+
+    def test_course_po_achievements(self):
+        student = self.data["students"][0]
+        course_instance = self.data["course_instances"][0]
+        with self.assertQueryBudget("calculate_all_po_achievement_for_course"):
+            results = AchievementCalculator.calculate_all_po_achievement_for_course(student, course_instance)
+        self.assertTrue(results)
+
+    def test_student_overall_po_achievements(self):
+        student = self.data["students"][0]
+        with self.assertQueryBudget("calculate_student_overall_po_achievements"):
+            results = AchievementCalculator.calculate_student_overall_po_achievements(student)
+        self.assertTrue(results)
+
+    def test_course_lo_statistics(self):
+        course_instance = self.data["course_instances"][0]
+        with self.assertQueryBudget("get_course_lo_statistics"):
+            results = AchievementCalculator.get_course_lo_statistics(course_instance)
+        self.assertTrue(results)
+
+    def test_explanation_matches_overall_achievements(self):
+        student = self.data["students"][0]
+        with self.assertQueryBudget("explain_student_po_achievements"):
+            tree = AchievementCalculator.explain_student_po_achievements(student)
+        overall = AchievementCalculator.calculate_student_overall_po_achievements(student)
+        self.assertEqual(
+            [(node["program_outcome_id"], node["achievement"]) for node in tree],
+            [(row["program_outcome"].id, row["overall_achievement"]) for row in overall],
+        )
+        self.assertEqual(
+            [[(c["course_instance_id"], c["achievement"]) for c in node["courses"]] for node in tree],
+            [[(c["course"].id, c["achievement"]) for c in row["contributing_courses"]] for row in overall],
+        )
+        lo = tree[0]["courses"][0]["learning_outcomes"][0]
+        self.assertTrue(lo["assessments"])
+        self.assertIn("score", lo["assessments"][0])
+
+
+class StudentPOTreeTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixture_dataset(students=4, templates=3)
+        lo = LearningOutcome.objects.order_by("id")[0]
+        po = ProgramOutcome.objects.exclude(lo_contributions__learning_outcome=lo).order_by("id")[0]
+        LOtoPOContribution.objects.create(learning_outcome=lo, program_outcome=po, weight=5)
+        inactive = cls.data["course_instances"][-1]
+        inactive.is_active = False
+        inactive.save()
+
+    def test_tree_matches_overall_achievements(self):
+        for student in self.data["students"]:
+            tree = AchievementCalculator.explain_student_po_achievements(student)
+            overall = AchievementCalculator.calculate_student_overall_po_achievements(student)
+            self.assertTrue(tree)
+            self.assertEqual(
+                [
+                    (node["program_outcome_id"], node["achievement"],
+                     [(c["course_instance_id"], c["achievement"]) for c in node["courses"]])
+                    for node in tree
+                ],
+                [
+                    (row["program_outcome"].id, row["overall_achievement"],
+                     [(c["course"].id, c["achievement"]) for c in row["contributing_courses"]])
+                    for row in overall
+                ],
+            )
+
+    def test_course_achievements_follow_from_their_learning_outcomes(self):
+        tree = AchievementCalculator.explain_student_po_achievements(self.data["students"][1])
+        for node in tree:
+            for course in node["courses"]:
+                pairs = [
+                    (lo["achievement"], float(lo["po_weight"]))
+                    for lo in course["learning_outcomes"] if lo["achievement"] is not None
+                ]
+                expected = sum(a * w for a, w in pairs) / sum(w for _, w in pairs)
+                self.assertAlmostEqual(course["achievement"], expected, delta=0.01)
+
+    def test_program_outcome_filter(self):
+        po = ProgramOutcome.objects.order_by("id")[1]
+        student = self.data["students"][0]
+        tree = AchievementCalculator.explain_student_po_achievements(student, program_outcome_ids=[po.id])
+        overall = AchievementCalculator.calculate_student_overall_po_achievements(student)
+        self.assertEqual(
+            [(n["program_outcome_id"], n["achievement"]) for n in tree],
+            [(r["program_outcome"].id, r["overall_achievement"]) for r in overall if r["program_outcome"].id == po.id],
+        )
+
+
+class CalculatorProfilingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixture_dataset(students=3)
+
+    def setUp(self):
+        self.traces = []
+        add_hook(self.traces.append)
+        self.addCleanup(remove_hook, self.traces.append)
+
+    def test_hook_receives_stage_timings(self):
+        AchievementCalculator.calculate_student_overall_po_achievements(self.data["students"][0])
+        self.assertEqual(len(self.traces), 1)
+        trace = self.traces[0].as_dict()
+        self.assertEqual(trace["name"], "calculate_student_overall_po_achievements")
+        self.assertEqual([s["name"] for s in trace["stages"]], ["query", "graph", "compute", "format"])
+        self.assertGreater(trace["stages"][0]["rows"], 0)
+        self.assertGreaterEqual(trace["ms"], sum(s["ms"] for s in trace["stages"]))
+
+    def test_slow_calls_dump_a_profile(self):
+        course_instance = self.data["course_instances"][0]
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(CALCULATOR_PROFILE_THRESHOLD_MS=0, CALCULATOR_PROFILE_DIR=directory):
+                AchievementCalculator.get_course_lo_statistics(course_instance)
+            self.assertTrue(self.traces[0].profile_path.exists())
+            with override_settings(CALCULATOR_PROFILE_THRESHOLD_MS=60000, CALCULATOR_PROFILE_DIR=directory):
+                AchievementCalculator.get_course_lo_statistics(course_instance)
+            self.assertIsNone(self.traces[1].profile_path)
+            self.assertEqual(len(list(Path(directory).iterdir())), 1)
+
+
+class RecomputeAchievementsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixture_dataset(students=7)
+
+    def test_matches_calculator_and_replaces_previous_rows(self):
+        recompute_achievements(partition_size=3)
+        recompute_achievements(partition_size=3)
+        for student in self.data["students"][:3]:
+            expected = {
+                (row["program_outcome"].id, Decimal(str(row["overall_achievement"])), row["course_count"])
+                for row in AchievementCalculator.calculate_student_overall_po_achievements(student)
+            }
+            self.assertEqual(
+                set(POAchievement.objects.filter(student=student).values_list(
+                    "program_outcome_id", "achievement", "course_count")),
+                expected,
+            )
+        self.assertEqual(POAchievement.objects.count(), 7 * 4)
+
+    def test_partitions_split_departments_into_student_batches(self):
+        work = partitions(partition_size=3)
+        self.assertEqual([len(ids) for _, ids in work], [3, 3, 1])
+
+
+class TermKeysTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixture_dataset(students=2, templates=1, terms=(("Fall", 2024),))
+
+    def keys(self, grade):
+        return (grade.course_instance_id, grade.department_id, grade.semester, grade.year)
+
+    def test_writes_fill_keys(self):
+        course = self.data["course_instances"][0]
+        expected = (course.id, self.data["department"].id, "Fall", 2024)
+        # The fixture writes grades with bulk_create.
+        self.assertEqual({self.keys(g) for g in AssessmentGrade.objects.all()}, {expected})
+
+        assessment = Assessment.objects.create(course_instance=course, name="Quiz", assessment_type="QUIZ", weight=5)
+        self.assertEqual((assessment.department_id, assessment.semester, assessment.year), expected[1:])
+        grade = AssessmentGrade.objects.create(student=self.data["students"][0], assessment=assessment, score=70)
+        self.assertEqual(self.keys(grade), expected)
+
+    def test_course_instance_and_template_changes_propagate(self):
+        course = self.data["course_instances"][0]
+        course.semester, course.year = "Spring", 2025
+        course.save()
+        other = Department.objects.create(name="Electrical Engineering", code="EE")
+        template = course.course_template
+        template.department = other
+        template.save()
+
+        expected = {(course.id, other.id, "Spring", 2025)}
+        self.assertEqual({self.keys(g) for g in AssessmentGrade.objects.all()}, expected)
+        # Each grade moved twice; the change feed sees both moves.
+        grade_ids = list(AssessmentGrade.objects.values_list("id", flat=True))
+        self.assertEqual(
+            ChangeEvent.objects.filter(model="grades.assessmentgrade", object_id__in=grade_ids).count(),
+            2 * len(grade_ids),
+        )
+        self.assertEqual(
+            set(Assessment.objects.values_list("course_instance_id", "department_id", "semester", "year")), expected
+        )
+
+    def test_backfill_repairs_bypassed_writes(self):
+        course = self.data["course_instances"][0]
+        type(course).objects.filter(pk=course.pk).update(year=2030)
+        with self.assertRaises(SystemExit):
+            call_command("backfill_term_keys", check=True, stdout=open("/dev/null", "w"))
+        call_command("backfill_term_keys", batch_size=1, stdout=open("/dev/null", "w"))
+        call_command("backfill_term_keys", check=True, stdout=open("/dev/null", "w"))
+        self.assertEqual(set(AssessmentGrade.objects.values_list("year", flat=True)), {2030})
+
+
+class GradeIntegrityTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixture_dataset(students=2, templates=1, terms=(("Fall", 2024),))
+        course = cls.data["course_instances"][0]
+        cls.quiz = Assessment.objects.create(
+            course_instance=course, name="Quiz", assessment_type="QUIZ", max_score=10, weight=5
+        )
+        cls.outsider = User.objects.create_user("outsider@example.com", "password", role=User.Role.STUDENT)
+
+    def test_bulk_writes_are_checked_by_the_database(self):
+        student = self.data["students"][0]
+        # Compared as numbers: "9" sorts after "10" as text.
+        AssessmentGrade.objects.bulk_create([AssessmentGrade(student=student, assessment=self.quiz, score=9)])
+        for grade in (
+            AssessmentGrade(student=self.data["students"][1], assessment=self.quiz, score=Decimal("10.5")),
+            AssessmentGrade(student=self.outsider, assessment=self.quiz, score=5),
+            AssessmentGrade(student=self.data["students"][1], assessment=self.quiz, score=-1),
+        ):
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                AssessmentGrade.objects.bulk_create([grade])
+
+        grade = AssessmentGrade.objects.get(student=student, assessment=self.quiz)
+        grade.score = 11
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            AssessmentGrade.objects.bulk_update([grade], ["score"])
+
+    def test_save_raises_validation_errors(self):
+        with self.assertRaisesMessage(ValidationError, "maximum score"):
+            AssessmentGrade.objects.create(student=self.data["students"][0], assessment=self.quiz, score=11)
+        with self.assertRaisesMessage(ValidationError, "not enrolled"):
+            AssessmentGrade.objects.create(student=self.outsider, assessment=self.quiz, score=5)
+        # The enclosing transaction is still usable.
+        with self.assertNumQueries(4):
+            AssessmentGrade.objects.create(student=self.data["students"][0], assessment=self.quiz, score=10)
+
+    def test_roles_are_checked_by_the_database(self):
+        course = self.quiz.course_instance
+        instructor, student = self.data["instructor"], self.data["students"][1]
+        course.students.add(instructor)
+        with self.assertRaisesMessage(ValidationError, "student role"):
+            AssessmentGrade.objects.create(student=instructor, assessment=self.quiz, score=5)
+        with self.assertRaisesMessage(ValidationError, "entered by"):
+            AssessmentGrade.objects.create(student=student, assessment=self.quiz, score=5, entered_by=student)
+
+        grade = AssessmentGrade.objects.create(student=student, assessment=self.quiz, score=5, entered_by=instructor)
+        grade.entered_by = self.outsider
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            AssessmentGrade.objects.bulk_update([grade], ["entered_by"])
+        admin = User.objects.create_superuser("admin@example.com", "password")
+        AssessmentGrade.objects.filter(pk=grade.pk).update(entered_by=admin)
+
+
+class WeightSimulationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixture_dataset(students=4, templates=2, terms=(("Fall", 2024),))
+
+    def calculator_averages(self):
+        values = {}
+        for student in self.data["students"]:
+            for row in AchievementCalculator.calculate_student_overall_po_achievements(student):
+                values.setdefault(row["program_outcome"].id, []).append(row["overall_achievement"])
+        return {po_id: sum(v) / len(v) for po_id, v in values.items()}
+
+    def assertAverages(self, result, key, expected):
+        for po in result["program_outcomes"]:
+            self.assertAlmostEqual(po[key], expected[po["program_outcome_id"]], delta=0.01)
+
+    def simulate(self, lo_po_overrides):
+        return WeightSimulation(self.data["department"], lo_po_overrides=lo_po_overrides).run()
+
+    def test_deltas_match_the_calculator_after_saving_the_weights(self):
+        # One contribution per course, so the cohort is every student.
+        overrides = {}
+        for template in CourseTemplate.objects.all():
+            conts = LOtoPOContribution.objects.filter(learning_outcome__course_template=template).exclude(weight=5)
+            # A contribution whose PO has other LOs in the course, so its weight moves the mean.
+            cont = next(c for c in conts if conts.filter(program_outcome=c.program_outcome).count() > 1)
+            overrides[cont.id] = 5
+        result = self.simulate(overrides)
+        self.assertEqual(result["cohort_size"], 4)
+        self.assertAverages(result, "baseline_average", self.calculator_averages())
+
+        LOtoPOContribution.objects.filter(id__in=overrides).update(weight=5)
+        self.assertAverages(result, "simulated_average", self.calculator_averages())
+        self.assertTrue(any(po["delta"] for po in result["program_outcomes"]))
+
+    def test_pending_contribution_override(self):
+        lo = LearningOutcome.objects.order_by("id")[0]
+        po = ProgramOutcome.objects.exclude(lo_contributions__learning_outcome=lo).order_by("id")[0]
+        pending = LOtoPOContribution.objects.create(learning_outcome=lo, program_outcome=po, weight=1)
+        before = self.calculator_averages()
+
+        result = self.simulate({pending.id: 5})
+        self.assertAverages(result, "baseline_average", before)
+        pending.is_approved, pending.weight = True, 5
+        pending.save()
+        self.assertAverages(result, "simulated_average", self.calculator_averages())
+        delta = next(p["delta"] for p in result["program_outcomes"] if p["program_outcome_id"] == po.id)
+        self.assertNotEqual(delta, 0)
+
+    def test_grades_of_unenrolled_courses_are_ignored(self):
+        student = self.data["students"][0]
+        self.data["course_instances"][0].students.remove(student)
+        overrides = {
+            LOtoPOContribution.objects.filter(learning_outcome__course_template=template)[0].id: 5
+            for template in CourseTemplate.objects.all()
+        }
+        result = self.simulate(overrides)
+        self.assertEqual(result["cohort_size"], 4)
+        self.assertAverages(result, "baseline_average", self.calculator_averages())
+
+    def test_rejects_contributions_of_other_departments(self):
+        other = Department.objects.create(name="Electrical Engineering", code="EE")
+        template = CourseTemplate.objects.create(department=other, code="EE101", name="Circuits", credit=3)
+        lo = LearningOutcome.objects.create(course_template=template, code="1", description="Circuits")
+        po = ProgramOutcome.objects.create(department=other, code="1", description="Electrical")
+        foreign = LOtoPOContribution.objects.create(learning_outcome=lo, program_outcome=po, weight=1)
+
+        serializer = WeightSimulationSerializer(data={
+            "department_id": self.data["department"].id,
+            "assessment_lo_weights": [{"id": 999999, "weight": "2"}],
+            "lo_po_weights": [{"id": foreign.id, "weight": "2"}],
+        })
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(set(serializer.errors), {"assessment_lo_weights", "lo_po_weights"})
+
+
+@skipUnless(find_spec("pyarrow"), "pyarrow is not installed")
+class GradeSnapshotTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixture_dataset(students=3, templates=2, terms=(("Fall", 2024), ("Spring", 2025)))
+        # A pending contribution must not count, offline or online.
+        lo = LearningOutcome.objects.order_by("id")[0]
+        po = ProgramOutcome.objects.exclude(lo_contributions__learning_outcome=lo).order_by("id")[0]
+        LOtoPOContribution.objects.create(learning_outcome=lo, program_outcome=po, weight=5)
+
+    def export(self, fmt="parquet", **kwargs):
+        out_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, out_dir, True)
+        counts = export_snapshot(out_dir, fmt=fmt, chunk_size=7, **kwargs)
+        return out_dir, counts
+
+    def test_round_trip(self):
+        for fmt in ("parquet", "arrow"):
+            with self.subTest(fmt=fmt):
+                out_dir, counts = self.export(fmt)
+                self.assertEqual(counts["grades"], AssessmentGrade.objects.count())
+                self.assertEqual(counts["lo_po"], LOtoPOContribution.objects.count())
+
+                snapshot = GradeSnapshot.load(out_dir, fmt=fmt)
+                self.assertEqual(snapshot.grades, {
+                    (g.student_id, g.assessment_id): g.score for g in AssessmentGrade.objects.all()
+                })
+                self.assertEqual(snapshot.assessment_lo, {
+                    c.id: (c.assessment_id, c.learning_outcome_id, c.assessment.course_instance_id, c.weight)
+                    for c in AssessmentToLOContribution.objects.select_related("assessment")
+                })
+                self.assertEqual(snapshot.lo_po, {
+                    c.id: (c.learning_outcome_id, c.program_outcome_id, c.learning_outcome.course_template_id, c.weight)
+                    for c in LOtoPOContribution.objects.filter(is_approved=True).select_related("learning_outcome")
+                })
+                self.assertEqual(set(snapshot.course_instances), {c.id for c in self.data["course_instances"]})
+
+    def test_export_command(self):
+        out_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, out_dir, True)
+        call_command("export_grade_snapshot", out_dir, "--department", "CSE", stdout=open("/dev/null", "w"))
+        snapshot = GradeSnapshot.load(out_dir, departments=["CSE"])
+        self.assertEqual(len(snapshot.grades), AssessmentGrade.objects.count())
+        self.assertTrue((Path(out_dir) / "grades" / "department=CSE" / f"term={term_key('Fall', 2024)}").is_dir())
+
+    def test_load_filters_by_term(self):
+        out_dir, _ = self.export()
+        snapshot = GradeSnapshot.load(out_dir, departments=["CSE"], terms=[term_key("Fall", 2024)])
+        expected = AssessmentGrade.objects.filter(semester="Fall", year=2024)
+        self.assertEqual(set(snapshot.grades), {(g.student_id, g.assessment_id) for g in expected})
+
+    def test_matches_the_live_calculator(self):
+        # Grades outlive a dropped enrollment; the calculators ignore them.
+        self.data["course_instances"][0].students.remove(self.data["students"][0])
+        out_dir, counts = self.export()
+        self.assertEqual(counts["grades"], AssessmentGrade.objects.count() - 2)
+        snapshot = GradeSnapshot.load(out_dir)
+        for student in self.data["students"]:
+            live = {
+                row["program_outcome"].id: row["overall_achievement"]
+                for row in AchievementCalculator.calculate_student_overall_po_achievements(student)
+            }
+            self.assertTrue(live)
+            offline = snapshot.student_overall_po_achievements(student.id)
+            self.assertEqual(offline.keys(), live.keys())
+            for po_id, value in live.items():
+                self.assertAlmostEqual(offline[po_id], value, places=2)
+
+            for course_instance in student.enrolled_courses.all():
+                live = {
+                    row["program_outcome"].id: row["achievement"]
+                    for row in AchievementCalculator.calculate_all_po_achievement_for_course(student, course_instance)
+                }
+                offline = snapshot.course_po_achievements(student.id, course_instance.id)
+                self.assertEqual(offline.keys(), live.keys())
+                for po_id, value in live.items():
+                    self.assertAlmostEqual(float(offline[po_id]), value, places=2)
+
+
+class POTrendEngineTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_fixture_dataset(students=3, templates=2, terms=(("Fall", 2024), ("Spring", 2025)))
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def term_results(self):
+        """Results and the terms that were recomputed to produce them."""
+        engine = POTrendEngine(self.data["department"])
+        with mock.patch.object(POTrendEngine, "_compute", autospec=True, side_effect=POTrendEngine._compute) as compute:
+            results = engine.term_results(s.id for s in self.data["students"])
+        return results, {term for call in compute.call_args_list for term in call.args[2]}
+
+    def expected(self, student, term):
+        per_po = {}
+        for course in self.data["course_instances"]:
+            if (course.semester, course.year) != term:
+                continue
+            credit = CourseTemplate.objects.get(id=course.course_template_id).credit
+            for row in AchievementCalculator.calculate_all_po_achievement_for_course(student, course):
+                per_po.setdefault(row["program_outcome"].id, []).append((row["achievement"], credit))
+        return {
+            po_id: sum(a * c for a, c in pairs) / sum(c for _, c in pairs)
+            for po_id, pairs in per_po.items()
+        }
+
+    def assertMatchesCalculator(self, results):
+        for (student_id, term), values in results.items():
+            expected = self.expected(User.objects.get(id=student_id), term)
+            self.assertEqual(values.keys(), expected.keys())
+            for po_id, (achievement, course_count) in values.items():
+                self.assertAlmostEqual(achievement, expected[po_id], delta=0.01)
+
+    def test_values_match_the_calculator_per_term(self):
+        results, computed = self.term_results()
+        self.assertEqual(len(results), 3 * 2)
+        self.assertEqual(computed, {("Fall", 2024), ("Spring", 2025)})
+        self.assertMatchesCalculator(results)
+
+    def test_unchanged_terms_are_reused(self):
+        first, _ = self.term_results()
+        grade = AssessmentGrade.objects.filter(semester="Spring", year=2025).order_by("id")[0]
+        grade.score = 0
+        grade.save()
+
+        results, computed = self.term_results()
+        self.assertEqual(computed, {("Spring", 2025)})
+        self.assertNotEqual(results, first)
+        self.assertMatchesCalculator(results)
+
+        _, computed = self.term_results()
+        self.assertEqual(computed, set())
+
+    def test_credit_change_invalidates(self):
+        first, _ = self.term_results()
+        CourseTemplate.objects.filter(code="CSE101").update(credit=10)
+
+        results, computed = self.term_results()
+        self.assertEqual(computed, {("Fall", 2024), ("Spring", 2025)})
+        self.assertNotEqual(results, first)
+        self.assertMatchesCalculator(results)
+
+    def test_program_outcome_activation_invalidates(self):
+        po = ProgramOutcome.objects.order_by("id")[0]
+        first, _ = self.term_results()
+        ProgramOutcome.objects.filter(id=po.id).update(is_active=False)
+        results, computed = self.term_results()
+        self.assertEqual(len(computed), 2)
+        self.assertTrue(all(po.id not in values for values in results.values()))
+
+        ProgramOutcome.objects.filter(id=po.id).update(is_active=True)
+        results, computed = self.term_results()
+        self.assertEqual(len(computed), 2)
+        self.assertEqual(results, first)
@@ -3,7 +3,6 @@ from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
 from django.db import models
 from decimal import Decimal
-from apps.courses.models import CourseInstance
 
 
 # Create your models here.
@@ -90,7 +89,7 @@ class User(AbstractUser):
     
     def get_active_enrolled_courses(self):
         if not self.is_student():
-            return CourseInstance.objects.none()
+            return self.enrolled_courses.none()
         return self.enrolled_courses.filter(is_active=True)
     def get_overall_po_scores(self):
         from apps.grades.calculators import AchievementCalculator
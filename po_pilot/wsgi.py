@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'po_pilot.settings')
 
 application = get_wsgi_application()
+
+# Resolve the URLconf (and with it every view and serializer module) while the
+# worker boots, so the first request does not pay for those imports.
+if os.environ.get('PO_PILOT_WARM_URLCONF', '1') != '0':
+    from django.urls import get_resolver
+
+    get_resolver().url_patterns
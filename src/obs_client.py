@@ -0,0 +1,149 @@
+"""
+HTTP client for the OBS scraper: token-bucket pacing that adapts to the
+server, jittered retries and per-request latency metrics.
+
+The request rate grows additively while responses are fast and healthy, and
+is halved on 429/5xx or when a response takes much longer than usual (AIMD),
+so a run settles near the fastest rate OBS tolerates.
+"""
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+
+import requests
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Allows ``rate`` acquisitions per second on average, bursts of up to ``burst``."""
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class ObsClient:
+    """
+    ``get(url)`` returns the response body of a 200.
+
+    Connection errors, timeouts and RETRY_STATUSES are retried up to
+    ``retries`` times with full-jitter exponential backoff (or the server's
+    Retry-After); any other status, or running out of retries, raises
+    RuntimeError.
+    """
+
+    def __init__(
+        self,
+        rate: float = 2.0,
+        min_rate: float = 0.2,
+        max_rate: float = 10.0,
+        burst: float = 2.0,
+        increase: float = 0.1,
+        retries: int = 3,
+        backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        timeout=(5, 30),
+        spike_factor: float = 3.0,
+        spike_floor: float = 1.0,
+        headers=None,
+        session=None,
+    ):
+        self.bucket = TokenBucket(rate, burst)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.spike_factor = spike_factor
+        self.spike_floor = spike_floor
+        self.session = session or requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+
+        self.latencies = []
+        self.statuses = Counter()
+        self.retried = 0
+        self.slowdowns = 0
+        self._ewma = None
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    def _set_rate(self, rate: float):
+        with self.bucket.lock:
+            self.bucket.rate = max(self.min_rate, min(self.max_rate, rate))
+
+    def _slow_down(self):
+        self.slowdowns += 1
+        self._set_rate(self.rate / 2)
+
+    def _observe(self, latency: float, status):
+        self.latencies.append(latency)
+        self.statuses[status] += 1
+        # A spike is a response much slower than the recent average, ignoring sub-``spike_floor`` noise.
+        spike = self._ewma is not None and latency > max(self.spike_floor, self.spike_factor * self._ewma)
+        self._ewma = latency if self._ewma is None else 0.8 * self._ewma + 0.2 * latency
+        if status in RETRY_STATUSES or status == "error" or spike:
+            self._slow_down()
+        elif status == 200:
+            self._set_rate(self.rate + self.increase)
+
+    def _retry_delay(self, attempt: int, response=None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def get(self, url: str) -> str:
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            start = time.monotonic()
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._observe(time.monotonic() - start, "error")
+                if attempt == self.retries:
+                    raise RuntimeError(f"GET {url} failed after {attempt + 1} attempts: {e}") from e
+                response = None
+            else:
+                self._observe(time.monotonic() - start, response.status_code)
+                if response.status_code == 200:
+                    return response.text
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    raise RuntimeError(f"GET {response.status_code} for {url}")
+            self.retried += 1
+            time.sleep(self._retry_delay(attempt, response))
+
+    def summary(self) -> dict:
+        lat = sorted(self.latencies)
+        return {
+            "requests": len(lat),
+            "retried": self.retried,
+            "slowdowns": self.slowdowns,
+            "statuses": dict(self.statuses),
+            "rate": round(self.rate, 2),
+            "p50_ms": round(statistics.median(lat) * 1000, 1) if lat else None,
+            "p95_ms": round(lat[min(len(lat) - 1, int(len(lat) * 0.95))] * 1000, 1) if lat else None,
+            "max_ms": round(lat[-1] * 1000, 1) if lat else None,
+        }
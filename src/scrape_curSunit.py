@@ -1,13 +1,16 @@
 import csv
+import hashlib
 import json
+import os
 import re
 import time
 from pathlib import Path
 from urllib.parse import urljoin
 
-import requests
 from bs4 import BeautifulSoup
 
+from obs_client import ObsClient
+
 BASE = "https://obs.acibadem.edu.tr/oibs/bologna/"
 ROOT = Path(__file__).resolve().parent
 OUT_DIR = ROOT / "data" / "outputs"
@@ -24,17 +27,27 @@ HEADERS = {
 def clean_text(t: str) -> str:
     return " ".join((t or "").split())
 
-def get_html(url: str, tag: str) -> str:
-    r = requests.get(url, headers=HEADERS, timeout=30)
-    if r.status_code != 200:
-        raise RuntimeError(f"{tag} GET {r.status_code} for {url}")
+def raw_path(url: str, tag: str) -> Path:
     fname = re.sub(r"[^0-9a-zA-Z]+", "_", f"{tag}_{url.replace(BASE,'')}")
-    (RAW_DIR / f"{fname}.html").write_text(r.text, encoding="utf-8")
-    return r.text
+    return RAW_DIR / f"{fname}.html"
+
+# Paces, retries and times every request; see obs_client.py.
+CLIENT = ObsClient(headers=HEADERS)
+
+def get_html(url: str, tag: str) -> str:
+    try:
+        html = CLIENT.get(url)
+    except RuntimeError as e:
+        raise RuntimeError(f"{tag} {e}") from e
+    raw_path(url, tag).write_text(html, encoding="utf-8")
+    return html
 
 def fetch_program_about(cur_sunit: str, lang="tr") -> dict:
     url = urljoin(BASE, f"progAbout.aspx?lang={lang}&curSunit={cur_sunit}")
     html = get_html(url, f"about_{cur_sunit}")
+    return parse_program_about(html, cur_sunit, url)
+
+def parse_program_about(html: str, cur_sunit: str, url: str) -> dict:
     soup = BeautifulSoup(html, "lxml")
 
     top_fields = {}
@@ -204,41 +217,59 @@ def merge_courses_with_po(courses, po_rows):
 
     return list(by_code.values())
 
-def fetch_course_list(cur_sunit: str, lang="tr"):
-    candidates = [
-        f"progCourses.aspx?lang={lang}&curSunit={cur_sunit}",
-        f"progCourseList.aspx?lang={lang}&curSunit={cur_sunit}",
-        f"progCoursePlan.aspx?lang={lang}&curSunit={cur_sunit}",
+def course_list_urls(cur_sunit: str, lang="tr"):
+    return [
+        urljoin(BASE, rel)
+        for rel in (
+            f"progCourses.aspx?lang={lang}&curSunit={cur_sunit}",
+            f"progCourseList.aspx?lang={lang}&curSunit={cur_sunit}",
+            f"progCoursePlan.aspx?lang={lang}&curSunit={cur_sunit}",
+        )
     ]
 
-    for rel in candidates:
-        url = urljoin(BASE, rel)
+def fetch_course_list_page(cur_sunit: str, lang="tr"):
+    """
+    (url, html) of the first candidate page with a course table.
+
+    Raises RuntimeError when no page has one, so the unit fails and is retried
+    instead of being saved with an empty course list.
+    """
+    errors = []
+    for url in course_list_urls(cur_sunit, lang):
         print(f"[OPEN] {cur_sunit}: {url}")
         try:
             html = get_html(url, f"courses_raw_{cur_sunit}")
         except RuntimeError as e:
             print(f"[WARN] {cur_sunit}: get_html hata -> {e}")
+            errors.append(str(e))
             continue
 
         lower = html.lower()
         if "ders kodu" not in lower and "course code" not in lower and "ders adı" not in lower:
-            print(f"[INFO] {cur_sunit}: {rel} içinde ders tablosu yok gibi, devam ediyorum.")
+            print(f"[INFO] {cur_sunit}: {url} içinde ders tablosu yok gibi, devam ediyorum.")
             continue
 
-        courses = parse_course_table(html)
-        if courses:
-            unique = []
-            seen = set()
-            for c in courses:
-                key = (c.get("code"), c.get("name"))
-                if key in seen:
-                    continue
-                seen.add(key)
-                unique.append(c)
-            return unique
-
-    print(f"[WARN] {cur_sunit}: Hiçbir ders tablosu bulunamadı.")
-    return []
+        if parse_course_table(html):
+            return url, html
+
+    raise RuntimeError(
+        "Hiçbir ders tablosu bulunamadı" + (f" ({'; '.join(errors)})" if errors else "")
+    )
+
+def unique_courses(courses):
+    unique = []
+    seen = set()
+    for c in courses:
+        key = (c.get("code"), c.get("name"))
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(c)
+    return unique
+
+def fetch_course_list(cur_sunit: str, lang="tr"):
+    _, html = fetch_course_list_page(cur_sunit, lang=lang)
+    return unique_courses(parse_course_table(html))
 
 def parse_course_table(html: str):
     soup = BeautifulSoup(html, "lxml")
@@ -353,19 +384,27 @@ def parse_course_table(html: str):
     return all_courses
 
 
-def build_department_bundle(cur_sunit: str, lang: str = "tr") -> dict:
-    about = fetch_program_about(cur_sunit, lang=lang)
-
-    courses = fetch_course_list(cur_sunit, lang=lang)
-
-    compulsory_codes = {c["code"] for c in courses}
-
-    po_matrix = fetch_course_po_matrix(
-        cur_sunit,
-        lang=lang,
-        allowed_codes=compulsory_codes,
+def fetch_department_pages(cur_sunit: str, lang: str = "tr") -> dict:
+    """Raw pages a department bundle is parsed from: {name: {"url", "tag", "html"}}."""
+    about_url = urljoin(BASE, f"progAbout.aspx?lang={lang}&curSunit={cur_sunit}")
+    matrix_url = urljoin(BASE, f"progCourseMatrix.aspx?lang={lang}&curSunit={cur_sunit}")
+    courses_url, courses_html = fetch_course_list_page(cur_sunit, lang=lang)
+    pages = {
+        "about": {"url": about_url, "tag": f"about_{cur_sunit}"},
+        "matrix": {"url": matrix_url, "tag": f"po_matrix_{cur_sunit}"},
+    }
+    for page in pages.values():
+        page["html"] = get_html(page["url"], page["tag"])
+    pages["courses"] = {"url": courses_url, "tag": f"courses_raw_{cur_sunit}", "html": courses_html}
+    return pages
+
+def parse_department(cur_sunit: str, pages: dict) -> dict:
+    about = parse_program_about(pages["about"]["html"], cur_sunit, pages["about"]["url"])
+    courses = unique_courses(parse_course_table(pages["courses"]["html"])) if "courses" in pages else []
+    po_matrix = parse_po_from_relation(
+        pages["matrix"]["html"],
+        allowed_codes={c["code"] for c in courses},
     )
-
     return {
         "curSunit": cur_sunit,
         "about": about["about"],
@@ -373,7 +412,10 @@ def build_department_bundle(cur_sunit: str, lang: str = "tr") -> dict:
         "course_program_matrix": po_matrix,
     }
 
-def save_department_bundle(bundle: dict):
+def build_department_bundle(cur_sunit: str, lang: str = "tr") -> dict:
+    return parse_department(cur_sunit, fetch_department_pages(cur_sunit, lang=lang))
+
+def save_department_bundle(bundle: dict, write_csv: bool = True):
     cur = bundle["curSunit"]
     courses = bundle.get("courses", [])
 
@@ -384,6 +426,9 @@ def save_department_bundle(bundle: dict):
     )
     print("✅ Department JSON ->", jpath)
 
+    if not write_csv:
+        return
+
     cpath = OUT_DIR / f"courses_{cur}.csv"
     fieldnames = ["term", "code", "name", "ects", "status"]
 
@@ -397,6 +442,225 @@ def save_department_bundle(bundle: dict):
 
     print("✅ Courses CSV      ->", cpath)
 
+# -------------------
+# CHANGESETS
+# -------------------
+# Structural diff of a new bundle against the last saved one. Courses are
+# keyed by code, matrix rows by course_code; values are [old, new] pairs.
+# Changesets are written compactly to data/outputs/changes/ and are what the
+# importer (manage.py import_curriculum_changes) applies.
+
+CHANGES_DIR = OUT_DIR / "changes"
+COURSE_FIELDS = ("term", "name", "ects", "status")
+
+def load_saved_bundle(cur_sunit: str):
+    jpath = OUT_DIR / f"department_{cur_sunit}.json"
+    if not jpath.exists():
+        return None
+    return json.loads(jpath.read_text(encoding="utf-8"))
+
+def diff_fields(old: dict, new: dict, keys) -> dict:
+    return {k: [old.get(k), new.get(k)] for k in keys if old.get(k) != new.get(k)}
+
+def diff_bundles(old, new: dict) -> dict:
+    old = old or {}
+    old_courses = {}
+    for c in old.get("courses", []):
+        old_courses.setdefault(c["code"], c)
+    new_courses = {}
+    for c in new.get("courses", []):
+        new_courses.setdefault(c["code"], c)
+
+    changed = []
+    for code in sorted(old_courses.keys() & new_courses.keys()):
+        fields = diff_fields(old_courses[code], new_courses[code], COURSE_FIELDS)
+        if fields:
+            changed.append({"code": code, "fields": fields})
+
+    old_rows = {r["course_code"]: r for r in old.get("course_program_matrix", [])}
+    new_rows = {r["course_code"]: r for r in new.get("course_program_matrix", [])}
+    matrix = []
+    for code in sorted(old_rows.keys() | new_rows.keys()):
+        o, n = old_rows.get(code, {}), new_rows.get(code, {})
+        labels = sorted(
+            {k for k in (*o, *n) if k not in ("course_code", "course_name")},
+            key=lambda x: int(x[1:]) if x[1:].isdigit() else 0,
+        )
+        cells = diff_fields(o, n, labels)
+        if cells:
+            matrix.append({"course_code": code, "cells": cells})
+
+    return {
+        "curSunit": new["curSunit"],
+        "about": diff_fields(old.get("about", {}), new.get("about", {}), sorted({*old.get("about", {}), *new["about"]})),
+        "courses": {
+            "added": [new_courses[code] for code in sorted(new_courses.keys() - old_courses.keys())],
+            "removed": [old_courses[code] for code in sorted(old_courses.keys() - new_courses.keys())],
+            "changed": changed,
+        },
+        "matrix": matrix,
+    }
+
+def changeset_is_empty(changes: dict) -> bool:
+    return not (changes["about"] or changes["matrix"] or any(changes["courses"].values()))
+
+def save_changeset(changes: dict, base_sha256, bundle_sha256: str) -> Path:
+    CHANGES_DIR.mkdir(parents=True, exist_ok=True)
+    changes = {"base_sha256": base_sha256, "bundle_sha256": bundle_sha256, **changes}
+    # Timestamped names sort in the order the importer must apply them.
+    stem = f"{changes['curSunit']}_{time.strftime('%Y%m%dT%H%M%S')}"
+    path = CHANGES_DIR / f"{stem}.json"
+    n = 1
+    while path.exists():
+        n += 1
+        path = CHANGES_DIR / f"{stem}_{n}.json"
+    path.write_text(json.dumps(changes, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    c = changes["courses"]
+    print(
+        f"✅ Changeset        -> {path} (+{len(c['added'])} -{len(c['removed'])} ~{len(c['changed'])} ders, "
+        f"{len(changes['matrix'])} matris satırı)"
+    )
+    return path
+
+# -------------------
+# RUN MANIFEST
+# -------------------
+# Per-department checkpoints of a scrape run, so an interrupted run can resume:
+#   pending -> fetched (raw pages on disk, with sha256) -> parsed -> saved
+# A unit that raised keeps its last checkpoint and gets an "error".
+
+MANIFEST_PATH = OUT_DIR / "manifest.json"
+STATES = ("pending", "fetched", "parsed", "saved")
+
+def sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def load_manifest() -> dict:
+    if MANIFEST_PATH.exists():
+        return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    return {"version": 1, "units": {}}
+
+def save_manifest(manifest: dict):
+    # Write-then-rename so a crash never leaves a half-written manifest.
+    tmp = MANIFEST_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, MANIFEST_PATH)
+
+def load_checkpointed_pages(unit: dict):
+    """Pages recorded at the "fetched" checkpoint, if they are still on disk unchanged."""
+    pages = {}
+    for name, page in unit.get("pages", {}).items():
+        path = Path(page["file"])
+        if not path.exists():
+            return None
+        html = path.read_text(encoding="utf-8")
+        if sha256_text(html) != page["sha256"]:
+            return None
+        pages[name] = {"url": page["url"], "tag": page["tag"], "html": html}
+    return pages or None
+
+def process_unit(cur_sunit: str, unit: dict, manifest: dict, lang: str, allow_remove_all: bool = False):
+    """Run one department from its last checkpoint to "saved", saving the manifest after each step."""
+    def checkpoint(state):
+        unit["state"] = state
+        unit["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        save_manifest(manifest)
+
+    pages = load_checkpointed_pages(unit) if unit["state"] in ("fetched", "parsed") else None
+    if pages is None:
+        pages = fetch_department_pages(cur_sunit, lang=lang)
+        unit["pages"] = {
+            name: {
+                "url": page["url"],
+                "tag": page["tag"],
+                "file": str(raw_path(page["url"], page["tag"])),
+                "sha256": sha256_text(page["html"]),
+            }
+            for name, page in pages.items()
+        }
+        checkpoint("fetched")
+    else:
+        print(f"[RESUME] {cur_sunit}: kayıtlı sayfalar kullanılıyor")
+
+    bundle = parse_department(cur_sunit, pages)
+    previous = load_saved_bundle(cur_sunit)
+    # An empty course list is almost always a broken page, and its changeset would make the
+    # importer delete the whole curriculum.
+    if previous and previous.get("courses") and not bundle["courses"] and not allow_remove_all:
+        unit["state"] = "pending"  # refetch on the next attempt
+        raise RuntimeError(
+            f"Ders listesi boş, önceki {len(previous['courses'])} ders silinmiyor "
+            "(gerçekten kaldırıldıysa --allow-remove-all)"
+        )
+    checkpoint("parsed")
+
+    bundle_hash = sha256_text(json.dumps(bundle, ensure_ascii=False, sort_keys=True))
+    changes = None
+    if previous is not None and unit.get("bundle_sha256") != bundle_hash:
+        changes = diff_bundles(previous, bundle)
+    if previous is not None and (changes is None or changeset_is_empty(changes)):
+        print(f"[SKIP] {cur_sunit}: değişiklik yok")
+    else:
+        changes = changes or diff_bundles(previous, bundle)
+        base_hash = sha256_text(json.dumps(previous, ensure_ascii=False, sort_keys=True)) if previous else None
+        unit["changeset"] = str(save_changeset(changes, base_hash, bundle_hash))
+        c = changes["courses"]
+        save_department_bundle(bundle, write_csv=previous is None or bool(c["added"] or c["removed"] or c["changed"]))
+    unit["bundle_sha256"] = bundle_hash
+    unit["error"] = None
+    checkpoint("saved")
+
+def run(ids, lang="tr", resume=False, retries=2, backoff=2.0, allow_remove_all=False):
+    """Scrape ``ids`` with checkpoints; returns {cur_sunit: final state}."""
+    manifest = load_manifest()
+    manifest["lang"] = lang
+    if not ids:
+        ids = list(manifest["units"])
+    for cs in ids:
+        unit = manifest["units"].get(cs)
+        if unit is None or not resume:
+            # A fresh run starts over but keeps the last bundle hash, so unchanged bundles are not rewritten.
+            manifest["units"][cs] = {
+                "state": "pending",
+                "attempts": 0,
+                "error": None,
+                "bundle_sha256": (unit or {}).get("bundle_sha256"),
+            }
+    save_manifest(manifest)
+
+    skipped = 0
+    for cs in ids:
+        unit = manifest["units"][cs]
+        if unit["state"] == "saved":
+            skipped += 1
+            continue
+        for attempt in range(retries + 1):
+            if attempt:
+                delay = backoff * 2 ** (attempt - 1)
+                print(f"[RETRY] {cs}: {delay:.1f}s sonra tekrar deneniyor ({attempt}/{retries})")
+                time.sleep(delay)
+            unit["attempts"] = unit.get("attempts", 0) + 1
+            try:
+                process_unit(cs, unit, manifest, lang, allow_remove_all=allow_remove_all)
+                break
+            except Exception as e:
+                unit["error"] = f"{type(e).__name__}: {e}"
+                save_manifest(manifest)
+                print(f"[WARN] {cs}: {e}")
+
+    states = {cs: manifest["units"][cs]["state"] for cs in ids}
+    failed = [cs for cs in ids if manifest["units"][cs].get("error")]
+    saved = sum(1 for cs in ids if states[cs] == "saved" and cs not in failed)
+    print(f"[SUMMARY] {len(ids)} bölüm: {saved} kaydedildi ({skipped} önceki çalıştırmadan), {len(failed)} başarısız")
+    for cs in failed:
+        print(f"  - {cs} [{states[cs]}] {manifest['units'][cs]['error']}")
+    m = CLIENT.summary()
+    print(
+        f"[HTTP] {m['requests']} istek, {m['retried']} tekrar, {m['slowdowns']} yavaşlama, "
+        f"p50 {m['p50_ms']} ms, p95 {m['p95_ms']} ms, max {m['max_ms']} ms, son hız {m['rate']}/sn, durum {m['statuses']}"
+    )
+    return states
+
 if __name__ == "__main__":
     import argparse
 
@@ -409,17 +673,31 @@ if __name__ == "__main__":
         help="curSunit id (birden fazla kez yazabilirsin: --dept 6166 --dept 6170)",
     )
     parser.add_argument("--lang", default="tr", help="Sayfa dili (varsayılan: tr)")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Yarıda kalan çalıştırmaya devam et: kaydedilenleri atla, başarısızları tekrar dene",
+    )
+    parser.add_argument("--retries", type=int, default=2, help="Başarısız bölüm için tekrar sayısı")
+    parser.add_argument("--backoff", type=float, default=2.0, help="İlk tekrar beklemesi (sn), her denemede iki katı")
+    parser.add_argument("--rate", type=float, default=2.0, help="Başlangıç istek hızı (istek/sn), sunucuya göre ayarlanır")
+    parser.add_argument("--max-rate", type=float, default=10.0, help="İstek hızı üst sınırı (istek/sn)")
+    parser.add_argument(
+        "--allow-remove-all",
+        action="store_true",
+        help="Ders listesi boş gelen bölüm için tüm dersleri silen changeset yazılmasına izin ver",
+    )
     args = parser.parse_args()
+    CLIENT = ObsClient(headers=HEADERS, rate=args.rate, max_rate=args.max_rate)
 
-    if not args.dept:
+    if not args.dept and not args.resume:
         print("Kullanım: python src/scrape_curSunit.py --dept 6166")
         raise SystemExit(1)
 
-    ids = list(dict.fromkeys(args.dept))
-    for cs in ids:
-        try:
-            bundle = build_department_bundle(cs, lang=args.lang)
-            save_department_bundle(bundle)
-            time.sleep(0.3)
-        except Exception as e:
-            print(f"[WARN] {cs}: {e}")
+    ids = list(dict.fromkeys(args.dept or []))
+    states = run(
+        ids, lang=args.lang, resume=args.resume, retries=args.retries, backoff=args.backoff,
+        allow_remove_all=args.allow_remove_all,
+    )
+    if any(state != "saved" for state in states.values()):
+        raise SystemExit(2)
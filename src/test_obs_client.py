@@ -0,0 +1,157 @@
+"""
+ObsClient against a local stub server that injects faults.
+
+Run from the repository root with ``python -m unittest discover -s src``.
+"""
+import socket
+import threading
+import time
+import unittest
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import obs_client
+from obs_client import ObsClient
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Replies to each path with the next scripted fault, then with 200."""
+
+    def do_GET(self):
+        self.server.hits[self.path] += 1
+        script = self.server.scripts[self.path]
+        action = script.popleft() if script else "200"
+        kind, _, arg = action.partition(":")
+        if kind == "drop":
+            # Close the connection without sending a status line.
+            self.close_connection = True
+            return
+        if kind == "slow":
+            time.sleep(float(arg))
+            kind = "200"
+        status = int(kind)
+        self.send_response(status)
+        if status == 429 and arg:
+            self.send_header("Retry-After", arg)
+        body = f"{status} {self.path}".encode()
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that timed out have hung up; a broken pipe is expected.
+        pass
+
+
+class ObsClientTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StubServer(("127.0.0.1", 0), StubHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.scripts = defaultdict(deque)
+        self.server.hits = defaultdict(int)
+
+    def client(self, **kwargs):
+        options = dict(rate=8.0, min_rate=0.5, max_rate=100.0, burst=10.0, increase=0.0, retries=3,
+                       backoff=0.01, max_backoff=0.05, timeout=(1, 1))
+        options.update(kwargs)
+        return ObsClient(**options)
+
+    def script(self, path, *actions):
+        self.server.scripts[path].extend(actions)
+        return self.base + path
+
+    def test_success(self):
+        client = self.client(increase=1.0)
+        self.assertEqual(client.get(self.script("/ok")), "200 /ok")
+        self.assertEqual(client.rate, 9.0)
+        self.assertEqual(client.summary()["requests"], 1)
+
+    def test_429_honours_retry_after(self):
+        client = self.client(max_backoff=5)
+        url = self.script("/busy", "429:1")
+        with mock.patch.object(obs_client.time, "sleep", wraps=time.sleep) as sleep:
+            self.assertEqual(client.get(url), "200 /busy")
+        sleep.assert_any_call(1.0)
+        self.assertEqual(self.server.hits["/busy"], 2)
+        self.assertEqual((client.retried, client.slowdowns, client.rate), (1, 1, 4.0))
+        self.assertEqual(client.statuses, {429: 1, 200: 1})
+
+    def test_server_errors_are_retried(self):
+        client = self.client()
+        url = self.script("/flaky", "500", "503")
+        self.assertEqual(client.get(url), "200 /flaky")
+        self.assertEqual(self.server.hits["/flaky"], 3)
+        self.assertEqual((client.retried, client.rate), (2, 2.0))
+
+    def test_dropped_connection_is_retried(self):
+        client = self.client()
+        url = self.script("/drop", "drop")
+        self.assertEqual(client.get(url), "200 /drop")
+        self.assertEqual(client.statuses, {"error": 1, 200: 1})
+        self.assertEqual(client.rate, 4.0)
+
+    def test_read_timeout_is_retried(self):
+        client = self.client(timeout=(1, 0.2))
+        url = self.script("/hang", "slow:0.5")
+        self.assertEqual(client.get(url), "200 /hang")
+        self.assertEqual(client.statuses, {"error": 1, 200: 1})
+        self.assertEqual(client.rate, 4.0)
+
+    def test_latency_spike_halves_rate(self):
+        client = self.client(spike_floor=0.1)
+        for _ in range(3):
+            client.get(self.script("/fast"))
+        self.assertEqual(client.rate, 8.0)
+        client.get(self.script("/spike", "slow:0.3"))
+        self.assertEqual((client.slowdowns, client.retried, client.rate), (1, 0, 4.0))
+
+    def test_refused_port(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        client = self.client(retries=2)
+        with self.assertRaisesRegex(RuntimeError, "failed after 3 attempts"):
+            client.get(f"http://127.0.0.1:{port}/")
+        self.assertEqual(client.statuses, {"error": 3})
+        self.assertEqual(client.rate, 1.0)
+
+    def test_gives_up_after_retries(self):
+        client = self.client(retries=2)
+        url = self.script("/down", "503", "503", "503", "503")
+        with self.assertRaisesRegex(RuntimeError, "GET 503"):
+            client.get(url)
+        self.assertEqual(self.server.hits["/down"], 3)
+        self.assertEqual((client.retried, client.slowdowns, client.rate), (2, 3, 1.0))
+
+    def test_other_statuses_are_not_retried(self):
+        client = self.client()
+        with self.assertRaisesRegex(RuntimeError, "GET 404"):
+            client.get(self.script("/missing", "404"))
+        self.assertEqual(self.server.hits["/missing"], 1)
+
+    def test_rate_stays_within_bounds(self):
+        client = self.client(rate=1.0, min_rate=0.5, retries=3)
+        client.get(self.script("/floor", "503", "503", "503"))
+        self.assertEqual(client.rate, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()